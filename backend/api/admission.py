@@ -0,0 +1,236 @@
+"""
+Kontrola dopuszczania żądań korzystających z API OpenAI.
+
+Analizy trwają długo i zajmują wątek serwera przez cały czas oczekiwania
+na odpowiedź modelu. Bez limitu seria żądań analiz zajmuje wszystkie wątki
+i blokuje szybkie żądania GET obsługiwane przez te same procesy.
+
+AdmissionController ogranicza liczbę jednoczesnych zapytań do API (łącznie
+i na użytkownika - właściciela kosmogramu). Żądanie ponad limit czeka
+w ograniczonej kolejce najwyżej queue_timeout sekund; gdy kolejka jest
+pełna lub czas oczekiwania minie, zgłaszany jest AdmissionRejected
+(odpowiedź 429 z nagłówkiem Retry-After).
+
+Limit dotyczy jednego procesu; zadania kolejki (/api/analyze) są
+ograniczane liczbą oczekujących zadań w bazie (api/jobs.py).
+"""
+
+import math
+import threading
+import time
+
+# Domyślne ustawienia kontroli dopuszczania
+DEFAULT_MAX_IN_FLIGHT = 20
+DEFAULT_MAX_PER_USER = 4
+DEFAULT_MAX_QUEUE = 20
+DEFAULT_QUEUE_TIMEOUT = 2.0
+DEFAULT_RETRY_AFTER = 5
+
+
+class AdmissionRejected(Exception):
+    """Żądanie odrzucone z powodu przeciążenia (HTTP 429)."""
+
+    def __init__(self, message, retry_after=DEFAULT_RETRY_AFTER):
+        """
+        Args:
+            message (str): Opis błędu
+            retry_after (int, optional): Sugerowany czas (w sekundach) przed ponowieniem żądania
+        """
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+class AdmissionSlot:
+    """Miejsca przydzielone żądaniu; zwalniane przez release (wielokrotne wywołanie jest bezpieczne)."""
+
+    def __init__(self, controller, user_id, slots):
+        self.controller = controller
+        self.user_id = user_id
+        self.slots = slots
+        self._acquired_at = time.monotonic()
+        self._released = False
+        self._lock = threading.Lock()
+
+    def release(self):
+        """Zwalnia miejsca."""
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        self.controller._release(self.user_id, self.slots, time.monotonic() - self._acquired_at)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class AdmissionController:
+    """Limit jednoczesnych zapytań do API (łączny i na użytkownika) z ograniczoną kolejką oczekujących."""
+
+    def __init__(self, max_in_flight=DEFAULT_MAX_IN_FLIGHT, max_per_user=DEFAULT_MAX_PER_USER,
+                 max_queue=DEFAULT_MAX_QUEUE, queue_timeout=DEFAULT_QUEUE_TIMEOUT,
+                 retry_after=DEFAULT_RETRY_AFTER):
+        """
+        Args:
+            max_in_flight (int, optional): Maksymalna liczba jednoczesnych zapytań do API
+            max_per_user (int, optional): Maksymalna liczba jednoczesnych zapytań jednego użytkownika
+            max_queue (int, optional): Maksymalna liczba żądań oczekujących na wolne miejsce
+            queue_timeout (float, optional): Maksymalny czas oczekiwania (w sekundach)
+            retry_after (int, optional): Czas Retry-After, zanim znany jest średni czas zapytania
+        """
+        self._condition = threading.Condition()
+        self.configure(max_in_flight, max_per_user, max_queue, queue_timeout, retry_after)
+
+        self.in_flight = 0
+        self.queued = 0
+        self._per_user = {}
+
+        # Metryki
+        self.admitted = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self._waited = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._completed = 0
+        self._hold_total = 0.0
+
+    def configure(self, max_in_flight=None, max_per_user=None, max_queue=None, queue_timeout=None,
+                  retry_after=None):
+        """
+        Zmienia limity (np. z ustawień aplikacji); pominięte argumenty pozostają bez zmian.
+
+        Args:
+            max_in_flight (int, optional): Maksymalna liczba jednoczesnych zapytań do API
+            max_per_user (int, optional): Maksymalna liczba jednoczesnych zapytań jednego użytkownika
+            max_queue (int, optional): Maksymalna liczba żądań oczekujących na wolne miejsce
+            queue_timeout (float, optional): Maksymalny czas oczekiwania (w sekundach)
+            retry_after (int, optional): Czas Retry-After, zanim znany jest średni czas zapytania
+        """
+        with self._condition:
+            if max_in_flight is not None:
+                self.max_in_flight = max_in_flight
+            if max_per_user is not None:
+                self.max_per_user = max_per_user
+            if max_queue is not None:
+                self.max_queue = max_queue
+            if queue_timeout is not None:
+                self.queue_timeout = queue_timeout
+            if retry_after is not None:
+                self.retry_after = retry_after
+            self._condition.notify_all()
+
+    def _fits(self, user_id, slots):
+        """Sprawdza, czy są wolne miejsca (wywoływane z blokadą)."""
+        if self.in_flight + slots > self.max_in_flight:
+            return False
+        return user_id is None or self._per_user.get(user_id, 0) + slots <= self.max_per_user
+
+    def _retry_after(self):
+        """Szacuje czas do zwolnienia miejsca: średni czas zapytania (wywoływane z blokadą)."""
+        if not self._completed:
+            return self.retry_after
+        return max(1, math.ceil(self._hold_total / self._completed))
+
+    def _reject(self, message):
+        """Zlicza odrzucenie i zwraca wyjątek (wywoływane z blokadą)."""
+        self.rejected += 1
+        return AdmissionRejected(message, self._retry_after())
+
+    def max_slots(self, user_id=None):
+        """
+        Zwraca największą liczbę miejsc, jaką może otrzymać jedno żądanie.
+
+        Args:
+            user_id (int, optional): ID użytkownika
+
+        Returns:
+            int: Liczba miejsc
+        """
+        if user_id is None:
+            return self.max_in_flight
+        return min(self.max_in_flight, self.max_per_user)
+
+    def acquire(self, user_id=None, slots=1):
+        """
+        Przydziela miejsca na zapytania do API, czekając w kolejce, jeśli limit jest osiągnięty.
+
+        Args:
+            user_id (int, optional): ID użytkownika; None - tylko limit łączny
+            slots (int, optional): Liczba jednoczesnych zapytań żądania (np. analiza kilku obszarów)
+
+        Returns:
+            AdmissionSlot: Przydzielone miejsca (do zwolnienia przez release lub blok with)
+
+        Raises:
+            AdmissionRejected: Jeśli kolejka jest pełna lub minął czas oczekiwania
+        """
+        slots = max(1, min(slots, self.max_slots(user_id)))
+
+        with self._condition:
+            if not self._fits(user_id, slots):
+                if self.queued >= self.max_queue:
+                    raise self._reject("Zbyt wiele analiz w toku - spróbuj ponownie później")
+
+                self.queued += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queued)
+                started = time.monotonic()
+                try:
+                    admitted = self._condition.wait_for(lambda: self._fits(user_id, slots), self.queue_timeout)
+                finally:
+                    self.queued -= 1
+
+                waited = time.monotonic() - started
+                self._waited += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                if not admitted:
+                    raise self._reject("Zbyt wiele analiz w toku - spróbuj ponownie później")
+
+            self.in_flight += slots
+            if user_id is not None:
+                self._per_user[user_id] = self._per_user.get(user_id, 0) + slots
+            self.admitted += 1
+
+        return AdmissionSlot(self, user_id, slots)
+
+    def _release(self, user_id, slots, held):
+        """Zwalnia miejsca i budzi oczekujące żądania."""
+        with self._condition:
+            self.in_flight -= slots
+            if user_id is not None:
+                remaining = self._per_user.get(user_id, 0) - slots
+                if remaining > 0:
+                    self._per_user[user_id] = remaining
+                else:
+                    self._per_user.pop(user_id, None)
+
+            self._completed += 1
+            self._hold_total += held
+            self._condition.notify_all()
+
+    def stats(self):
+        """
+        Zwraca metryki kontroli dopuszczania.
+
+        Returns:
+            dict: Limity, liczba zapytań w toku i oczekujących, dopuszczonych i odrzuconych
+                żądań oraz czas oczekiwania w kolejce (w milisekundach)
+        """
+        with self._condition:
+            return {
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'max_per_user': self.max_per_user,
+                'queued': self.queued,
+                'max_queue': self.max_queue,
+                'max_queue_depth': self.max_queue_depth,
+                'users': len(self._per_user),
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'avg_wait_ms': round(self._wait_total / self._waited * 1000, 2) if self._waited else 0.0,
+                'max_wait_ms': round(self._wait_max * 1000, 2)
+            }
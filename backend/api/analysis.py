@@ -0,0 +1,231 @@
+"""
+Analiza kosmogramu dla obszaru życia za pomocą OpenAI.
+
+Funkcje są niezależne od żądania HTTP, więc analizę można wykonać zarówno
+w obsłudze żądania, jak i w procesie roboczym kolejki zadań (api/jobs.py).
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from flask import current_app
+
+from ..database.utils import (
+    get_birth_chart, get_life_area, get_varga_chart, save_chart_analysis, save_chart_analyses
+)
+from ..astro.chart import VargaSet
+from ..astro.utils import combine_varga_charts
+
+logger = logging.getLogger(__name__)
+
+# Domyślna maksymalna liczba jednoczesnych zapytań do API przy analizie wielu obszarów
+DEFAULT_MAX_PARALLEL = 5
+
+
+class AnalysisError(Exception):
+    """Błąd przygotowania lub wykonania analizy."""
+
+    def __init__(self, message, status_code=500):
+        """
+        Args:
+            message (str): Opis błędu
+            status_code (int, optional): Kod odpowiedzi HTTP odpowiadający błędowi
+        """
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def check_analysis_target(chart_id, life_area_id):
+    """
+    Sprawdza, czy kosmogram i obszar życia istnieją.
+
+    Args:
+        chart_id (int): ID kosmogramu
+        life_area_id (int): ID obszaru życia
+
+    Returns:
+        tuple: (BirthChart, LifeArea)
+
+    Raises:
+        AnalysisError: Jeśli kosmogram lub obszar życia nie istnieje (404)
+    """
+    chart = get_birth_chart(chart_id)
+    if not chart:
+        raise AnalysisError("Nie znaleziono kosmogramu", 404)
+
+    life_area = get_life_area(life_area_id)
+    if not life_area:
+        raise AnalysisError("Nie znaleziono obszaru życia", 404)
+
+    return chart, life_area
+
+
+def load_varga_set(chart_id, calculator):
+    """
+    Wczytuje zapisany kosmogram D1 jako zbiór varg obliczanych na żądanie.
+
+    Args:
+        chart_id (int): ID kosmogramu
+        calculator (VedicAstroCalculator): Kalkulator używany do obliczania varg
+
+    Returns:
+        VargaSet: Vargi kosmogramu
+
+    Raises:
+        AnalysisError: Jeśli nie zapisano kosmogramu D1 (404)
+    """
+    # Vargi D2-D12 są wyliczane z zapisanego D1
+    d1 = get_varga_chart(chart_id, 'D1')
+    if not d1:
+        raise AnalysisError("Brak danych kosmogramu D1", 404)
+    return VargaSet(d1.data, calculator)
+
+
+def combine_for_area(varga_set, life_area):
+    """
+    Łączy vargi potrzebne dla obszaru życia.
+
+    Args:
+        varga_set (VargaSet): Vargi kosmogramu (mogą być współdzielone przez kilka obszarów)
+        life_area (LifeArea): Obszar życia
+
+    Returns:
+        tuple: (połączony kosmogram, słownik z danymi obszaru życia)
+
+    Raises:
+        AnalysisError: Jeśli nie można połączyć varg
+    """
+    # Oblicz tylko vargi potrzebne dla obszaru życia
+    varga_types = life_area.varga_combination.split(',')
+    vargas_data = varga_set.select(
+        varga_type for varga_type in varga_types if varga_type in varga_set
+    )
+
+    combined_chart = combine_varga_charts(vargas_data, varga_types)
+    if not combined_chart:
+        raise AnalysisError("Nie można połączyć kosmogramów varg")
+
+    return combined_chart, {
+        'name': life_area.name,
+        'description': life_area.description,
+        'varga_combination': life_area.varga_combination,
+        'prompt_template': life_area.prompt_template
+    }
+
+
+def prepare_analysis(chart_id, life_area_id, calculator):
+    """
+    Przygotowuje dane do analizy: łączy vargi potrzebne dla obszaru życia.
+
+    Args:
+        chart_id (int): ID kosmogramu
+        life_area_id (int): ID obszaru życia
+        calculator (VedicAstroCalculator): Kalkulator używany do obliczania varg
+
+    Returns:
+        tuple: (połączony kosmogram, słownik z danymi obszaru życia)
+
+    Raises:
+        AnalysisError: Jeśli brakuje danych kosmogramu lub obszaru życia
+    """
+    _, life_area = check_analysis_target(chart_id, life_area_id)
+    return combine_for_area(load_varga_set(chart_id, calculator), life_area)
+
+
+def run_analysis(chart_id, life_area_id, calculator, client, use_cache=True):
+    """
+    Przeprowadza analizę obszaru życia i zapisuje jej wynik.
+
+    Args:
+        chart_id (int): ID kosmogramu
+        life_area_id (int): ID obszaru życia
+        calculator (VedicAstroCalculator): Kalkulator
+        client (OpenAIClient): Klient OpenAI
+        use_cache (bool, optional): False - nie używaj odpowiedzi z pamięci podręcznej
+
+    Returns:
+        ChartAnalysis: Zapisana analiza
+
+    Raises:
+        AnalysisError: Jeśli analiza lub jej zapis się nie powiodły
+    """
+    combined_chart, life_area = prepare_analysis(chart_id, life_area_id, calculator)
+
+    analysis_result = client.analyze_area(combined_chart, life_area, use_cache=use_cache)
+    if not analysis_result:
+        raise AnalysisError("Nie udało się przeprowadzić analizy")
+
+    saved_analysis = save_chart_analysis(chart_id, life_area_id, analysis_result)
+    if not saved_analysis:
+        raise AnalysisError("Nie udało się zapisać analizy")
+
+    return saved_analysis
+
+
+def run_area_analyses(chart_id, life_areas, calculator, client, max_workers=DEFAULT_MAX_PARALLEL, use_cache=True):
+    """
+    Przeprowadza analizy kilku obszarów życia jednocześnie i zapisuje je w jednej transakcji.
+
+    Kosmogram D1 jest wczytywany raz, a vargi są obliczane raz i współdzielone
+    przez wszystkie obszary. Zapytania do API (analyze_area) są wykonywane
+    równolegle w puli wątków o ograniczonym rozmiarze, więc czas odpowiedzi
+    zależy od najdłuższej analizy, a nie od ich sumy.
+
+    Args:
+        chart_id (int): ID kosmogramu
+        life_areas (list): Obszary życia (LifeArea)
+        calculator (VedicAstroCalculator): Kalkulator
+        client (OpenAIClient): Klient OpenAI
+        max_workers (int, optional): Maksymalna liczba jednoczesnych zapytań do API
+        use_cache (bool, optional): False - nie używaj odpowiedzi z pamięci podręcznej
+
+    Returns:
+        tuple: (słownik life_area_id -> ChartAnalysis, słownik life_area_id -> opis błędu)
+
+    Raises:
+        AnalysisError: Jeśli brakuje danych kosmogramu lub nie udało się zapisać analiz
+    """
+    varga_set = load_varga_set(chart_id, calculator)
+
+    # Vargi są obliczane w bieżącym wątku; w puli wykonywane są tylko zapytania do API
+    prepared = {}
+    errors = {}
+    for life_area in life_areas:
+        try:
+            prepared[life_area.id] = combine_for_area(varga_set, life_area)
+        except AnalysisError as e:
+            errors[life_area.id] = e.message
+
+    # Klient może odczytywać konfigurację aplikacji - wątki potrzebują jej kontekstu
+    app = current_app._get_current_object()
+
+    def analyze(combined_chart, life_area):
+        with app.app_context():
+            return client.analyze_area(combined_chart, life_area, use_cache=use_cache)
+
+    results = {}
+    if prepared:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prepared)))) as executor:
+            futures = {
+                executor.submit(analyze, combined_chart, life_area): life_area_id
+                for life_area_id, (combined_chart, life_area) in prepared.items()
+            }
+            for future in as_completed(futures):
+                life_area_id = futures[future]
+                try:
+                    analysis_result = future.result()
+                except Exception as e:
+                    logger.error(f"Błąd podczas analizy obszaru życia #{life_area_id}: {str(e)}")
+                    analysis_result = None
+
+                if analysis_result:
+                    results[life_area_id] = analysis_result
+                else:
+                    errors[life_area_id] = "Nie udało się przeprowadzić analizy"
+
+    saved = save_chart_analyses(chart_id, results) if results else {}
+    if saved is None:
+        raise AnalysisError("Nie udało się zapisać analiz")
+
+    return saved, errors
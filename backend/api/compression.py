@@ -0,0 +1,133 @@
+"""
+Kompresja odpowiedzi HTTP (gzip, opcjonalnie brotli).
+
+Odpowiedzi są kompresowane, gdy klient deklaruje obsługę kodowania
+(Accept-Encoding), typ zawartości nadaje się do kompresji, a odpowiedź
+jest wystarczająco duża. Odpowiedzi strumieniowe (NDJSON) są kompresowane
+fragment po fragmencie z opróżnianiem bufora kompresora po każdym
+fragmencie, więc klient otrzymuje wiersze na bieżąco.
+
+Silny ETag skompresowanej odpowiedzi otrzymuje przyrostek kodowania
+(np. "abc-gzip"), bo jest to inna reprezentacja zasobu;
+http_cache.is_not_modified uznaje wszystkie warianty.
+
+Brotli jest używane, jeśli zainstalowany jest pakiet brotli.
+"""
+
+import gzip
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - zależność opcjonalna
+    brotli = None
+
+# Domyślne ustawienia kompresji
+DEFAULT_COMPRESS_MIN_SIZE = 1024
+DEFAULT_COMPRESS_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 5
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+
+
+def choose_encoding(accept_encoding):
+    """
+    Wybiera kodowanie odpowiedzi.
+
+    Args:
+        accept_encoding (MIMEAccept): Nagłówek Accept-Encoding żądania
+
+    Returns:
+        str: 'br', 'gzip' lub None, jeśli klient nie obsługuje żadnego z nich
+    """
+    if brotli is not None and accept_encoding['br']:
+        return 'br'
+    if accept_encoding['gzip']:
+        return 'gzip'
+    return None
+
+
+def _compress(data, encoding, level, quality):
+    """Kompresuje całą treść odpowiedzi."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=quality)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _compress_stream(chunks, encoding, level, quality):
+    """
+    Kompresuje odpowiedź strumieniową.
+
+    Bufor kompresora jest opróżniany (Z_SYNC_FLUSH) po każdym fragmencie,
+    więc klient może zdekodować każdy wiersz NDJSON od razu po jego wysłaniu.
+    Słownik kompresora jest zachowywany między fragmentami.
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=quality)
+        process, flush = compressor.process, compressor.flush
+    else:
+        # wbits=31 - format gzip
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        process, flush = compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    for chunk in chunks:
+        data = process(chunk) + flush()
+        if data:
+            yield data
+
+    yield compressor.finish() if encoding == 'br' else compressor.flush()
+
+
+def compress_response(response, app):
+    """
+    Kompresuje odpowiedź, jeśli klient to obsługuje (funkcja after_request).
+
+    Args:
+        response (Response): Odpowiedź
+        app (Flask): Aplikacja (ustawienia COMPRESS_*)
+
+    Returns:
+        Response: Ta sama odpowiedź, ewentualnie skompresowana
+    """
+    if (not app.config.get('COMPRESS_RESPONSES', True)
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'Content-Encoding' in response.headers):
+        return response
+
+    encoding = choose_encoding(request.accept_encodings)
+    response.vary.add('Accept-Encoding')
+    if encoding is None:
+        return response
+
+    level = app.config.get('COMPRESS_LEVEL', DEFAULT_COMPRESS_LEVEL)
+    quality = app.config.get('BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY)
+
+    if response.is_streamed:
+        response.response = _compress_stream(response.iter_encoded(), encoding, level, quality)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < app.config.get('COMPRESS_MIN_SIZE', DEFAULT_COMPRESS_MIN_SIZE):
+            return response
+        response.set_data(_compress(data, encoding, level, quality))
+
+    response.headers['Content-Encoding'] = encoding
+
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f'{etag}-{encoding}')
+    return response
+
+
+def init_compression(app):
+    """
+    Włącza kompresję odpowiedzi aplikacji.
+
+    Args:
+        app (Flask): Aplikacja Flask
+    """
+    app.after_request(lambda response: compress_response(response, app))
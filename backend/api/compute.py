@@ -0,0 +1,173 @@
+"""
+Bezstanowe obliczenia kosmogramów (bez zapisu w bazie danych).
+
+Kosmogramy D1 są najpierw szukane w pamięci podręcznej kalkulatora,
+a brakujące obliczane małymi paczkami we współdzielonej puli procesów
+(VedicAstroCalculator.submit_charts). Wyniki obliczeń trafiają
+do pamięci podręcznej, a wybrane vargi są wyliczane z D1 (VargaSet).
+
+W trybie wsadowym każdy wynik jest wysyłany jako wiersz NDJSON zaraz po
+obliczeniu paczki, która go zawiera, więc kolejność wierszy może różnić się
+od kolejności wejściowej - wiersze zawierają pole 'index'.
+"""
+
+import logging
+import os
+from concurrent.futures import wait, FIRST_COMPLETED
+from datetime import datetime
+
+from ..astro.calculator import BatchError
+from ..astro.chart import VargaSet
+from ..serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Domyślna liczba rekordów w paczce wysyłanej do procesu - małe paczki
+# pozwalają wysyłać pierwsze wyniki szybko
+COMPUTE_CHUNK_SIZE = 16
+
+# Domyślna maksymalna liczba rekordów w jednym żądaniu wsadowym
+MAX_COMPUTE_BATCH = 10000
+
+
+def parse_birth(data):
+    """
+    Waliduje i konwertuje dane urodzeniowe.
+
+    Args:
+        data (dict): Pola birth_date (ISO), latitude, longitude
+
+    Returns:
+        tuple: (birth_date, latitude, longitude)
+
+    Raises:
+        ValueError: Jeśli dane są niepoprawne
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Dane urodzeniowe muszą być obiektem JSON")
+
+    missing = [field for field in ('birth_date', 'latitude', 'longitude') if data.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"Brakujące wymagane pola: {', '.join(missing)}")
+
+    try:
+        birth_date = datetime.fromisoformat(str(data['birth_date']))
+    except ValueError:
+        raise ValueError("Nieprawidłowy format daty. Użyj formatu ISO (YYYY-MM-DDTHH:MM:SS)")
+
+    try:
+        latitude = float(data['latitude'])
+        longitude = float(data['longitude'])
+    except (TypeError, ValueError):
+        raise ValueError("Nieprawidłowe współrzędne geograficzne")
+
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError(f"Współrzędne poza zakresem: {latitude}, {longitude}")
+
+    return birth_date, latitude, longitude
+
+
+def compute_vargas(calculator, birth, varga_types, fields=None):
+    """
+    Oblicza wybrane vargi kosmogramu (z użyciem pamięci podręcznej kalkulatora).
+
+    Args:
+        calculator (VedicAstroCalculator): Kalkulator
+        birth (tuple): (birth_date, latitude, longitude)
+        varga_types (iterable): Typy varg (np. ['D1', 'D9'])
+        fields (iterable, optional): Pola kosmogramów; domyślnie wszystkie
+
+    Returns:
+        dict: Słownik varg w kolejności żądania
+    """
+    main_chart = calculator.calculate_chart(*birth)
+    return VargaSet(main_chart, calculator).select(varga_types, fields)
+
+
+def iter_compute_ndjson(births, calculator, varga_types, fields=None, workers=None,
+                        chunk_size=COMPUTE_CHUNK_SIZE, max_pending=None, precision=None):
+    """
+    Generuje wiersze NDJSON z wynikami obliczeń wielu kosmogramów.
+
+    Args:
+        births (iterable): Dane urodzeniowe (słowniki jak w parse_birth)
+        calculator (VedicAstroCalculator): Kalkulator
+        varga_types (iterable): Typy varg w wyniku
+        fields (iterable, optional): Pola kosmogramów; domyślnie wszystkie
+        workers (int, optional): Liczba procesów współdzielonej puli; 1 - bieżący proces
+        chunk_size (int, optional): Liczba rekordów w paczce wysyłanej do procesu
+        max_pending (int, optional): Limit paczek w toku; domyślnie 2 na proces
+        precision (int, optional): Liczba miejsc po przecinku liczb w wyniku; None - pełna precyzja
+
+    Yields:
+        str: Wiersz {"index": ..., "vargas": {...}} lub {"index": ..., "error": "..."}
+            zakończony znakiem nowej linii
+    """
+    def result_line(index, main_chart):
+        vargas = VargaSet(main_chart, calculator).select(varga_types, fields)
+        return dumps({'index': index, 'vargas': vargas}, precision=precision) + '\n'
+
+    def error_line(index, message):
+        return dumps({'index': index, 'error': message}) + '\n'
+
+    in_process = workers == 1
+    max_pending = max_pending or 2 * (workers or os.cpu_count() or 1)
+
+    # Paczki w toku: future -> lista (index, birth)
+    pending = {}
+    chunk = []
+
+    def submit():
+        future = calculator.submit_charts([birth for _, birth in chunk], workers=workers)
+        pending[future] = list(chunk)
+        chunk.clear()
+
+    def collect(timeout=None):
+        done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+        for future in done:
+            items = pending.pop(future)
+            results, _ = future.result()
+            for (index, birth), result in zip(items, results):
+                if isinstance(result, BatchError):
+                    yield error_line(index, f"Błąd obliczeń: {result.message}")
+                    continue
+                calculator.cache_chart(result, *birth)
+                yield result_line(index, result)
+
+    try:
+        for index, raw in enumerate(births):
+            try:
+                birth = parse_birth(raw)
+            except ValueError as e:
+                yield error_line(index, str(e))
+                continue
+
+            main_chart = calculator.get_cached_chart(*birth)
+            if main_chart is not None:
+                yield result_line(index, main_chart)
+                continue
+
+            if in_process:
+                try:
+                    main_chart = calculator.calculate_chart(*birth)
+                except Exception as e:
+                    yield error_line(index, f"Błąd obliczeń: {str(e)}")
+                    continue
+                yield result_line(index, main_chart)
+                continue
+
+            chunk.append((index, birth))
+            if len(chunk) >= chunk_size:
+                submit()
+                # Wysyłaj wyniki już ukończonych paczek; czekaj, gdy w puli jest dość pracy
+                yield from collect(None if len(pending) >= max_pending else 0)
+
+        if chunk:
+            submit()
+
+        while pending:
+            yield from collect()
+    finally:
+        # Klient przerwał odbiór - nie obliczaj paczek, które jeszcze nie wystartowały
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,98 @@
+"""
+Warunkowe żądania GET (ETag / If-None-Match) i nagłówki Cache-Control.
+
+Kosmogramy i analizy nie zmieniają się po utworzeniu, więc ich ETag jest
+wyliczany z identyfikatora, daty utworzenia i wersji silnika obliczeń -
+bez odczytu varg. Obszary życia mogą być edytowane, więc ich ETag jest
+skrótem zwracanych danych (łącznie z szablonem promptu).
+"""
+
+import hashlib
+
+from flask import current_app, request
+
+from ..astro.calculator import ENGINE_VERSION
+
+# Domyślny czas (w sekundach), przez który klient może używać zapisanej odpowiedzi
+DEFAULT_CACHE_MAX_AGE = 3600
+
+
+def make_etag(*parts):
+    """
+    Tworzy silny ETag ze składowych zasobu.
+
+    Args:
+        *parts: Wartości identyfikujące wersję zasobu
+
+    Returns:
+        str: ETag (bez cudzysłowów)
+    """
+    normalized = "|".join(str(part) for part in parts)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:32]
+
+
+def immutable_etag(kind, record_id, created_at, *variant):
+    """
+    Tworzy ETag zasobu niezmiennego po utworzeniu (kosmogram, analiza).
+
+    Args:
+        kind (str): Rodzaj zasobu (np. 'chart')
+        record_id (int): ID rekordu
+        created_at (datetime): Data utworzenia rekordu
+        *variant: Wartości wyróżniające reprezentację zasobu (np. wybrane pola)
+
+    Returns:
+        str: ETag zależny od rekordu, reprezentacji i wersji silnika obliczeń
+    """
+    return make_etag(kind, record_id, created_at.isoformat() if created_at else '', ENGINE_VERSION, *variant)
+
+
+def is_not_modified(etag):
+    """
+    Sprawdza, czy klient ma aktualną wersję zasobu (If-None-Match).
+
+    Uwzględnia ETagi skompresowanych reprezentacji (z przyrostkiem kodowania).
+    """
+    if_none_match = request.if_none_match
+    return any(if_none_match.contains(variant) for variant in (etag, f'{etag}-gzip', f'{etag}-br'))
+
+
+def cache_response(response, etag, max_age=None):
+    """
+    Ustawia nagłówki ETag i Cache-Control odpowiedzi.
+
+    Args:
+        response (Response): Odpowiedź
+        etag (str): ETag zasobu
+        max_age (int, optional): Czas ważności w sekundach; None - CACHE_MAX_AGE
+            z konfiguracji, 0 - klient musi sprawdzać aktualność przy każdym użyciu
+
+    Returns:
+        Response: Ta sama odpowiedź
+    """
+    if max_age is None:
+        max_age = current_app.config.get('CACHE_MAX_AGE', DEFAULT_CACHE_MAX_AGE)
+
+    response.set_etag(etag)
+    # Kosmogramy są danymi osobowymi - tylko pamięć podręczna przeglądarki
+    response.cache_control.private = True
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def not_modified(etag, max_age=None):
+    """
+    Tworzy odpowiedź 304 Not Modified.
+
+    Args:
+        etag (str): ETag zasobu
+        max_age (int, optional): Jak w cache_response
+
+    Returns:
+        Response: Odpowiedź bez treści
+    """
+    response = current_app.response_class(status=304)
+    return cache_response(response, etag, max_age)
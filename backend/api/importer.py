@@ -0,0 +1,298 @@
+"""
+Import danych urodzeniowych z plików CSV i NDJSON.
+
+Plik jest czytany strumieniowo wiersz po wierszu, poprawne rekordy trafiają
+do puli procesów obliczających kosmogramy (VedicAstroCalculator.iter_charts_batch),
+a wyniki są zapisywane w bazie paczkami - jedna transakcja na paczkę
+(save_charts_bulk). Błędy pojedynczych wierszy (parsowania, obliczeń, zapisu)
+są zbierane w raporcie i nie przerywają importu.
+
+Kolumny / klucze rekordu: name, birth_date (ISO), latitude, longitude, opcjonalnie user_id.
+"""
+
+import csv
+import json
+import logging
+import tempfile
+import time
+from collections import deque
+from datetime import datetime
+
+from ..astro.calculator import BatchError, BATCH_CHUNK_SIZE
+from ..database.utils import save_charts_bulk, BULK_BATCH_SIZE
+
+logger = logging.getLogger(__name__)
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+
+REQUIRED_FIELDS = ('name', 'birth_date', 'latitude', 'longitude')
+
+# Maksymalna liczba błędów zapisywanych w raporcie (zliczane są wszystkie)
+MAX_REPORTED_ERRORS = 1000
+
+# Maksymalna liczba wierszy pliku importowanego przez API (większe pliki - python -m backend.import)
+DEFAULT_MAX_UPLOAD_ROWS = 5000
+
+# Rozmiar przesłanego pliku przechowywanego w pamięci (większy trafia do pliku tymczasowego)
+UPLOAD_SPOOL_SIZE = 1024 * 1024
+
+
+class ImportTooLargeError(ValueError):
+    """Plik przesłany do importu przez API ma zbyt wiele wierszy."""
+
+
+def spool_upload(stream, max_rows=DEFAULT_MAX_UPLOAD_ROWS):
+    """
+    Zapisuje przesłany plik w buforze, sprawdzając liczbę wierszy przed importem.
+
+    Dzięki temu zbyt duży plik jest odrzucany, zanim cokolwiek zostanie zapisane w bazie.
+
+    Args:
+        stream (file): Strumień binarny przesłanego pliku
+        max_rows (int, optional): Maksymalna liczba wierszy (z nagłówkiem CSV)
+
+    Returns:
+        SpooledTemporaryFile: Bufor z treścią pliku, ustawiony na początek
+
+    Raises:
+        ImportTooLargeError: Jeśli plik ma więcej niż max_rows wierszy
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
+    rows = 0
+    for line in stream:
+        if line.strip():
+            rows += 1
+            if rows > max_rows:
+                spooled.close()
+                raise ImportTooLargeError(
+                    f"Plik ma więcej niż {max_rows} wierszy - większe pliki importuj poleceniem "
+                    "python -m backend.import lub flask import-charts"
+                )
+        spooled.write(line)
+
+    spooled.seek(0)
+    return spooled
+
+
+def detect_format(filename=None, content_type=None):
+    """
+    Rozpoznaje format pliku na podstawie nazwy lub typu zawartości.
+
+    Args:
+        filename (str, optional): Nazwa pliku
+        content_type (str, optional): Typ MIME
+
+    Returns:
+        str: 'csv', 'ndjson' lub None, jeśli nie można rozpoznać
+    """
+    if filename:
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if extension == 'csv':
+            return 'csv'
+        if extension in ('ndjson', 'jsonl'):
+            return 'ndjson'
+
+    if content_type:
+        content_type = content_type.split(';')[0].strip().lower()
+        if content_type == 'text/csv':
+            return 'csv'
+        if content_type in ('application/x-ndjson', 'application/jsonl'):
+            return 'ndjson'
+
+    return None
+
+
+def iter_raw_records(lines, file_format):
+    """
+    Generuje surowe rekordy z wierszy pliku.
+
+    Args:
+        lines (iterable): Wiersze tekstu (np. otwarty plik)
+        file_format (str): 'csv' lub 'ndjson'
+
+    Yields:
+        tuple: (numer wiersza, słownik pól lub wyjątek ValueError)
+    """
+    if file_format == 'csv':
+        reader = csv.DictReader(lines)
+        for row in reader:
+            yield reader.line_num, row
+    elif file_format == 'ndjson':
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_number, ValueError(f"Nieprawidłowy JSON: {str(e)}")
+                continue
+            if not isinstance(record, dict):
+                yield line_number, ValueError("Wiersz nie jest obiektem JSON")
+                continue
+            yield line_number, record
+    else:
+        raise ValueError(f"Nieobsługiwany format importu: {file_format}. Dopuszczalne: {', '.join(IMPORT_FORMATS)}.")
+
+
+def parse_birth_record(raw):
+    """
+    Waliduje i konwertuje surowy rekord urodzeniowy.
+
+    Args:
+        raw (dict): Pola rekordu (wartości tekstowe z CSV lub typy JSON)
+
+    Returns:
+        dict: Rekord z kluczami name, birth_date, latitude, longitude, user_id
+
+    Raises:
+        ValueError: Jeśli rekord jest niepoprawny
+    """
+    missing = [field for field in REQUIRED_FIELDS if raw.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"Brakujące wymagane pola: {', '.join(missing)}")
+
+    name = str(raw['name']).strip()
+    if not name or len(name) > 100:
+        raise ValueError("Nazwa musi mieć od 1 do 100 znaków")
+
+    try:
+        birth_date = datetime.fromisoformat(str(raw['birth_date']).strip())
+    except ValueError:
+        raise ValueError(f"Nieprawidłowy format daty: {raw['birth_date']}")
+
+    try:
+        latitude = float(raw['latitude'])
+        longitude = float(raw['longitude'])
+    except (TypeError, ValueError):
+        raise ValueError("Nieprawidłowe współrzędne geograficzne")
+
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise ValueError(f"Współrzędne poza zakresem: {latitude}, {longitude}")
+
+    user_id = raw.get('user_id')
+    if user_id in (None, ''):
+        user_id = None
+    else:
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"Nieprawidłowe user_id: {user_id}")
+
+    return {
+        'name': name,
+        'birth_date': birth_date,
+        'latitude': latitude,
+        'longitude': longitude,
+        'user_id': user_id
+    }
+
+
+class ImportReport:
+    """Postęp i wynik importu z listą błędów wierszy."""
+
+    def __init__(self):
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    def add_error(self, line_number, message):
+        """Rejestruje błąd wiersza."""
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': line_number, 'error': message})
+
+    def to_dict(self):
+        """Konwertuje raport na słownik."""
+        elapsed = time.perf_counter() - self.started
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'failed': self.failed,
+            'seconds': elapsed,
+            'rows_per_second': self.rows / elapsed if elapsed > 0 else None,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors)
+        }
+
+
+def import_births(lines, file_format, calculator, workers=None, chunk_size=BATCH_CHUNK_SIZE,
+                  batch_size=BULK_BATCH_SIZE, on_progress=None):
+    """
+    Importuje dane urodzeniowe: parsowanie, obliczenia w puli procesów i zapis paczkami.
+
+    Args:
+        lines (iterable): Wiersze pliku (np. otwarty plik tekstowy)
+        file_format (str): 'csv' lub 'ndjson'
+        calculator (VedicAstroCalculator): Kalkulator
+        workers (int, optional): Liczba procesów obliczeniowych; 1 - bieżący proces
+        chunk_size (int, optional): Liczba rekordów w paczce wysyłanej do procesu
+        batch_size (int, optional): Liczba kosmogramów zapisywanych w jednej transakcji
+        on_progress (callable, optional): Funkcja wywoływana ze słownikiem raportu po każdym zapisie
+
+    Returns:
+        ImportReport: Raport importu
+    """
+    if file_format not in IMPORT_FORMATS:
+        raise ValueError(f"Nieobsługiwany format importu: {file_format}. Dopuszczalne: {', '.join(IMPORT_FORMATS)}.")
+
+    report = ImportReport()
+
+    # Rekordy przekazane do obliczeń, w kolejności - wyniki paczek wracają w tej samej kolejności
+    in_flight = deque()
+
+    def valid_births():
+        for line_number, raw in iter_raw_records(lines, file_format):
+            report.rows += 1
+            try:
+                if isinstance(raw, Exception):
+                    raise raw
+                record = parse_birth_record(raw)
+            except ValueError as e:
+                report.add_error(line_number, str(e))
+                continue
+
+            in_flight.append((line_number, record))
+            yield record['birth_date'], record['latitude'], record['longitude']
+
+    pending_writes = []
+
+    def write_batch():
+        chart_ids = save_charts_bulk([record for _, record in pending_writes], batch_size=len(pending_writes))
+        report.imported += len(chart_ids)
+
+        # Paczka wycofana w całości - oznacz jej wiersze jako błędne
+        for line_number, _ in pending_writes[len(chart_ids):]:
+            report.add_error(line_number, "Nie udało się zapisać kosmogramu w bazie danych")
+
+        pending_writes.clear()
+
+        if on_progress:
+            on_progress(report.to_dict())
+
+    for chunk, results, elapsed in calculator.iter_charts_batch(
+            valid_births(), workers=workers, chunk_size=chunk_size,
+            all_vargas=False, capture_errors=True):
+        for result in results:
+            line_number, record = in_flight.popleft()
+
+            if isinstance(result, BatchError):
+                report.add_error(line_number, f"Błąd obliczeń: {result.message}")
+                continue
+
+            # Zapisywany jest tylko D1 - pozostałe vargi są wyliczane przy odczycie
+            record['vargas'] = {'D1': result}
+            pending_writes.append((line_number, record))
+
+            if len(pending_writes) >= batch_size:
+                write_batch()
+
+    if pending_writes:
+        write_batch()
+
+    logger.info(
+        f"Import zakończony: {report.imported} zapisanych, {report.failed} błędnych "
+        f"z {report.rows} wierszy"
+    )
+    return report
@@ -0,0 +1,363 @@
+"""
+Kolejka zadań analiz przechowywana w bazie danych.
+
+POST /api/analyze zapisuje zadanie (AnalysisJob) i od razu zwraca jego ID,
+a analizę wykonuje pula wątków roboczych (AnalysisWorkerPool) - w procesie
+aplikacji lub w osobnym procesie (flask analysis-worker). Nie jest potrzebny
+zewnętrzny broker: wątek przejmuje zadanie warunkowym UPDATE (status
+'queued' -> 'running'), więc kilka procesów może obsługiwać tę samą kolejkę.
+
+Stan zadań jest zapisany w bazie, więc przetrwa restart. Zadania, które
+pozostały w stanie 'running' dłużej niż limit czasu (np. po awarii procesu),
+są przywracane do kolejki, a po wyczerpaniu prób oznaczane jako nieudane.
+Wynik zapisuje warunkowy UPDATE (status 'running' i ten sam worker_id) -
+wątek, któremu zadanie odebrano, nie nadpisuje wyniku nowego wykonania.
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, update
+
+from ..database.models import db, AnalysisJob, BirthChart
+from .analysis import run_analysis, AnalysisError
+from .admission import AdmissionRejected, DEFAULT_RETRY_AFTER
+
+logger = logging.getLogger(__name__)
+
+# Domyślne ustawienia kolejki
+DEFAULT_POLL_INTERVAL = 1.0
+# Czas, po którym wykonywane zadanie uznaje się za przerwane - z zapasem powyżej najdłuższego
+# zapytania do API z ponowieniami (4 próby po OPENAI_READ_TIMEOUT=60 s i oczekiwanie do 3 x 20 s)
+DEFAULT_JOB_TIMEOUT = 900
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_MAX_PENDING = 1000
+DEFAULT_MAX_PENDING_PER_USER = 20
+
+# Jak często (w sekundach) pula sprawdza zadania przerwane przez awarię procesu
+STALE_CHECK_INTERVAL = 30
+
+# Budzi wątki robocze bieżącego procesu po dodaniu zadania (bez czekania na kolejne odpytanie)
+_job_added = threading.Event()
+
+
+def enqueue_analysis(chart_id, life_area_id, fresh=False):
+    """
+    Dodaje zadanie analizy do kolejki.
+
+    Args:
+        chart_id (int): ID kosmogramu
+        life_area_id (int): ID obszaru życia
+        fresh (bool, optional): Czy wygenerować nową analizę (bez pamięci podręcznej odpowiedzi)
+
+    Returns:
+        AnalysisJob: Zapisane zadanie
+    """
+    job = AnalysisJob(birth_chart_id=chart_id, life_area_id=life_area_id, fresh=fresh, status=AnalysisJob.QUEUED)
+    db.session.add(job)
+    db.session.commit()
+
+    _job_added.set()
+    return job
+
+
+def count_pending_jobs(user_id=None):
+    """
+    Liczy zadania oczekujące i wykonywane.
+
+    Args:
+        user_id (int, optional): Tylko zadania dla kosmogramów danego użytkownika
+
+    Returns:
+        int: Liczba zadań
+    """
+    query = db.session.query(func.count(AnalysisJob.id)).filter(
+        AnalysisJob.status.in_((AnalysisJob.QUEUED, AnalysisJob.RUNNING))
+    )
+    if user_id is not None:
+        query = query.join(BirthChart, BirthChart.id == AnalysisJob.birth_chart_id).filter(
+            BirthChart.user_id == user_id
+        )
+    return query.scalar()
+
+
+def check_queue_capacity(user_id=None, max_pending=DEFAULT_MAX_PENDING,
+                         max_pending_per_user=DEFAULT_MAX_PENDING_PER_USER):
+    """
+    Sprawdza, czy do kolejki można dodać kolejne zadanie.
+
+    Args:
+        user_id (int, optional): ID właściciela kosmogramu; None - tylko limit łączny
+        max_pending (int, optional): Maksymalna liczba niezakończonych zadań
+        max_pending_per_user (int, optional): Maksymalna liczba niezakończonych zadań użytkownika
+
+    Raises:
+        AdmissionRejected: Jeśli kolejka lub limit użytkownika jest pełny
+    """
+    if count_pending_jobs() >= max_pending:
+        raise AdmissionRejected("Kolejka analiz jest pełna - spróbuj ponownie później", DEFAULT_RETRY_AFTER)
+    if user_id is not None and count_pending_jobs(user_id) >= max_pending_per_user:
+        raise AdmissionRejected("Zbyt wiele zleconych analiz - poczekaj na ich zakończenie", DEFAULT_RETRY_AFTER)
+
+
+def get_job(job_id):
+    """
+    Pobiera zadanie analizy.
+
+    Args:
+        job_id (int): ID zadania
+
+    Returns:
+        AnalysisJob: Zadanie lub None, jeśli nie znaleziono
+    """
+    return db.session.get(AnalysisJob, job_id)
+
+
+def claim_next_job(worker_id):
+    """
+    Przejmuje najstarsze oczekujące zadanie.
+
+    Args:
+        worker_id (str): Identyfikator wątku roboczego
+
+    Returns:
+        AnalysisJob: Przejęte zadanie lub None, jeśli kolejka jest pusta
+    """
+    while True:
+        job_id = db.session.query(AnalysisJob.id).filter_by(
+            status=AnalysisJob.QUEUED
+        ).order_by(AnalysisJob.id).limit(1).scalar()
+
+        if job_id is None:
+            db.session.rollback()  # Zakończ transakcję odczytu
+            return None
+
+        # Warunkowy UPDATE - zadanie przejmuje tylko jeden wątek, nawet w różnych procesach
+        claimed = db.session.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id, AnalysisJob.status == AnalysisJob.QUEUED)
+            .values(status=AnalysisJob.RUNNING, worker_id=worker_id,
+                    started_at=datetime.utcnow(), attempts=AnalysisJob.attempts + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.session.commit()
+
+        if claimed:
+            job = db.session.get(AnalysisJob, job_id)
+            db.session.refresh(job)
+            return job
+
+
+def requeue_stale_jobs(timeout=DEFAULT_JOB_TIMEOUT, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    """
+    Przywraca do kolejki zadania przerwane przez awarię lub restart procesu.
+
+    Args:
+        timeout (int, optional): Czas w sekundach, po którym wykonywane zadanie uznaje się za przerwane
+        max_attempts (int, optional): Maksymalna liczba prób wykonania zadania
+
+    Returns:
+        tuple: (liczba zadań przywróconych do kolejki, liczba zadań oznaczonych jako nieudane)
+    """
+    stale = (AnalysisJob.status == AnalysisJob.RUNNING,
+             AnalysisJob.started_at < datetime.utcnow() - timedelta(seconds=timeout))
+
+    requeued = db.session.execute(
+        update(AnalysisJob)
+        .where(*stale, AnalysisJob.attempts < max_attempts)
+        .values(status=AnalysisJob.QUEUED, worker_id=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    failed = db.session.execute(
+        update(AnalysisJob)
+        .where(*stale, AnalysisJob.attempts >= max_attempts)
+        .values(status=AnalysisJob.FAILED, finished_at=datetime.utcnow(),
+                error="Przekroczono limit czasu i liczbę prób wykonania zadania")
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    if requeued or failed:
+        logger.warning(f"Przerwane zadania analiz: {requeued} przywrócone do kolejki, {failed} nieudane")
+    return requeued, failed
+
+
+def execute_job(job, calculator, client):
+    """
+    Wykonuje przejęte zadanie i zapisuje jego wynik.
+
+    Wynik jest zapisywany tylko wtedy, gdy zadanie nadal należy do tego wątku
+    (nie zostało w międzyczasie przywrócone do kolejki przez requeue_stale_jobs).
+
+    Args:
+        job (AnalysisJob): Zadanie w stanie 'running'
+        calculator (VedicAstroCalculator): Kalkulator
+        client (OpenAIClient): Klient OpenAI
+
+    Returns:
+        AnalysisJob: Zadanie w stanie 'succeeded' lub 'failed' (albo w stanie zapisanym
+            przez wątek, który przejął zadanie)
+    """
+    # Zapamiętane przed analizą - commit w run_analysis wygasza atrybuty obiektu
+    job_id, worker_id = job.id, job.worker_id
+
+    try:
+        analysis = run_analysis(job.birth_chart_id, job.life_area_id, calculator, client,
+                                use_cache=not job.fresh)
+        result = dict(status=AnalysisJob.SUCCEEDED, analysis_id=analysis.id, error=None)
+    except AnalysisError as e:
+        db.session.rollback()
+        result = dict(status=AnalysisJob.FAILED, error=e.message)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception(f"Błąd podczas wykonywania zadania analizy #{job_id}")
+        result = dict(status=AnalysisJob.FAILED, error=str(e))
+
+    # Warunkowy UPDATE - wynik zapisuje tylko wątek, który nadal wykonuje zadanie
+    finished = db.session.execute(
+        update(AnalysisJob)
+        .where(AnalysisJob.id == job_id, AnalysisJob.worker_id == worker_id,
+               AnalysisJob.status == AnalysisJob.RUNNING)
+        .values(finished_at=datetime.utcnow(), **result)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+
+    if not finished:
+        logger.warning(f"Zadanie analizy #{job_id} nie należy już do {worker_id} - wynik pominięto")
+
+    db.session.refresh(job)
+    return job
+
+
+def process_next_job(worker_id, calculator, client):
+    """
+    Przejmuje i wykonuje najstarsze oczekujące zadanie.
+
+    Args:
+        worker_id (str): Identyfikator wątku roboczego
+        calculator (VedicAstroCalculator): Kalkulator
+        client (OpenAIClient): Klient OpenAI
+
+    Returns:
+        AnalysisJob: Wykonane zadanie lub None, jeśli kolejka była pusta
+    """
+    job = claim_next_job(worker_id)
+    if job is None:
+        return None
+
+    logger.info(f"Zadanie analizy #{job.id} przejęte przez {worker_id}")
+    return execute_job(job, calculator, client)
+
+
+def job_to_dict(job):
+    """Konwertuje zadanie na słownik odpowiedzi API (z wynikiem analizy, jeśli jest gotowy)."""
+    data = {
+        "id": job.id,
+        "status": job.status,
+        "chart_id": job.birth_chart_id,
+        "life_area_id": job.life_area_id,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "analysis_id": job.analysis_id,
+        "error": job.error
+    }
+
+    if job.status == AnalysisJob.SUCCEEDED and job.analysis is not None:
+        data["analysis_result"] = job.analysis.analysis_result
+
+    return data
+
+
+class AnalysisWorkerPool:
+    """Pula wątków wykonujących zadania analiz z kolejki w bazie danych."""
+
+    def __init__(self, app, calculator, client, workers=2, poll_interval=DEFAULT_POLL_INTERVAL,
+                 job_timeout=DEFAULT_JOB_TIMEOUT, max_attempts=DEFAULT_MAX_ATTEMPTS):
+        """
+        Args:
+            app (Flask): Aplikacja (kontekst dla połączeń z bazą danych)
+            calculator (VedicAstroCalculator): Kalkulator
+            client (OpenAIClient): Klient OpenAI
+            workers (int, optional): Liczba wątków - analizy czekają głównie na odpowiedź API
+            poll_interval (float, optional): Odstęp (w sekundach) sprawdzania pustej kolejki
+            job_timeout (int, optional): Czas, po którym wykonywane zadanie uznaje się za przerwane
+            max_attempts (int, optional): Maksymalna liczba prób wykonania zadania
+        """
+        self.app = app
+        self.calculator = calculator
+        self.client = client
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.max_attempts = max_attempts
+        self._stopping = threading.Event()
+        self._threads = []
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        """Uruchamia wątki robocze."""
+        self._stopping.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._run, args=(index,),
+                                      name=f'analysis-worker-{index}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        logger.info(f"Uruchomiono {self.workers} wątków roboczych analiz")
+
+    def ensure_started(self):
+        """Uruchamia wątki robocze, jeśli jeszcze nie działają (np. funkcja before_request)."""
+        if self._threads:
+            return
+        with self._start_lock:
+            if not self._threads:
+                self.start()
+
+    def stop(self, wait=True):
+        """
+        Zatrzymuje wątki po zakończeniu bieżących zadań.
+
+        Args:
+            wait (bool, optional): Czy czekać na zakończenie wątków
+        """
+        self._stopping.set()
+        _job_added.set()
+        if wait:
+            self.join()
+
+    def join(self):
+        """Czeka na zakończenie wątków (przerywalne przez KeyboardInterrupt)."""
+        for thread in self._threads:
+            while thread.is_alive():
+                thread.join(0.5)
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+
+    def _run(self, index):
+        """Pętla wątku roboczego."""
+        worker_id = f'{socket.gethostname()}:{os.getpid()}:{index}'
+        last_stale_check = 0
+
+        while not self._stopping.is_set():
+            job = None
+            try:
+                with self.app.app_context():
+                    # Zadania przerwane przez awarię procesu sprawdza tylko pierwszy wątek
+                    if index == 0 and time.monotonic() - last_stale_check >= STALE_CHECK_INTERVAL:
+                        requeue_stale_jobs(self.job_timeout, self.max_attempts)
+                        last_stale_check = time.monotonic()
+
+                    job = process_next_job(worker_id, self.calculator, self.client)
+            except Exception:
+                logger.exception("Błąd wątku roboczego analiz")
+
+            if job is None:
+                _job_added.wait(self.poll_interval)
+                _job_added.clear()
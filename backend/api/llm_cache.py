@@ -0,0 +1,97 @@
+"""
+Pamięć podręczna odpowiedzi modelu językowego.
+
+Kluczem jest skrót wszystkiego, co wpływa na odpowiedź: modelu, promptu
+systemowego, promptu z danymi kosmogramu, temperatury i limitu tokenów.
+Ponowna analiza tego samego kosmogramu (lub kosmogramu o tych samych danych
+urodzeniowych) nie wymaga więc kolejnego zapytania do API. Wpisy są
+przechowywane w ChartCache (astro/cache.py), także w magazynie SQLite.
+
+SingleFlight łączy jednoczesne identyczne zapytania: pierwsze wywołanie
+wykonuje zapytanie do API, a pozostałe czekają na jego wynik.
+"""
+
+import hashlib
+import json
+import threading
+
+# Domyślne ustawienia pamięci podręcznej odpowiedzi
+DEFAULT_LLM_CACHE_SIZE = 10000
+DEFAULT_LLM_CACHE_TTL = 30 * 24 * 3600
+
+
+def make_prompt_key(model, system_prompt, prompt, temperature, max_tokens):
+    """
+    Tworzy klucz pamięci podręcznej dla zapytania do modelu.
+
+    Args:
+        model (str): Nazwa modelu
+        system_prompt (str): Prompt systemowy
+        prompt (str): Prompt użytkownika (z danymi kosmogramu)
+        temperature (float): Temperatura
+        max_tokens (int): Maksymalna liczba tokenów w odpowiedzi
+
+    Returns:
+        str: Skrót SHA-256 parametrów zapytania
+    """
+    normalized = json.dumps(
+        [model, system_prompt, prompt, temperature, max_tokens], ensure_ascii=False
+    )
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class _Call:
+    """Zapytanie w toku i jego wynik."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Łączy jednoczesne wywołania o tym samym kluczu w jedno wywołanie."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, func):
+        """
+        Wykonuje func lub czeka na wynik wywołania o tym samym kluczu, które już trwa.
+
+        Args:
+            key (str): Klucz wywołania
+            func (callable): Funkcja bez argumentów
+
+        Returns:
+            Wynik func (wspólny dla wszystkich oczekujących)
+
+        Raises:
+            Exception: Wyjątek zgłoszony przez func (także oczekującym)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
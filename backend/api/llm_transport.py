@@ -0,0 +1,277 @@
+"""
+Warstwa transportowa zapytań do API OpenAI.
+
+LLMTransport opakowuje klienta openai:
+- współdzielona pula połączeń HTTP (keep-alive) z limitem połączeń,
+- limity czasu połączenia, odczytu i oczekiwania na wolne połączenie,
+  więc wolne API nie blokuje wątków bez końca,
+- ponawianie zapytań po błędach 429/5xx i błędach połączenia z wykładniczym
+  czasem oczekiwania z losowym rozrzutem (z uwzględnieniem nagłówka Retry-After),
+- wyłącznik (circuit breaker): po serii błędów zapytania są przez pewien czas
+  odrzucane od razu (CircuitOpenError), a potem jedno zapytanie próbne
+  sprawdza, czy API znów działa.
+
+Wbudowane ponawianie biblioteki openai jest wyłączone (max_retries=0).
+"""
+
+import email.utils
+import logging
+import random
+import threading
+import time
+
+import httpx
+import openai
+
+logger = logging.getLogger(__name__)
+
+# Domyślne ustawienia transportu
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_POOL_TIMEOUT = 10.0
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 20.0
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_RESET = 30.0
+
+# Błędy świadczące o przeciążeniu lub awarii API - ponawiane i liczone przez wyłącznik
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APIConnectionError,  # Także APITimeoutError
+)
+
+
+class CircuitOpenError(Exception):
+    """Zapytanie odrzucone bez wysyłania - API uznano za niedostępne."""
+
+
+class CircuitBreaker:
+    """
+    Wyłącznik zapytań do API.
+
+    Stany: 'closed' (zapytania wysyłane), 'open' (odrzucane przez reset_timeout
+    sekund po failure_threshold kolejnych błędach), 'half_open' (jedno
+    zapytanie próbne; sukces zamyka wyłącznik, błąd otwiera go ponownie).
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=DEFAULT_BREAKER_THRESHOLD, reset_timeout=DEFAULT_BREAKER_RESET):
+        """
+        Args:
+            failure_threshold (int, optional): Liczba kolejnych błędów otwierająca wyłącznik
+            reset_timeout (float, optional): Czas (w sekundach) odrzucania zapytań
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        Sprawdza, czy zapytanie może zostać wysłane.
+
+        Raises:
+            CircuitOpenError: Jeśli wyłącznik jest otwarty lub trwa zapytanie próbne
+        """
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return
+
+            self.rejected += 1
+            raise CircuitOpenError("API OpenAI jest chwilowo niedostępne - spróbuj ponownie później")
+
+    def record_success(self):
+        """Rejestruje udane zapytanie (zamyka wyłącznik)."""
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Rejestruje błąd API (po serii błędów otwiera wyłącznik)."""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"Wyłącznik API OpenAI otwarty po {self.failures} błędach")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+def retry_after_seconds(error):
+    """
+    Odczytuje czas oczekiwania z nagłówków odpowiedzi (retry-after-ms, Retry-After).
+
+    Args:
+        error (Exception): Błąd API
+
+    Returns:
+        float: Czas w sekundach lub None, jeśli API go nie podało
+    """
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+
+    value = response.headers.get('retry-after-ms')
+    if value:
+        try:
+            return max(float(value) / 1000, 0.0)
+        except ValueError:
+            pass
+
+    value = response.headers.get('retry-after')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    # Retry-After w postaci daty HTTP
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at.timestamp() - time.time(), 0.0)
+
+
+class LLMTransport:
+    """Klient API OpenAI z pulą połączeń, limitami czasu, ponawianiem i wyłącznikiem."""
+
+    def __init__(self, api_key, base_url=None, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, pool_timeout=DEFAULT_POOL_TIMEOUT,
+                 max_connections=DEFAULT_MAX_CONNECTIONS, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX,
+                 breaker_threshold=DEFAULT_BREAKER_THRESHOLD, breaker_reset=DEFAULT_BREAKER_RESET):
+        """
+        Args:
+            api_key (str): Klucz API OpenAI
+            base_url (str, optional): Adres API (np. lokalny serwer testowy)
+            connect_timeout (float, optional): Limit czasu nawiązania połączenia
+            read_timeout (float, optional): Limit czasu oczekiwania na (kolejny fragment) odpowiedzi
+            pool_timeout (float, optional): Limit czasu oczekiwania na wolne połączenie z puli
+            max_connections (int, optional): Maksymalna liczba połączeń z API
+            max_retries (int, optional): Maksymalna liczba ponowień zapytania
+            backoff_base (float, optional): Początkowy czas oczekiwania przed ponowieniem
+            backoff_max (float, optional): Maksymalny czas oczekiwania przed ponowieniem
+            breaker_threshold (int, optional): Liczba kolejnych błędów otwierająca wyłącznik
+            breaker_reset (float, optional): Czas odrzucania zapytań przez otwarty wyłącznik
+        """
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.retries = 0
+        self._lock = threading.Lock()
+
+        timeout = httpx.Timeout(read_timeout, connect=connect_timeout, pool=pool_timeout)
+        self._http = httpx.Client(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+        self._client = openai.OpenAI(
+            api_key=api_key, base_url=base_url, timeout=timeout, max_retries=0, http_client=self._http
+        )
+
+    def backoff_delay(self, attempt, retry_after=None):
+        """
+        Oblicza czas oczekiwania przed ponowieniem (wykładniczy z pełnym rozrzutem).
+
+        Args:
+            attempt (int): Numer ponowienia (od 0)
+            retry_after (float, optional): Czas wskazany przez API (Retry-After)
+
+        Returns:
+            float: Czas oczekiwania w sekundach lub None, jeśli API wskazało
+                czas dłuższy niż backoff_max (zapytanie nie jest ponawiane)
+        """
+        if retry_after is not None and retry_after > self.backoff_max:
+            return None
+
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def chat_completion(self, **params):
+        """
+        Wysyła zapytanie chat completions.
+
+        Przy stream=True ponawiane jest tylko nawiązanie strumienia;
+        błąd w trakcie odbioru fragmentów jest zgłaszany wywołującemu.
+
+        Args:
+            **params: Parametry chat.completions.create (model, messages, stream, ...)
+
+        Returns:
+            ChatCompletion lub Stream: Odpowiedź API
+
+        Raises:
+            CircuitOpenError: Jeśli wyłącznik jest otwarty
+            openai.OpenAIError: Jeśli zapytanie nie powiodło się po ponowieniach
+        """
+        attempt = 0
+        while True:
+            self.breaker.before_call()
+            try:
+                response = self._client.chat.completions.create(**params)
+            except RETRYABLE_ERRORS as e:
+                self.breaker.record_failure()
+                delay = self.backoff_delay(attempt, retry_after_seconds(e))
+                if attempt >= self.max_retries or delay is None:
+                    raise
+
+                logger.warning(f"Błąd API OpenAI ({type(e).__name__}), ponowienie {attempt + 1} za {delay:.2f} s")
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except openai.APIStatusError:
+                # Błąd zapytania (np. 400) - API odpowiada poprawnie
+                self.breaker.record_success()
+                raise
+            except Exception:
+                # Inny błąd (np. niepoprawna odpowiedź) - liczony jako błąd API,
+                # także po to, by nie zablokować wyłącznika w stanie half_open
+                self.breaker.record_failure()
+                raise
+
+            self.breaker.record_success()
+            return response
+
+    def stats(self):
+        """
+        Zwraca statystyki transportu.
+
+        Returns:
+            dict: Stan wyłącznika, liczba kolejnych błędów, ponowień i odrzuconych zapytań
+        """
+        return {
+            'breaker_state': self.breaker.state,
+            'consecutive_failures': self.breaker.failures,
+            'retries': self.retries,
+            'rejected': self.breaker.rejected
+        }
+
+    def close(self):
+        """Zamyka połączenia z puli."""
+        self._http.close()
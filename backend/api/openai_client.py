@@ -1,88 +1,257 @@
-import openai
 import logging
 import json
+import threading
 from flask import current_app
+from .llm_cache import SingleFlight, make_prompt_key
+from .llm_transport import LLMTransport
 
 logger = logging.getLogger(__name__)
 
+# Ustawienia transportu z konfiguracji aplikacji: klucz konfiguracji -> argument LLMTransport
+TRANSPORT_CONFIG = {
+    'OPENAI_CONNECT_TIMEOUT': 'connect_timeout',
+    'OPENAI_READ_TIMEOUT': 'read_timeout',
+    'OPENAI_POOL_TIMEOUT': 'pool_timeout',
+    'OPENAI_MAX_CONNECTIONS': 'max_connections',
+    'OPENAI_MAX_RETRIES': 'max_retries',
+    'OPENAI_BACKOFF_BASE': 'backoff_base',
+    'OPENAI_BACKOFF_MAX': 'backoff_max',
+    'OPENAI_BREAKER_THRESHOLD': 'breaker_threshold',
+    'OPENAI_BREAKER_RESET': 'breaker_reset',
+}
+
+# Temperatura generowania analiz (część klucza pamięci podręcznej odpowiedzi)
+TEMPERATURE = 0.7
+
+SYSTEM_PROMPT = "Jesteś astrologiem wedyjskim z wieloletnim doświadczeniem. Twoja analiza jest dokładna, wnikliwa i oparta na klasycznych zasadach astrologii wedyjskiej."
+
 class OpenAIClient:
     """Klient API OpenAI do analizy kosmogramów wedyjskich."""
     
-    def __init__(self, api_key=None):
+    def __init__(self, api_key=None, base_url=None, transport_options=None):
         """
         Inicjalizuje klienta API OpenAI.
         
         Args:
             api_key (str, optional): Klucz API OpenAI. Jeśli nie podano, zostanie pobrany z konfiguracji.
+            base_url (str, optional): Adres API (np. lokalny serwer testowy); domyślnie API OpenAI
+            transport_options (dict, optional): Argumenty LLMTransport (limity czasu, ponawianie,
+                wyłącznik); przy konfiguracji z aplikacji - z ustawień OPENAI_*
         """
         self.api_key = api_key
+        self.base_url = base_url
         self.model = "gpt-4"  # Domyślny model
+        self.transport_options = dict(transport_options or {})
+        self._transport = None
+        self._transport_lock = threading.Lock()
+        
+        # Pamięć podręczna odpowiedzi (ChartCache; None - wyłączona) i łączenie identycznych zapytań
+        self.cache = None
+        self._single_flight = SingleFlight()
         
-    def configure(self, api_key=None, model=None):
+        # Zwięzły zapis kosmogramu w prompcie i limit jego tokenów (None - bez limitu)
+        self.compact_prompt = True
+        self.token_budget = None
+        
+    def configure(self, api_key=None, model=None, base_url=None):
         """
         Konfiguruje klienta API.
         
         Args:
             api_key (str, optional): Klucz API OpenAI
             model (str, optional): Model do użycia
+            base_url (str, optional): Adres API
         """
         if api_key:
             self.api_key = api_key
             
         if model:
             self.model = model
+            
+        if base_url:
+            self.base_url = base_url
+        
+        # Transport zostanie utworzony ponownie z nowymi ustawieniami
+        with self._transport_lock:
+            if self._transport is not None:
+                self._transport.close()
+            self._transport = None
+        
+    def _get_transport(self):
+        """
+        Zwraca transport zapytań do API (tworzony przy pierwszym użyciu).
+        
+        Jeśli nie skonfigurowano klucza API, ustawienia są pobierane
+        z konfiguracji aplikacji (OPENAI_API_KEY, OPENAI_MODEL, OPENAI_BASE_URL
+        i ustawienia transportu z TRANSPORT_CONFIG).
+        
+        Returns:
+            LLMTransport: Transport współdzielony przez wszystkie wątki
+            
+        Raises:
+            RuntimeError: Jeśli klucz API nie jest skonfigurowany
+        """
+        with self._transport_lock:
+            if not self.api_key:
+                try:
+                    config = current_app.config
+                    self.api_key = config['OPENAI_API_KEY']
+                    self.model = config.get('OPENAI_MODEL', self.model)
+                    self.base_url = self.base_url or config.get('OPENAI_BASE_URL')
+                    for key, option in TRANSPORT_CONFIG.items():
+                        if config.get(key) is not None:
+                            self.transport_options.setdefault(option, config[key])
+                except (RuntimeError, KeyError) as e:
+                    raise RuntimeError(f"Błąd konfiguracji OpenAI: {str(e)}")
+                
+                if not self.api_key:
+                    raise RuntimeError("Błąd konfiguracji OpenAI: brak klucza API")
+            
+            if self._transport is None:
+                self._transport = LLMTransport(self.api_key, self.base_url, **self.transport_options)
+            return self._transport
         
-        # Ustaw klucz API
-        openai.api_key = self.api_key
+    def _build_prompt(self, chart_data, prompt_template):
+        """Tworzy prompt z szablonu i danych kosmogramu."""
+        return prompt_template.replace("{{chart_data}}", chart_data)
         
-    def analyze_chart(self, chart_data, prompt_template, max_tokens=2000):
+    def _cache_key(self, prompt, max_tokens):
+        """Klucz pamięci podręcznej odpowiedzi dla promptu (po wczytaniu konfiguracji modelu)."""
+        return make_prompt_key(self.model, SYSTEM_PROMPT, prompt, TEMPERATURE, max_tokens)
+        
+    def _create_completion(self, prompt, max_tokens, stream=False):
+        """Wysyła zapytanie o analizę do API."""
+        return self._get_transport().chat_completion(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=max_tokens,
+            temperature=TEMPERATURE,
+            top_p=1.0,
+            frequency_penalty=0.0,
+            presence_penalty=0.0,
+            stream=stream
+        )
+        
+    def _complete(self, prompt, max_tokens, key):
+        """Wykonuje zapytanie do API i zapisuje odpowiedź w pamięci podręcznej."""
+        response = self._create_completion(prompt, max_tokens)
+        content = response.choices[0].message.content
+        
+        if content and self.cache is not None:
+            self.cache.set(key, content)
+        return content
+        
+    def analyze_chart(self, chart_data, prompt_template, max_tokens=2000, use_cache=True):
         """
         Analizuje kosmogram wedyjski za pomocą API OpenAI.
         
+        Odpowiedź na identyczny prompt jest zwracana z pamięci podręcznej,
+        a jednoczesne identyczne zapytania są wykonywane tylko raz.
+        
         Args:
             chart_data (str): Sformatowane dane kosmogramu
             prompt_template (str): Szablon promptu do analizy
             max_tokens (int, optional): Maksymalna liczba tokenów w odpowiedzi
+            use_cache (bool, optional): False - zawsze generuj nową odpowiedź
+                (zastępuje ona odpowiedź w pamięci podręcznej)
             
         Returns:
             str: Wynik analizy lub None w przypadku błędu
         """
-        if not self.api_key:
-            # Pobierz klucz API z konfiguracji aplikacji
-            try:
-                self.api_key = current_app.config['OPENAI_API_KEY']
-                self.model = current_app.config.get('OPENAI_MODEL', self.model)
-                openai.api_key = self.api_key
-            except (RuntimeError, KeyError) as e:
-                logger.error(f"Błąd konfiguracji OpenAI: {str(e)}")
-                return None
-        
-        # Przygotuj prompt
-        prompt = prompt_template.replace("{{chart_data}}", chart_data)
+        prompt = self._build_prompt(chart_data, prompt_template)
         
         try:
-            # Wykonaj zapytanie do API OpenAI
-            response = openai.ChatCompletion.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "Jesteś astrologiem wedyjskim z wieloletnim doświadczeniem. Twoja analiza jest dokładna, wnikliwa i oparta na klasycznych zasadach astrologii wedyjskiej."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=max_tokens,
-                temperature=0.7,
-                top_p=1.0,
-                frequency_penalty=0.0,
-                presence_penalty=0.0
-            )
-            
-            # Zwróć wynik analizy
-            return response.choices[0].message.content
+            self._get_transport()  # Wczytaj konfigurację (model jest częścią klucza)
+            key = self._cache_key(prompt, max_tokens)
+            
+            if not use_cache:
+                return self._complete(prompt, max_tokens, key)
+            
+            if self.cache is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return cached
+            
+            # Wykonaj zapytanie do API OpenAI (jedno dla jednoczesnych identycznych zapytań)
+            return self._single_flight.do(key, lambda: self._complete(prompt, max_tokens, key))
             
         except Exception as e:
             logger.error(f"Błąd podczas analizy kosmogramu: {str(e)}")
             return None
             
-    def analyze_area(self, chart_data, life_area, max_tokens=2000):
+    def stream_chart(self, chart_data, prompt_template, max_tokens=2000, use_cache=True):
+        """
+        Analizuje kosmogram, zwracając kolejne fragmenty odpowiedzi w miarę ich generowania.
+        
+        Odpowiedź z pamięci podręcznej jest zwracana jako jeden fragment;
+        pełny tekst wygenerowanej odpowiedzi jest zapisywany w pamięci podręcznej.
+        
+        Args:
+            chart_data (str): Sformatowane dane kosmogramu
+            prompt_template (str): Szablon promptu do analizy
+            max_tokens (int, optional): Maksymalna liczba tokenów w odpowiedzi
+            use_cache (bool, optional): False - zawsze generuj nową odpowiedź
+            
+        Yields:
+            str: Kolejne fragmenty tekstu analizy
+            
+        Raises:
+            RuntimeError: Jeśli klucz API nie jest skonfigurowany
+            CircuitOpenError: Jeśli API uznano za chwilowo niedostępne
+            openai.OpenAIError: W przypadku błędu API
+        """
+        prompt = self._build_prompt(chart_data, prompt_template)
+        self._get_transport()
+        key = self._cache_key(prompt, max_tokens)
+        
+        if use_cache and self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield cached
+                return
+        
+        stream = self._create_completion(prompt, max_tokens, stream=True)
+        parts = []
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    parts.append(content)
+                    yield content
+        finally:
+            # Odbiorca przerwał strumień - zamknij połączenie z API
+            stream.response.close()
+        
+        if parts and self.cache is not None:
+            self.cache.set(key, ''.join(parts))
+            
+    def cache_stats(self):
+        """
+        Zwraca statystyki pamięci podręcznej odpowiedzi.
+        
+        Returns:
+            dict: Statystyki ChartCache (lub enabled=False) i liczba połączonych zapytań
+        """
+        stats = self.cache.stats() if self.cache is not None else {'enabled': False}
+        stats['coalesced'] = self._single_flight.coalesced
+        return stats
+            
+    def transport_stats(self):
+        """
+        Zwraca statystyki transportu (stan wyłącznika, ponowienia).
+        
+        Returns:
+            dict: Statystyki LLMTransport lub None, jeśli transport nie został jeszcze utworzony
+        """
+        transport = self._transport
+        return transport.stats() if transport is not None else None
+            
+    def analyze_area(self, chart_data, life_area, max_tokens=2000, use_cache=True):
         """
         Analizuje określony obszar życia na podstawie kosmogramu.
         
@@ -90,6 +259,7 @@ class OpenAIClient:
             chart_data (dict): Dane kosmogramu
             life_area (dict): Informacje o obszarze życia
             max_tokens (int, optional): Maksymalna liczba tokenów w odpowiedzi
+            use_cache (bool, optional): False - zawsze generuj nową odpowiedź
             
         Returns:
             str: Wynik analizy lub None w przypadku błędu
@@ -97,10 +267,28 @@ class OpenAIClient:
         from ..astro.utils import format_chart_for_ai
         
         # Przygotuj dane kosmogramu w formacie dla AI
-        formatted_chart = format_chart_for_ai(chart_data, life_area)
+        formatted_chart = format_chart_for_ai(chart_data, life_area, self.compact_prompt, self.token_budget)
         
         # Pobierz szablon promptu z obszaru życia
         prompt_template = life_area['prompt_template']
         
         # Wykonaj analizę
-        return self.analyze_chart(formatted_chart, prompt_template, max_tokens)
+        return self.analyze_chart(formatted_chart, prompt_template, max_tokens, use_cache)
+        
+    def stream_area(self, chart_data, life_area, max_tokens=2000, use_cache=True):
+        """
+        Analizuje obszar życia, zwracając kolejne fragmenty odpowiedzi (jak stream_chart).
+        
+        Args:
+            chart_data (dict): Dane kosmogramu
+            life_area (dict): Informacje o obszarze życia
+            max_tokens (int, optional): Maksymalna liczba tokenów w odpowiedzi
+            use_cache (bool, optional): False - zawsze generuj nową odpowiedź
+            
+        Yields:
+            str: Kolejne fragmenty tekstu analizy
+        """
+        from ..astro.utils import format_chart_for_ai
+        
+        formatted_chart = format_chart_for_ai(chart_data, life_area, self.compact_prompt, self.token_budget)
+        return self.stream_chart(formatted_chart, life_area['prompt_template'], max_tokens, use_cache)
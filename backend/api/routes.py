@@ -1,14 +1,28 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context, url_for
 from datetime import datetime
+import io
 import logging
 from ..database.models import db
 from ..database.utils import (
-    save_birth_chart, save_varga_chart, save_chart_analysis,
-    get_birth_charts, get_birth_chart, get_varga_charts,
-    get_life_areas, get_life_area, get_chart_analyses
+    save_chart_with_vargas, save_chart_analysis,
+    get_birth_charts_page, get_birth_chart, get_varga_chart,
+    get_life_areas, get_life_area, get_chart_analyses,
+    decode_cursor, DEFAULT_PAGE_SIZE
 )
+from ..database.export import iter_charts_ndjson, parse_includes
+from .importer import import_births, detect_format, spool_upload, ImportTooLargeError, IMPORT_FORMATS, DEFAULT_MAX_UPLOAD_ROWS
+from .compute import parse_birth, compute_vargas, iter_compute_ndjson, COMPUTE_CHUNK_SIZE, MAX_COMPUTE_BATCH
+from ..serialization import dumps
+from .http_cache import make_etag, immutable_etag, is_not_modified, not_modified, cache_response
 from ..astro.calculator import VedicAstroCalculator
+from ..astro.chart import VargaSet, VARGA_TYPES, CHART_FIELDS
 from .openai_client import OpenAIClient
+from .analysis import check_analysis_target, prepare_analysis, run_area_analyses, AnalysisError, DEFAULT_MAX_PARALLEL
+from .jobs import (
+    enqueue_analysis, get_job, job_to_dict, check_queue_capacity, count_pending_jobs,
+    DEFAULT_MAX_PENDING, DEFAULT_MAX_PENDING_PER_USER
+)
+from .admission import AdmissionController, AdmissionRejected
 
 # Utwórz blueprint dla API
 api_bp = Blueprint('api', __name__)
@@ -22,10 +36,89 @@ calculator = VedicAstroCalculator()
 # Inicjalizuj klienta OpenAI
 openai_client = OpenAIClient()
 
+# Limit jednoczesnych analiz wykonywanych w trakcie żądania (konfigurowany w create_app)
+admission = AdmissionController()
+
+def _too_many_requests(error):
+    """
+    Tworzy odpowiedź 429 dla żądania odrzuconego z powodu przeciążenia.
+    
+    Args:
+        error (AdmissionRejected): Błąd kontroli dopuszczania
+        
+    Returns:
+        tuple: (odpowiedź z nagłówkiem Retry-After, kod 429)
+    """
+    response = jsonify({"error": error.message, "retry_after": error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+def _load_varga_set(chart_id):
+    """
+    Wczytuje zapisany kosmogram D1 i zwraca zbiór varg obliczanych na żądanie.
+    
+    Args:
+        chart_id (int): ID kosmogramu
+        
+    Returns:
+        VargaSet: Vargi kosmogramu lub None, jeśli nie zapisano D1
+    """
+    d1 = get_varga_chart(chart_id, 'D1')
+    if not d1:
+        return None
+    return VargaSet(d1.data, calculator)
+
+def _parse_selection(name, allowed):
+    """
+    Parsuje parametr zapytania z listą wartości oddzielonych przecinkami.
+    
+    Args:
+        name (str): Nazwa parametru
+        allowed (tuple): Dopuszczalne wartości
+        
+    Returns:
+        list: Wybrane wartości (bez powtórzeń, w kolejności podania) lub None, jeśli parametru nie podano
+        
+    Raises:
+        ValueError: Jeśli wartość jest nieznana
+    """
+    value = request.args.get(name)
+    if value is None:
+        return None
+    
+    selected = list(dict.fromkeys(item.strip() for item in value.split(',') if item.strip()))
+    unknown = [item for item in selected if item not in allowed]
+    if unknown:
+        raise ValueError(
+            f"Nieznane wartości parametru {name}: {', '.join(unknown)}. "
+            f"Dopuszczalne wartości: {', '.join(allowed)}."
+        )
+    return selected
+
 @api_bp.route('/health', methods=['GET'])
 def health_check():
-    """Prosta trasa do sprawdzenia stanu API."""
-    return jsonify({"status": "ok", "message": "API działa poprawnie"})
+    """Prosta trasa do sprawdzenia stanu API (ze stanem połączenia z OpenAI)."""
+    return jsonify({
+        "status": "ok",
+        "message": "API działa poprawnie",
+        "openai": openai_client.transport_stats()
+    })
+
+@api_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """Zwraca statystyki pamięci podręcznych (trafienia, chybienia, rozmiar)."""
+    return jsonify({
+        "chart_cache": calculator.cache.stats() if calculator.cache is not None else None,
+        "llm_cache": openai_client.cache_stats()
+    })
+
+@api_bp.route('/admission/stats', methods=['GET'])
+def admission_stats():
+    """Zwraca metryki kontroli dopuszczania analiz (zapytania w toku, kolejka, czas oczekiwania)."""
+    return jsonify({
+        "admission": admission.stats(),
+        "pending_jobs": count_pending_jobs()
+    })
 
 @api_bp.route('/chart', methods=['POST'])
 def create_chart():
@@ -53,49 +146,194 @@ def create_chart():
         except ValueError:
             return jsonify({"error": "Nieprawidłowy format daty. Użyj formatu ISO (YYYY-MM-DDTHH:MM:SS)"}), 400
         
-        # Zapisz kosmogram w bazie danych
-        birth_chart = save_birth_chart(
+        # Oblicz kosmogram D1 - pozostałe vargi są wyliczane z niego przy odczycie
+        try:
+            main_chart = calculator.calculate_chart(
+                birth_date=birth_date,
+                latitude=float(data['latitude']),
+                longitude=float(data['longitude'])
+            )
+        except Exception as e:
+            logger.error(f"Błąd podczas obliczania varg: {str(e)}")
+            return jsonify({"error": f"Nie udało się obliczyć kosmogramu: {str(e)}"}), 500
+        
+        # Zapisz kosmogram i D1 w jednej transakcji
+        birth_chart = save_chart_with_vargas(
             name=data['name'],
             birth_date=birth_date,
             latitude=float(data['latitude']),
             longitude=float(data['longitude']),
+            vargas={'D1': main_chart},
             user_id=data.get('user_id')
         )
         
         if not birth_chart:
             return jsonify({"error": "Nie udało się zapisać kosmogramu"}), 500
         
-        # Oblicz wszystkie vargi
-        try:
-            vargas = calculator.calculate_all_vargas(
-                birth_date=birth_date,
-                latitude=float(data['latitude']),
-                longitude=float(data['longitude'])
-            )
+        return jsonify({
+            "success": True,
+            "message": "Kosmogram utworzony pomyślnie",
+            "chart_id": birth_chart.id
+        }), 201
             
-            # Zapisz vargi w bazie danych
-            for varga_type, varga_data in vargas.items():
-                save_varga_chart(birth_chart.id, varga_type, varga_data)
-                
-            return jsonify({
-                "success": True,
-                "message": "Kosmogram utworzony pomyślnie",
-                "chart_id": birth_chart.id
-            }), 201
-                
+    except Exception as e:
+        logger.error(f"Błąd podczas tworzenia kosmogramu: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api_bp.route('/compute', methods=['POST'])
+def compute_chart():
+    """
+    Oblicza kosmogram bez zapisywania go w bazie danych (np. podgląd).
+    
+    Wymagane dane JSON:
+    {
+        "birth_date": "YYYY-MM-DDTHH:MM:SS",
+        "latitude": 50.123,
+        "longitude": 19.456
+    }
+    
+    Parametry zapytania:
+        vargas (str, optional): Typy varg oddzielone przecinkami; domyślnie D1
+        fields (str, optional): Pola kosmogramów varg oddzielone przecinkami; domyślnie wszystkie
+    """
+    try:
+        try:
+            varga_types = _parse_selection('vargas', VARGA_TYPES) or ['D1']
+            fields = _parse_selection('fields', CHART_FIELDS)
+            birth = parse_birth(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        try:
+            vargas = compute_vargas(calculator, birth, varga_types, fields)
         except Exception as e:
-            logger.error(f"Błąd podczas obliczania varg: {str(e)}")
+            logger.error(f"Błąd podczas obliczania kosmogramu: {str(e)}")
             return jsonify({"error": f"Nie udało się obliczyć kosmogramu: {str(e)}"}), 500
-            
+        
+        return jsonify({"vargas": vargas}), 200
+        
     except Exception as e:
-        logger.error(f"Błąd podczas tworzenia kosmogramu: {str(e)}")
+        logger.error(f"Błąd podczas obliczania kosmogramu: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api_bp.route('/compute/batch', methods=['POST'])
+def compute_charts_batch():
+    """
+    Oblicza wiele kosmogramów bez zapisu i strumieniowo zwraca wyniki w formacie NDJSON.
+    
+    Wiersze są wysyłane w kolejności ukończenia obliczeń; pole 'index' wskazuje
+    pozycję rekordu w żądaniu. Błędny rekord daje wiersz z polem 'error'.
+    
+    Wymagane dane JSON - lista danych urodzeniowych jak w /compute
+    lub obiekt {"births": [...]}.
+    
+    Parametry zapytania:
+        vargas (str, optional): Typy varg oddzielone przecinkami; domyślnie D1
+        fields (str, optional): Pola kosmogramów varg oddzielone przecinkami; domyślnie wszystkie
+    """
+    try:
+        # Walidacja przed rozpoczęciem strumienia - później nie można już zwrócić błędu 400
+        try:
+            varga_types = _parse_selection('vargas', VARGA_TYPES) or ['D1']
+            fields = _parse_selection('fields', CHART_FIELDS)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        data = request.get_json(silent=True)
+        births = data.get('births') if isinstance(data, dict) else data
+        if not isinstance(births, list):
+            return jsonify({"error": "Oczekiwano listy danych urodzeniowych"}), 400
+        
+        max_batch = current_app.config.get('COMPUTE_MAX_BATCH', MAX_COMPUTE_BATCH)
+        if len(births) > max_batch:
+            return jsonify({"error": f"Zbyt wiele rekordów: {len(births)}. Maksymalnie {max_batch}."}), 413
+        
+        lines = iter_compute_ndjson(
+            births, calculator, varga_types, fields,
+            workers=current_app.config.get('COMPUTE_WORKERS') or None,
+            chunk_size=current_app.config.get('COMPUTE_CHUNK_SIZE', COMPUTE_CHUNK_SIZE),
+            precision=current_app.config.get('JSON_FLOAT_PRECISION')
+        )
+        
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        logger.error(f"Błąd podczas obliczania kosmogramów: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api_bp.route('/charts/bulk', methods=['POST'])
+def import_charts():
+    """
+    Importuje wiele kosmogramów z pliku CSV lub NDJSON.
+    
+    Plik można przesłać jako pole 'file' formularza multipart albo bezpośrednio
+    w treści żądania (Content-Type: text/csv lub application/x-ndjson).
+    Każdy rekord zawiera pola: name, birth_date, latitude, longitude, opcjonalnie user_id.
+    
+    Import odbywa się w trakcie żądania, więc liczba wierszy jest ograniczona
+    (IMPORT_MAX_ROWS, odpowiedź 413); duże zbiory danych importuje polecenie
+    python -m backend.import (lub flask import-charts).
+    
+    Parametry zapytania:
+        format (str, optional): 'csv' lub 'ndjson' - jeśli nie wynika z nazwy pliku lub typu
+    """
+    try:
+        upload = request.files.get('file')
+        if upload:
+            stream = upload.stream
+            file_format = request.args.get('format') or detect_format(upload.filename, upload.content_type)
+        else:
+            stream = request.stream
+            file_format = request.args.get('format') or detect_format(content_type=request.content_type)
+        
+        if file_format not in IMPORT_FORMATS:
+            return jsonify({
+                "error": f"Nieznany format pliku. Dopuszczalne wartości: {', '.join(IMPORT_FORMATS)}"
+            }), 400
+        
+        # Sprawdź liczbę wierszy, zanim cokolwiek zostanie zapisane
+        try:
+            spooled = spool_upload(stream, current_app.config.get('IMPORT_MAX_ROWS', DEFAULT_MAX_UPLOAD_ROWS))
+        except ImportTooLargeError as e:
+            return jsonify({"error": str(e)}), 413
+        
+        # Plik jest czytany strumieniowo, wiersz po wierszu
+        with spooled:
+            lines = io.TextIOWrapper(spooled, encoding='utf-8-sig', newline='')
+            report = import_births(
+                lines, file_format, calculator,
+                workers=current_app.config.get('IMPORT_WORKERS') or None,
+                chunk_size=current_app.config.get('IMPORT_CHUNK_SIZE', 100),
+                batch_size=current_app.config.get('IMPORT_BATCH_SIZE', 500)
+            )
+        
+        return jsonify({"success": True, "report": report.to_dict()}), 200
+        
+    except UnicodeDecodeError:
+        return jsonify({"error": "Plik musi być zakodowany w UTF-8"}), 400
+    except Exception as e:
+        logger.error(f"Błąd podczas importu kosmogramów: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @api_bp.route('/charts', methods=['GET'])
 def list_charts():
-    """Pobiera listę wszystkich kosmogramów."""
+    """
+    Pobiera stronę listy kosmogramów (od najnowszych).
+    
+    Parametry zapytania:
+        limit (int, optional): Liczba kosmogramów na stronie (domyślnie 50, maks. 500)
+        cursor (str, optional): Wartość next_cursor z poprzedniej odpowiedzi
+        user_id (int, optional): Tylko kosmogramy danego użytkownika
+    """
     try:
-        charts = get_birth_charts()
+        try:
+            charts, next_cursor = get_birth_charts_page(
+                limit=request.args.get('limit', DEFAULT_PAGE_SIZE, type=int),
+                cursor=request.args.get('cursor'),
+                user_id=request.args.get('user_id', type=int)
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         # Konwertuj wyniki do JSON
         charts_data = []
@@ -109,7 +347,7 @@ def list_charts():
                 "created_at": chart.created_at.isoformat()
             })
             
-        return jsonify({"charts": charts_data}), 200
+        return jsonify({"charts": charts_data, "next_cursor": next_cursor}), 200
         
     except Exception as e:
         logger.error(f"Błąd podczas pobierania kosmogramów: {str(e)}")
@@ -122,19 +360,40 @@ def get_chart(chart_id):
     
     Args:
         chart_id (int): ID kosmogramu
+        
+    Parametry zapytania:
+        vargas (str, optional): Typy varg oddzielone przecinkami (np. 'D1,D9');
+            domyślnie D1-D12, pusta wartość - bez varg
+        fields (str, optional): Pola kosmogramów varg oddzielone przecinkami
+            (np. 'planets,ascendant'); domyślnie wszystkie
     """
     try:
+        try:
+            varga_types = _parse_selection('vargas', VARGA_TYPES)
+            fields = _parse_selection('fields', CHART_FIELDS)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        if varga_types is None:
+            varga_types = VARGA_TYPES
+        
         chart = get_birth_chart(chart_id)
         
         if not chart:
             return jsonify({"error": "Nie znaleziono kosmogramu"}), 404
-            
-        # Pobierz vargi dla tego kosmogramu
-        vargas = get_varga_charts(chart_id)
         
-        vargas_data = {}
-        for varga_type, varga in vargas.items():
-            vargas_data[varga_type] = varga.data  # Używa właściwości data z modelu VargaChart
+        # Kosmogram nie zmienia się po utworzeniu - 304 bez odczytu varg.
+        # Każdy wybór varg i pól to inna reprezentacja z własnym ETag.
+        etag = immutable_etag(
+            'chart', chart.id, chart.created_at,
+            ','.join(varga_types), ','.join(fields) if fields is not None else '*'
+        )
+        if is_not_modified(etag):
+            return not_modified(etag)
+        
+        # Odczytywany jest tylko wiersz D1 - wybrane vargi D2-D12 są z niego wyliczane
+        varga_set = _load_varga_set(chart_id) if varga_types else None
+        vargas_data = varga_set.select(varga_types, fields) if varga_set else {}
         
         # Przygotuj dane kosmogramu
         chart_data = {
@@ -147,7 +406,7 @@ def get_chart(chart_id):
             "vargas": vargas_data
         }
         
-        return jsonify(chart_data), 200
+        return cache_response(jsonify(chart_data), etag), 200
         
     except Exception as e:
         logger.error(f"Błąd podczas pobierania kosmogramu: {str(e)}")
@@ -168,8 +427,16 @@ def list_life_areas():
                 "description": area.description,
                 "varga_combination": area.varga_combination
             })
+        
+        # Obszary mogą być edytowane - ETag obejmuje też szablony promptów
+        etag = make_etag('life-areas', *(
+            (area.id, area.name, area.description, area.varga_combination, area.prompt_template)
+            for area in areas
+        ))
+        if is_not_modified(etag):
+            return not_modified(etag, max_age=0)
             
-        return jsonify({"life_areas": areas_data}), 200
+        return cache_response(jsonify({"life_areas": areas_data}), etag, max_age=0), 200
         
     except Exception as e:
         logger.error(f"Błąd podczas pobierania obszarów życia: {str(e)}")
@@ -198,7 +465,11 @@ def get_area(area_id):
             "prompt_template": area.prompt_template
         }
         
-        return jsonify(area_data), 200
+        etag = make_etag('life-area', *area_data.values())
+        if is_not_modified(etag):
+            return not_modified(etag, max_age=0)
+        
+        return cache_response(jsonify(area_data), etag, max_age=0), 200
         
     except Exception as e:
         logger.error(f"Błąd podczas pobierania obszaru życia: {str(e)}")
@@ -245,79 +516,229 @@ def update_area(area_id):
 @api_bp.route('/analyze', methods=['POST'])
 def analyze_chart():
     """
-    Analizuje kosmogram dla określonego obszaru życia.
+    Zleca analizę kosmogramu dla określonego obszaru życia.
+    
+    Analiza jest wykonywana w tle przez pulę wątków roboczych (api/jobs.py);
+    odpowiedź 202 zawiera ID zadania, którego stan i wynik zwraca GET /api/jobs/<id>.
     
     Wymagane dane JSON:
     {
         "chart_id": 1,
-        "life_area_id": 1
+        "life_area_id": 1,
+        "fresh": false  // opcjonalnie; true - nowa analiza zamiast odpowiedzi z pamięci podręcznej
     }
     """
     try:
-        data = request.json
+        data = request.get_json(silent=True)
         
         # Walidacja danych
-        if not all(key in data for key in ['chart_id', 'life_area_id']):
+        if not isinstance(data, dict) or not all(key in data for key in ['chart_id', 'life_area_id']):
             return jsonify({"error": "Brakujące wymagane pola"}), 400
             
         chart_id = data['chart_id']
         life_area_id = data['life_area_id']
         
-        # Pobierz kosmogram i obszar życia
-        chart = get_birth_chart(chart_id)
-        life_area = get_life_area(life_area_id)
+        try:
+            chart, _ = check_analysis_target(chart_id, life_area_id)
+        except AnalysisError as e:
+            return jsonify({"error": e.message}), e.status_code
+        
+        # Ogranicz liczbę niezakończonych zadań (łącznie i właściciela kosmogramu)
+        try:
+            check_queue_capacity(
+                chart.user_id,
+                max_pending=current_app.config.get('ANALYSIS_MAX_PENDING', DEFAULT_MAX_PENDING),
+                max_pending_per_user=current_app.config.get('ANALYSIS_MAX_PENDING_PER_USER', DEFAULT_MAX_PENDING_PER_USER)
+            )
+        except AdmissionRejected as e:
+            return _too_many_requests(e)
+        
+        job = enqueue_analysis(chart_id, life_area_id, fresh=bool(data.get('fresh', False)))
+        status_url = url_for('api.get_analysis_job', job_id=job.id)
+        
+        response = jsonify({
+            "success": True,
+            "job_id": job.id,
+            "status": job.status,
+            "status_url": status_url
+        })
+        response.headers['Location'] = status_url
+        return response, 202
+        
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Błąd podczas zlecania analizy kosmogramu: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api_bp.route('/analyze/all', methods=['POST'])
+def analyze_all_areas():
+    """
+    Analizuje kosmogram dla wszystkich (lub wybranych) obszarów życia jednocześnie.
+    
+    Wymagane dane JSON:
+    {
+        "chart_id": 1,
+        "life_area_ids": [1, 2],  // opcjonalnie; domyślnie wszystkie obszary
+        "fresh": false  // opcjonalnie; true - nowe analizy zamiast odpowiedzi z pamięci podręcznej
+    }
+    """
+    try:
+        data = request.get_json(silent=True)
         
+        if not isinstance(data, dict) or 'chart_id' not in data:
+            return jsonify({"error": "Brakujące wymagane pola"}), 400
+        
+        chart_id = data['chart_id']
+        life_area_ids = data.get('life_area_ids')
+        if life_area_ids is not None and (
+                not isinstance(life_area_ids, list)
+                or not all(isinstance(area_id, int) for area_id in life_area_ids)):
+            return jsonify({"error": "life_area_ids musi być listą ID obszarów życia"}), 400
+        
+        chart = get_birth_chart(chart_id)
         if not chart:
             return jsonify({"error": "Nie znaleziono kosmogramu"}), 404
-            
-        if not life_area:
-            return jsonify({"error": "Nie znaleziono obszaru życia"}), 404
-            
-        # Pobierz vargi dla kosmogramu
-        vargas = get_varga_charts(chart_id)
         
-        # Przygotuj dane do analizy
-        from ..astro.utils import combine_varga_charts
+        life_areas = get_life_areas()
+        if life_area_ids is not None:
+            areas_by_id = {area.id: area for area in life_areas}
+            unknown = [str(area_id) for area_id in life_area_ids if area_id not in areas_by_id]
+            if unknown:
+                return jsonify({"error": f"Nie znaleziono obszarów życia: {', '.join(unknown)}"}), 404
+            life_areas = [areas_by_id[area_id] for area_id in dict.fromkeys(life_area_ids)]
         
-        # Pobierz listę varg do analizy
-        varga_types = life_area.varga_combination.split(',')
+        # Jedno miejsce na każde jednoczesne zapytanie do API
+        max_parallel = current_app.config.get('ANALYSIS_MAX_PARALLEL', DEFAULT_MAX_PARALLEL)
+        try:
+            slot = admission.acquire(chart.user_id, slots=min(len(life_areas), max_parallel))
+        except AdmissionRejected as e:
+            return _too_many_requests(e)
         
-        # Konwertuj słownik obiektów VargaChart na słownik danych
-        vargas_data = {}
-        for varga_type, varga in vargas.items():
-            vargas_data[varga_type] = varga.data
+        try:
+            with slot:
+                saved, errors = run_area_analyses(
+                    chart_id, life_areas, calculator, openai_client,
+                    max_workers=slot.slots,
+                    use_cache=not data.get('fresh', False)
+                )
+        except AnalysisError as e:
+            return jsonify({"error": e.message}), e.status_code
+        
+        analyses = [
+            {
+                "life_area_id": area.id,
+                "life_area_name": area.name,
+                "analysis_id": saved[area.id].id,
+                "analysis_result": saved[area.id].analysis_result
+            }
+            for area in life_areas if area.id in saved
+        ]
+        failed = [
+            {"life_area_id": area.id, "life_area_name": area.name, "error": errors[area.id]}
+            for area in life_areas if area.id in errors
+        ]
         
-        # Połącz kosmogramy varg
-        combined_chart = combine_varga_charts(vargas_data, varga_types)
+        return jsonify({
+            "success": bool(analyses),
+            "chart_id": chart_id,
+            "analyses": analyses,
+            "errors": failed
+        }), 200 if analyses or not life_areas else 500
         
-        if not combined_chart:
-            return jsonify({"error": "Nie można połączyć kosmogramów varg"}), 500
-            
-        # Analizuj kosmogram za pomocą OpenAI
-        analysis_result = openai_client.analyze_area(combined_chart, {
-            'name': life_area.name,
-            'description': life_area.description,
-            'varga_combination': life_area.varga_combination,
-            'prompt_template': life_area.prompt_template
-        })
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Błąd podczas analizy obszarów życia: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+def _sse_event(event, data):
+    """Formatuje zdarzenie Server-Sent Events z danymi JSON."""
+    return f"event: {event}\ndata: {dumps(data)}\n\n"
+
+@api_bp.route('/analyze/stream', methods=['GET'])
+def stream_analysis():
+    """
+    Analizuje kosmogram, przesyłając tekst analizy na bieżąco (Server-Sent Events).
+    
+    Parametry zapytania: chart_id, life_area_id, fresh (opcjonalnie; 1 - nowa analiza
+    zamiast odpowiedzi z pamięci podręcznej).
+    
+    Zdarzenia:
+        delta - kolejny fragment tekstu: {"text": "..."}
+        done - analiza zapisana: {"analysis_id": 1}
+        error - błąd analizy: {"error": "..."}
+    """
+    chart_id = request.args.get('chart_id', type=int)
+    life_area_id = request.args.get('life_area_id', type=int)
+    fresh = request.args.get('fresh', '').lower() in ('1', 'true')
+    
+    if chart_id is None or life_area_id is None:
+        return jsonify({"error": "Brakujące wymagane parametry: chart_id, life_area_id"}), 400
+    
+    try:
+        combined_chart, life_area = prepare_analysis(chart_id, life_area_id, calculator)
+        slot = admission.acquire(get_birth_chart(chart_id).user_id)
+    except AnalysisError as e:
+        return jsonify({"error": e.message}), e.status_code
+    except AdmissionRejected as e:
+        return _too_many_requests(e)
+    except Exception as e:
+        logger.error(f"Błąd podczas przygotowania analizy: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+    
+    def generate():
+        parts = []
+        try:
+            for text in openai_client.stream_area(combined_chart, life_area, use_cache=not fresh):
+                parts.append(text)
+                yield _sse_event('delta', {"text": text})
+        except Exception as e:
+            logger.error(f"Błąd podczas strumieniowania analizy: {str(e)}")
+            yield _sse_event('error', {"error": "Nie udało się przeprowadzić analizy"})
+            return
+        finally:
+            slot.release()
+        
+        # Zapisz pełny tekst analizy po zakończeniu strumienia
+        saved_analysis = save_chart_analysis(chart_id, life_area_id, ''.join(parts)) if parts else None
+        if not saved_analysis:
+            yield _sse_event('error', {"error": "Nie udało się zapisać analizy"})
+            return
         
-        if not analysis_result:
-            return jsonify({"error": "Nie udało się przeprowadzić analizy"}), 500
-            
-        # Zapisz wynik analizy
-        saved_analysis = save_chart_analysis(chart_id, life_area_id, analysis_result)
+        yield _sse_event('done', {"analysis_id": saved_analysis.id})
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        # Bez buforowania w serwerach pośredniczących (np. nginx)
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Zwolnij miejsce także wtedy, gdy klient rozłączy się przed rozpoczęciem strumienia
+    response.call_on_close(slot.release)
+    return response
+
+@api_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """
+    Pobiera stan zadania analizy (queued, running, succeeded, failed).
+    
+    Po zakończeniu zadania odpowiedź zawiera analysis_id i analysis_result
+    albo opis błędu (error).
+    
+    Args:
+        job_id (int): ID zadania
+    """
+    try:
+        job = get_job(job_id)
         
-        if not saved_analysis:
-            return jsonify({"error": "Nie udało się zapisać analizy"}), 500
-            
-        return jsonify({
-            "success": True,
-            "analysis_id": saved_analysis.id,
-            "analysis_result": analysis_result
-        }), 200
+        if not job:
+            return jsonify({"error": "Nie znaleziono zadania"}), 404
+        
+        response = jsonify(job_to_dict(job))
+        response.headers['Cache-Control'] = 'no-store'
+        return response, 200
         
     except Exception as e:
-        logger.error(f"Błąd podczas analizy kosmogramu: {str(e)}")
+        logger.error(f"Błąd podczas pobierania zadania analizy: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 @api_bp.route('/analyses/<int:chart_id>', methods=['GET'])
@@ -363,6 +784,11 @@ def get_analysis(analysis_id):
         
         if not analysis:
             return jsonify({"error": "Nie znaleziono analizy"}), 404
+        
+        # Ponowna analiza obszaru nadpisuje wynik - ETag zależy od treści analizy
+        etag = make_etag('analysis', analysis.id, analysis.analysis_result)
+        if is_not_modified(etag):
+            return not_modified(etag, max_age=0)
             
         # Przygotuj dane analizy
         analysis_data = {
@@ -375,8 +801,49 @@ def get_analysis(analysis_id):
             "created_at": analysis.created_at.isoformat()
         }
         
-        return jsonify(analysis_data), 200
+        return cache_response(jsonify(analysis_data), etag, max_age=0), 200
         
     except Exception as e:
         logger.error(f"Błąd podczas pobierania analizy: {str(e)}")
         return jsonify({"error": str(e)}), 500
+
+@api_bp.route('/export/charts', methods=['GET'])
+def export_charts():
+    """
+    Strumieniowo eksportuje kosmogramy w formacie NDJSON (od najstarszych).
+    
+    Parametry zapytania:
+        created_from (str, optional): Data ISO - kosmogramy utworzone od tej chwili
+        created_to (str, optional): Data ISO - kosmogramy utworzone przed tą chwilą
+        user_id (int, optional): Tylko kosmogramy danego użytkownika
+        include (str, optional): Dodatkowe dane oddzielone przecinkami: vargas (zapisany kosmogram D1), analyses
+        cursor (str, optional): Wartość pola 'cursor' ostatniego odebranego wiersza
+    """
+    try:
+        created_from = request.args.get('created_from')
+        created_to = request.args.get('created_to')
+        cursor = request.args.get('cursor')
+        
+        # Walidacja przed rozpoczęciem strumienia - później nie można już zwrócić błędu 400
+        try:
+            created_from = datetime.fromisoformat(created_from) if created_from else None
+            created_to = datetime.fromisoformat(created_to) if created_to else None
+            includes = parse_includes(request.args.get('include'))
+            if cursor:
+                decode_cursor(cursor)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        lines = iter_charts_ndjson(
+            created_from=created_from,
+            created_to=created_to,
+            user_id=request.args.get('user_id', type=int),
+            cursor=cursor,
+            includes=includes
+        )
+        
+        return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+        
+    except Exception as e:
+        logger.error(f"Błąd podczas eksportu kosmogramów: {str(e)}")
+        return jsonify({"error": str(e)}), 500
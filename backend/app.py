@@ -4,7 +4,13 @@ from flask import Flask
 from flask_cors import CORS
 from config import config
 from database.utils import init_db
-from api.routes import api_bp
+from api.routes import api_bp, calculator, openai_client, admission
+from api.jobs import AnalysisWorkerPool
+from astro.timezones import configure_timezone_resolver
+from astro.cache import create_chart_cache
+from commands import register_commands
+from serialization import FastJSONProvider
+from api.compression import init_compression
 
 def create_app(config_name=None):
     """
@@ -29,6 +35,11 @@ def create_app(config_name=None):
     # Załaduj konfigurację
     app.config.from_object(config[config_name])
     
+    # Szybka serializacja JSON (orjson, jeśli jest zainstalowany) i kompresja odpowiedzi
+    app.json = FastJSONProvider(app)
+    app.json.float_precision = app.config.get('JSON_FLOAT_PRECISION')
+    init_compression(app)
+    
     # Skonfiguruj logowanie
     logging.basicConfig(
         level=logging.INFO,
@@ -38,9 +49,63 @@ def create_app(config_name=None):
     # Inicjalizuj bazę danych
     init_db(app)
     
+    # Wczytaj dane stref czasowych raz dla całego procesu
+    configure_timezone_resolver(
+        grid=app.config['TIMEZONE_GRID'],
+        cache_size=app.config['TIMEZONE_CACHE_SIZE'],
+        in_memory=app.config['TIMEZONE_IN_MEMORY']
+    )
+    
+    # Włącz prekomputowaną tablicę efemeryd, jeśli jest skonfigurowana
+    if app.config.get('EPHEMERIS_TABLE'):
+        calculator.set_ephemeris_table(app.config['EPHEMERIS_TABLE'])
+    
+    # Skonfiguruj pamięć podręczną wyników obliczeń
+    calculator.cache = create_chart_cache(
+        backend=app.config['CHART_CACHE_BACKEND'],
+        maxsize=app.config['CHART_CACHE_SIZE'],
+        ttl=app.config['CHART_CACHE_TTL'],
+        path=app.config['CHART_CACHE_PATH']
+    )
+    
+    # Skonfiguruj pamięć podręczną odpowiedzi modelu (analiz)
+    openai_client.cache = create_chart_cache(
+        backend=app.config['LLM_CACHE_BACKEND'],
+        maxsize=app.config['LLM_CACHE_SIZE'],
+        ttl=app.config['LLM_CACHE_TTL'],
+        path=app.config['LLM_CACHE_PATH']
+    )
+    openai_client.compact_prompt = app.config['PROMPT_COMPACT']
+    openai_client.token_budget = app.config['PROMPT_TOKEN_BUDGET']
+    
+    # Skonfiguruj limity jednoczesnych analiz
+    admission.configure(
+        max_in_flight=app.config['ADMISSION_MAX_IN_FLIGHT'],
+        max_per_user=app.config['ADMISSION_MAX_PER_USER'],
+        max_queue=app.config['ADMISSION_MAX_QUEUE'],
+        queue_timeout=app.config['ADMISSION_QUEUE_TIMEOUT'],
+        retry_after=app.config['ADMISSION_RETRY_AFTER']
+    )
+    
     # Zarejestruj blueprint API
     app.register_blueprint(api_bp, url_prefix='/api')
     
+    # Wątki wykonujące analizy z kolejki startują przy pierwszym żądaniu
+    # (nie w poleceniach wiersza poleceń ani w procesie nadzorującym przeładowanie)
+    if app.config['ANALYSIS_WORKERS'] > 0:
+        pool = AnalysisWorkerPool(
+            app, calculator, openai_client,
+            workers=app.config['ANALYSIS_WORKERS'],
+            poll_interval=app.config['ANALYSIS_POLL_INTERVAL'],
+            job_timeout=app.config['ANALYSIS_JOB_TIMEOUT'],
+            max_attempts=app.config['ANALYSIS_MAX_ATTEMPTS']
+        )
+        app.extensions['analysis_workers'] = pool
+        app.before_request(pool.ensure_started)
+    
+    # Zarejestruj polecenia wiersza poleceń (np. flask --app app export-charts, import-charts)
+    register_commands(app)
+    
     # Dodaj podstawową trasę główną
     @app.route('/')
     def index():
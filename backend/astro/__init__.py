@@ -10,6 +10,11 @@ Ten pakiet zapewnia narzędzia do:
 
 from .calculator import VedicAstroCalculator
 from .models import PlanetInfo, HouseInfo, AspectsInfo, VedicChartDasa
+from .varga import calculate_varga_signs, chart_longitudes
+from .timezones import TimezoneResolver, get_timezone_resolver
+from .cache import ChartCache, create_chart_cache
+from .dasha import VimshottariDasha
+from .chart import Chart, PlanetView, VargaSet
 from .utils import (
     get_planet_dignity, get_chart_strength, analyze_houses,
     combine_varga_charts, format_chart_for_ai
@@ -21,6 +26,16 @@ __all__ = [
     'HouseInfo',
     'AspectsInfo',
     'VedicChartDasa',
+    'calculate_varga_signs',
+    'chart_longitudes',
+    'TimezoneResolver',
+    'get_timezone_resolver',
+    'ChartCache',
+    'create_chart_cache',
+    'VimshottariDasha',
+    'Chart',
+    'PlanetView',
+    'VargaSet',
     'get_planet_dignity',
     'get_chart_strength',
     'analyze_houses',
@@ -0,0 +1,193 @@
+"""
+Silnik aspektów oparty na indeksie znak -> ciała.
+
+Wedyjskie aspekty (graha drishti) są odczytywane z indeksu ciał w znakach
+budowanego raz na kosmogram, zamiast ponownego przeglądania wszystkich
+planet dla każdego aspektowanego domu. Aspekty z orbem są wyznaczane
+z macierzy kątów między wszystkimi parami ciał, liczonej w NumPy jednocześnie
+dla wielu kosmogramów (np. wszystkich varg).
+
+Kolejność i zawartość zwracanych list są identyczne z dotychczasowymi
+implementacjami w VedicAstroCalculator i AspectsInfo.
+"""
+
+import numpy as np
+
+# Wedyjskie aspekty planet - domy liczone od pozycji planety
+VEDIC_ASPECTS = {
+    'Sun': [7],  # Aspekt na 7. dom
+    'Moon': [7],
+    'Mercury': [7],
+    'Venus': [7],
+    'Mars': [4, 7, 8],  # Aspekty na domy 4, 7 i 8
+    'Jupiter': [5, 7, 9],  # Aspekty na domy 5, 7 i 9
+    'Saturn': [3, 7, 10],  # Aspekty na domy 3, 7 i 10
+    'Rahu': [5, 7, 9],  # Podobnie jak Jowisz
+    'Ketu': [5, 7, 9],  # Podobnie jak Jowisz
+    'Ascendant': []  # Ascendent nie rzuca aspektów w astrologii wedyjskiej
+}
+
+VEDIC_ASPECT_LABEL = "Aspekt z domu {}"
+
+
+def build_sign_index(planets):
+    """
+    Buduje indeks znak -> ciała w tym znaku.
+
+    Args:
+        planets (dict): Dane planet (z kluczem 'sign')
+
+    Returns:
+        list: 12 list nazw ciał w kolejności słownika planet
+    """
+    index = [[] for _ in range(12)]
+    for planet_name, planet_data in planets.items():
+        if 0 <= planet_data['sign'] < 12:
+            index[planet_data['sign']].append(planet_name)
+    return index
+
+
+def calculate_graha_drishti(planets, aspect_houses=VEDIC_ASPECTS, label=VEDIC_ASPECT_LABEL,
+                            sign_index=None):
+    """
+    Oblicza wedyjskie aspekty planet na podstawie indeksu znaków.
+
+    Args:
+        planets (dict): Dane planet (z kluczem 'sign')
+        aspect_houses (dict, optional): Domy aspektowane przez każdą planetę
+        label (str, optional): Szablon nazwy aspektu z numerem domu
+        sign_index (list, optional): Gotowy indeks z build_sign_index
+
+    Returns:
+        list: Lista aspektów
+    """
+    if sign_index is None:
+        sign_index = build_sign_index(planets)
+
+    aspects = []
+    for p1_name, p1_data in planets.items():
+        houses = aspect_houses.get(p1_name)
+        if not houses:
+            continue
+
+        p1_sign = p1_data['sign']
+        for aspect_house in houses:
+            # Planety w znaku, na który pada aspekt
+            aspected_sign = (p1_sign + aspect_house - 1) % 12
+            for p2_name in sign_index[aspected_sign]:
+                if p2_name != p1_name:  # Nie sprawdzaj aspektów planety na samą siebie
+                    aspects.append({
+                        'planet1': p1_name,
+                        'planet2': p2_name,
+                        'aspect_type': label.format(aspect_house),
+                        'strength': 100  # W astrologii wedyjskiej aspekty są pełne lub ich nie ma
+                    })
+
+    return aspects
+
+
+def calculate_angle(longitude1, longitude2):
+    """
+    Oblicza kąt między dwoma punktami na zodiaku (0-180 stopni).
+
+    Args:
+        longitude1 (float): Długość ekliptyczna pierwszego punktu
+        longitude2 (float): Długość ekliptyczna drugiego punktu
+
+    Returns:
+        float: Kąt między punktami
+    """
+    diff = abs(longitude1 - longitude2) % 360
+    return min(diff, 360 - diff)
+
+
+def calculate_orb_aspects_many(planets_list, standard_aspects):
+    """
+    Oblicza aspekty z orbem dla wielu kosmogramów jednocześnie.
+
+    Macierz kątów (n_kosmogramów, n_ciał, n_ciał) jest liczona w jednym
+    przebiegu; szczegóły (siła, orb) są wyznaczane tylko dla znalezionych aspektów.
+
+    Args:
+        planets_list (list): Słowniki planet (z kluczem 'longitude') dla każdego kosmogramu
+        standard_aspects (dict): Definicje aspektów {nazwa: {'angle': ..., 'orb': ...}}
+
+    Returns:
+        list: Listy aspektów dla każdego kosmogramu
+    """
+    results = [[] for _ in planets_list]
+    if not planets_list or not standard_aspects:
+        return results
+
+    # Kosmogramy o różnych zestawach ciał liczone są osobno
+    names = list(planets_list[0].keys())
+    if any(list(planets.keys()) != names for planets in planets_list[1:]):
+        return [calculate_orb_aspects_many([planets], standard_aspects)[0] for planets in planets_list]
+
+    aspect_types = list(standard_aspects.keys())
+    exact_angles = np.array([standard_aspects[a]['angle'] for a in aspect_types], dtype=np.float64)
+    orbs = np.array([standard_aspects[a]['orb'] for a in aspect_types], dtype=np.float64)
+
+    longitudes = np.array(
+        [[planets[name]['longitude'] for name in names] for planets in planets_list],
+        dtype=np.float64
+    )
+
+    # Macierz kątów między wszystkimi parami ciał
+    diff = np.abs(longitudes[:, :, None] - longitudes[:, None, :]) % 360
+    angles = np.minimum(diff, 360 - diff)
+
+    # Tylko pary i < j, jak w pętli po parach
+    n = len(names)
+    upper = np.triu(np.ones((n, n), dtype=bool), k=1)
+    matches = (np.abs(angles[..., None] - exact_angles) <= orbs) & upper[None, :, :, None]
+
+    # np.nonzero zwraca indeksy w kolejności (kosmogram, i, j, typ aspektu)
+    for chart, i, j, k in zip(*np.nonzero(matches)):
+        planets = planets_list[chart]
+        planet1 = names[i]
+        planet2 = names[j]
+        aspect_data = standard_aspects[aspect_types[k]]
+
+        # Wartości liczone skalarnie, aby typy i wyniki były identyczne z pętlą
+        angle = calculate_angle(planets[planet1]['longitude'], planets[planet2]['longitude'])
+        exact_angle = aspect_data['angle']
+        orb = aspect_data['orb']
+        orb_diff = abs(angle - exact_angle)
+
+        results[chart].append({
+            'planet1': planet1,
+            'planet2': planet2,
+            'aspect_type': aspect_types[k],
+            'angle': angle,
+            'exact_angle': exact_angle,
+            'orb': orb_diff,
+            'strength': 100 - (orb_diff / orb * 100)
+        })
+
+    return results
+
+
+def calculate_aspects_many(planets_list, aspect_houses=VEDIC_ASPECTS, label=VEDIC_ASPECT_LABEL,
+                           standard_aspects=None):
+    """
+    Oblicza aspekty dla wielu kosmogramów (np. wszystkich varg) w jednym wywołaniu.
+
+    Args:
+        planets_list (list): Słowniki planet dla każdego kosmogramu
+        aspect_houses (dict, optional): Domy aspektowane przez każdą planetę
+        label (str, optional): Szablon nazwy aspektu wedyjskiego
+        standard_aspects (dict, optional): Definicje aspektów z orbem; None - tylko aspekty wedyjskie
+
+    Returns:
+        list: Listy aspektów dla każdego kosmogramu (najpierw aspekty z orbem, potem wedyjskie)
+    """
+    if standard_aspects:
+        results = calculate_orb_aspects_many(planets_list, standard_aspects)
+    else:
+        results = [[] for _ in planets_list]
+
+    for aspects, planets in zip(results, planets_list):
+        aspects.extend(calculate_graha_drishti(planets, aspect_houses, label))
+
+    return results
@@ -1,9 +1,21 @@
 import swisseph as swe
 import math
+import time
+import logging
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from datetime import datetime
 import pytz
-from timezonefinder import TimezoneFinder
 from .models import PlanetInfo, HouseInfo, AspectsInfo
+from .chart import Chart, VargaSet
+from .varga import get_varga_sign, calculate_varga_signs
+from .ephemeris import EphemerisTable, CALC_FLAGS
+from .timezones import get_timezone_resolver
+from .cache import make_chart_key
+from .aspects import calculate_graha_drishti, calculate_aspects_many
 
 # Stałe
 PLANETS = {
@@ -51,16 +63,108 @@ VARGA_NAMES = {
     12: "Dvadasamsa (D12)"
 }
 
+# Wersja silnika obliczeń - zmiana unieważnia zapisane w pamięci podręcznej wyniki
+ENGINE_VERSION = '1.0'
+
+# Domyślna liczba rekordów urodzeniowych w jednej paczce wysyłanej do procesu roboczego
+BATCH_CHUNK_SIZE = 100
+
+logger = logging.getLogger(__name__)
+
+# Kalkulator procesu roboczego - swisseph trzyma stan globalny, więc każdy proces
+# inicjalizuje własną instancję (set_ephe_path, set_sid_mode)
+_worker_calculator = None
+
+
+def _init_batch_worker(ephe_path, ephemeris_table):
+    """Inicjalizuje kalkulator w procesie roboczym puli."""
+    global _worker_calculator
+    _worker_calculator = VedicAstroCalculator(ephe_path, ephemeris_table)
+
+
+class BatchError:
+    """Błąd obliczeń pojedynczego rekordu paczki (zwracany zamiast wyniku)."""
+
+    __slots__ = ('message',)
+
+    def __init__(self, message):
+        """
+        Args:
+            message (str): Opis błędu
+        """
+        self.message = message
+
+    def __getstate__(self):
+        return self.message
+
+    def __setstate__(self, state):
+        self.message = state
+
+    def __repr__(self):
+        return f'<BatchError {self.message}>'
+
+
+def _calculate_batch_chunk(chunk, all_vargas, calculator=None, compact=False, capture_errors=False):
+    """
+    Oblicza paczkę kosmogramów w procesie roboczym.
+
+    Args:
+        chunk (list): Lista krotek (birth_date, latitude, longitude)
+        all_vargas (bool): Czy obliczać wszystkie vargi D1-D12
+        calculator (VedicAstroCalculator, optional): Kalkulator; domyślnie kalkulator procesu roboczego
+        compact (bool, optional): Czy zwracać zwarte kosmogramy Chart
+        capture_errors (bool, optional): Czy zwracać BatchError zamiast przerywać całą paczkę
+
+    Returns:
+        tuple: (lista wyników, czas obliczeń w sekundach)
+    """
+    calculator = calculator or _worker_calculator
+    started = time.perf_counter()
+
+    results = []
+    for birth_date, latitude, longitude in chunk:
+        try:
+            if compact:
+                # Chart zawiera znaki wszystkich varg, więc all_vargas nie ma znaczenia
+                result = Chart.from_dict(calculator.calculate_chart(birth_date, latitude, longitude))
+            elif all_vargas:
+                result = calculator.calculate_all_vargas(birth_date, latitude, longitude)
+            else:
+                result = calculator.calculate_chart(birth_date, latitude, longitude)
+        except Exception as e:
+            if not capture_errors:
+                raise
+            result = BatchError(str(e))
+
+        results.append(result)
+
+    return results, time.perf_counter() - started
+
+
 class VedicAstroCalculator:
     """Kalkulator astrologii wedyjskiej."""
     
-    def __init__(self, ephe_path=None):
+    def __init__(self, ephe_path=None, ephemeris_table=None, cache=None):
         """
         Inicjalizuje kalkulator astrologii wedyjskiej.
         
         Args:
             ephe_path (str, optional): Ścieżka do plików efemerydy
+            ephemeris_table (str, optional): Ścieżka do prekomputowanej tablicy efemeryd (.npy)
+            cache (ChartCache, optional): Pamięć podręczna wyników obliczeń
         """
+        self.ephe_path = ephe_path
+        self.cache = cache
+        self.ephemeris_table_path = None
+        self.ephemeris_table = None
+        
+        # Współdzielona pula procesów (worker_pool) tworzona przy pierwszym użyciu
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        
+        if ephemeris_table:
+            self.set_ephemeris_table(ephemeris_table)
+
         if ephe_path:
             swe.set_ephe_path(ephe_path)
         else:
@@ -74,6 +178,23 @@ class VedicAstroCalculator:
         if self.sidereal_mode:
             swe.set_sid_mode(self.ayanamsa)
     
+    def set_ephemeris_table(self, path):
+        """
+        Włącza prekomputowaną tablicę efemeryd jako źródło pozycji planet.
+        
+        Momenty spoza zakresu tablicy są nadal liczone przez Swiss Ephemeris.
+        
+        Args:
+            path (str): Ścieżka do pliku .npy tablicy efemeryd
+        """
+        table = EphemerisTable(path)
+        
+        if table.flags != CALC_FLAGS:
+            raise ValueError(f"Tablica efemeryd {path} została zbudowana z innymi flagami obliczeń")
+        
+        self.ephemeris_table_path = path
+        self.ephemeris_table = table
+    
     def _normalize_longitude(self, longitude):
         """Normalizuje długość geograficzną do przedziału 0-360 stopni."""
         return longitude % 360
@@ -89,9 +210,7 @@ class VedicAstroCalculator:
     
     def _get_local_timezone(self, latitude, longitude):
         """Określa strefę czasową na podstawie współrzędnych geograficznych."""
-        tf = TimezoneFinder()
-        tz_name = tf.timezone_at(lng=longitude, lat=latitude)
-        return pytz.timezone(tz_name) if tz_name else pytz.UTC
+        return get_timezone_resolver().resolve(latitude, longitude)
     
     def _convert_to_utc(self, birth_datetime, latitude, longitude):
         """Konwertuje lokalny czas na UTC."""
@@ -113,22 +232,26 @@ class VedicAstroCalculator:
         """Oblicza pozycję planety."""
         if planet_id == -1:  # Ketu
             # Ketu jest zawsze 180 stopni od Rahu
-            rahu_pos = swe.calc_ut(jd, swe.MEAN_NODE)[0]
+            rahu_pos = self._calc_planet_position(jd, swe.MEAN_NODE)[0]
             return (self._normalize_longitude(rahu_pos + 180), 0, 0)
         elif planet_id == -2:  # Ascendent
             raise ValueError("Ascendent musi być obliczony osobno.")
+        elif self.ephemeris_table and self.ephemeris_table.covers(jd, planet_id):
+            # Interpolacja z tablicy mapowanej w pamięci
+            return self.ephemeris_table.calc(jd, planet_id)[0:3]
         else:
-            return swe.calc_ut(jd, planet_id)[0:3]
+            # calc_ut zwraca krotkę (pozycja, flagi) - pozycja to (długość, szerokość, odległość, prędkości)
+            return swe.calc_ut(jd, planet_id, CALC_FLAGS)[0][0:3]
     
     def _calc_ascendant(self, jd, latitude, longitude):
         """Oblicza ascendent (Lagna)."""
         # Uzyskaj domy w systemie Sripati
-        houses, ascendant = swe.houses(jd, latitude, longitude, HOUSE_SYSTEMS['Sripati'])
-        return ascendant
+        houses, ascmc = swe.houses(jd, latitude, longitude, HOUSE_SYSTEMS['Sripati'])
+        return ascmc[0]
     
     def _calc_houses(self, jd, latitude, longitude):
         """Oblicza pozycje domów."""
-        houses, ascendant = swe.houses(jd, latitude, longitude, HOUSE_SYSTEMS['Sripati'])
+        houses, ascmc = swe.houses(jd, latitude, longitude, HOUSE_SYSTEMS['Sripati'])
         return houses
     
     def _get_varga_longitude(self, longitude, varga_num):
@@ -145,127 +268,9 @@ class VedicAstroCalculator:
         if varga_num == 1:
             # D1 (Rasi) - bez zmian
             return longitude
-        elif varga_num == 2:
-            # D2 (Hora)
-            rasi = self._get_sign(longitude)
-            degree = self._get_degrees_in_sign(longitude)
-            
-            # Hora Słońca (znaki nieparzyste) i Hora Księżyca (znaki parzyste)
-            if rasi % 2 == 0:  # Parzyste znaki
-                if degree < 15:
-                    return 30 * 4  # Księżyc - Rak
-                else:
-                    return 30 * 0  # Słońce - Baran
-            else:  # Nieparzyste znaki
-                if degree < 15:
-                    return 30 * 0  # Słońce - Baran
-                else:
-                    return 30 * 4  # Księżyc - Rak
-        elif varga_num == 3:
-            # D3 (Drekkana)
-            rasi = self._get_sign(longitude)
-            degree = self._get_degrees_in_sign(longitude)
-            
-            if degree < 10:
-                return rasi * 30  # Pierwszy dekanat - ten sam znak
-            elif degree < 20:
-                return ((rasi + 4) % 12) * 30  # Drugi dekanat - znak + 4
-            else:
-                return ((rasi + 8) % 12) * 30  # Trzeci dekanat - znak + 8
-        elif varga_num == 4:
-            # D4 (Chaturthamsa)
-            rasi = self._get_sign(longitude)
-            degree = self._get_degrees_in_sign(longitude)
-            
-            part = int(degree / 7.5)  # 30/4 = 7.5 stopni na część
-            return ((rasi * 4 + part) % 12) * 30
-        elif varga_num == 5:
-            # D5 (Panchamsa)
-            rasi = self._get_sign(longitude)
-            degree = self._get_degrees_in_sign(longitude)
-            
-            part = int(degree / 6)  # 30/5 = 6 stopni na część
-            
-            # Różny algorytm dla znaków ruchomych, stałych i zmiennych
-            if rasi % 3 == 0:  # Ruchome znaki (Baran, Rak, Waga, Koziorożec)
-                return ((rasi + part) % 12) * 30
-            elif rasi % 3 == 1:  # Stałe znaki (Byk, Lew, Skorpion, Wodnik)
-                return ((rasi + 4 + part) % 12) * 30
-            else:  # Zmienne znaki (Bliźnięta, Panna, Strzelec, Ryby)
-                return ((rasi + 8 + part) % 12) * 30
-        elif varga_num == 6:
-            # D6 (Shashthamsa)
-            rasi = self._get_sign(longitude)
-            degree = self._get_degrees_in_sign(longitude)
-            
-            part = int(degree / 5)  # 30/6 = 5 stopni na część
-            return ((rasi * 6 + part) % 12) * 30
-        elif varga_num == 7:
-            # D7 (Saptamsa)
-            rasi = self._get_sign(longitude)
-            degree = self._get_degrees_in_sign(longitude)
-            
-            part = int(degree / (30/7))
-            
-            # Różny algorytm dla znaków nieparzystych i parzystych
-            if rasi % 2 == 0:  # Parzyste znaki
-                return ((rasi + 6 + part) % 12) * 30
-            else:  # Nieparzyste znaki
-                return ((rasi + part) % 12) * 30
-        elif varga_num == 8:
-            # D8 (Ashtamsa)
-            rasi = self._get_sign(longitude)
-            degree = self._get_degrees_in_sign(longitude)
-            
-            part = int(degree / 3.75)  # 30/8 = 3.75 stopni na część
-            return ((rasi * 8 + part) % 12) * 30
-        elif varga_num == 9:
-            # D9 (Navamsa) - klasyczna metoda
-            rasi = self._get_sign(longitude)
-            degree = self._get_degrees_in_sign(longitude)
-            
-            part = int(degree / 3.333333)  # 30/9 = 3.33 stopni na część
-            
-            # Dla znaków ognistych (Baran, Lew, Strzelec)
-            if rasi % 4 == 0:
-                return ((0 + part) % 12) * 30
-            # Dla znaków ziemskich (Byk, Panna, Koziorożec)
-            elif rasi % 4 == 1:
-                return ((4 + part) % 12) * 30
-            # Dla znaków powietrznych (Bliźnięta, Waga, Wodnik)
-            elif rasi % 4 == 2:
-                return ((8 + part) % 12) * 30
-            # Dla znaków wodnych (Rak, Skorpion, Ryby)
-            else:
-                return ((0 + part) % 12) * 30
-        elif varga_num == 10:
-            # D10 (Dasamsa)
-            rasi = self._get_sign(longitude)
-            degree = self._get_degrees_in_sign(longitude)
-            
-            part = int(degree / 3)  # 30/10 = 3 stopni na część
-            
-            # Różny algorytm dla znaków nieparzystych i parzystych
-            if rasi % 2 == 0:  # Parzyste znaki
-                return ((rasi * 10 + part) % 12) * 30
-            else:  # Nieparzyste znaki
-                return ((rasi * 10 + 9 + part) % 12) * 30
-        elif varga_num == 11:
-            # D11 (Ekadasamsa)
-            rasi = self._get_sign(longitude)
-            degree = self._get_degrees_in_sign(longitude)
-            
-            part = int(degree / (30/11))
-            return ((rasi * 11 + part) % 12) * 30
-        elif varga_num == 12:
-            # D12 (Dvadasamsa)
-            rasi = self._get_sign(longitude)
-            degree = self._get_degrees_in_sign(longitude)
-            
-            part = int(degree / 2.5)  # 30/12 = 2.5 stopni na część
-            return ((rasi * 12 + part) % 12) * 30
-        else:
-            raise ValueError(f"Nieprawidłowy numer vargi: {varga_num}. Dopuszczalne wartości: 1-12.")
+
+        # Pozostałe vargi - znak z tablicy przeglądowej (znak, część)
+        return get_varga_sign(longitude, varga_num) * 30
     
     def calculate_chart(self, birth_date, latitude, longitude, house_system='Sripati'):
         """
@@ -284,6 +289,12 @@ class VedicAstroCalculator:
         utc_dt = self._convert_to_utc(birth_date, latitude, longitude)
         jd = self._calc_julian_day(utc_dt)
         
+        # Sprawdź, czy kosmogram był już obliczony
+        cache_key = self._cache_key('chart', jd, latitude, longitude, house_system)
+        cached = self._get_cached(cache_key, birth_date, latitude, longitude)
+        if cached is not None:
+            return cached
+        
         # Oblicz ascendent
         ascendant = self._calc_ascendant(jd, latitude, longitude)
         ascendant_sign = self._get_sign(ascendant)
@@ -341,7 +352,7 @@ class VedicAstroCalculator:
         # Oblicz aspekty między planetami
         aspects = self._calculate_aspects(planets_data)
         
-        return {
+        chart = {
             'birth_date': birth_date.isoformat(),
             'latitude': latitude,
             'longitude': longitude,
@@ -357,6 +368,10 @@ class VedicAstroCalculator:
             'houses': houses_data,
             'aspects': aspects
         }
+        
+        self._set_cached(cache_key, chart)
+        
+        return chart
     
     def calculate_varga(self, main_chart, varga_num):
         """
@@ -372,6 +387,24 @@ class VedicAstroCalculator:
         if varga_num < 1 or varga_num > 12:
             raise ValueError(f"Nieprawidłowy numer vargi: {varga_num}. Dopuszczalne wartości: 1-12.")
         
+        longitudes = [planet_data['longitude'] for planet_data in main_chart['planets'].values()]
+        signs = calculate_varga_signs(longitudes, [varga_num])
+        
+        return self._build_varga_chart(main_chart, varga_num, signs[:, 0])
+    
+    def _build_varga_chart(self, main_chart, varga_num, signs, with_aspects=True):
+        """
+        Buduje słownikowy kosmogram vargi ze znaków obliczonych przez silnik varg.
+        
+        Args:
+            main_chart (dict): Główny kosmogram (D1 Rasi)
+            varga_num (int): Numer vargi (1-12)
+            signs (array_like): Znaki w vardze w kolejności main_chart['planets']
+            with_aspects (bool, optional): Czy od razu obliczyć aspekty vargi
+            
+        Returns:
+            dict: Dane kosmogramu vargi
+        """
         varga_chart = {
             'varga_type': f"D{varga_num}",
             'varga_name': VARGA_NAMES.get(varga_num, f"D{varga_num}"),
@@ -384,25 +417,45 @@ class VedicAstroCalculator:
         }
         
         # Konwertuj pozycje planet z D1 na wybraną vargę
-        for planet_name, planet_data in main_chart['planets'].items():
+        for (planet_name, planet_data), varga_sign in zip(main_chart['planets'].items(), signs):
             d1_longitude = planet_data['longitude']
-            varga_longitude = self._get_varga_longitude(d1_longitude, varga_num)
-            varga_sign = self._get_sign(varga_longitude)
-            varga_deg_in_sign = self._get_degrees_in_sign(varga_longitude)
+            
+            if varga_num == 1:
+                # D1 (Rasi) - bez zmian
+                varga_longitude = d1_longitude
+                varga_sign = self._get_sign(d1_longitude)
+            else:
+                varga_sign = int(varga_sign)
+                varga_longitude = varga_sign * 30
             
             varga_chart['planets'][planet_name] = {
                 'longitude': varga_longitude,
                 'sign': varga_sign,
                 'sign_name': SIGNS[varga_sign],
-                'degrees_in_sign': varga_deg_in_sign,
+                'degrees_in_sign': self._get_degrees_in_sign(varga_longitude),
                 'original_longitude': d1_longitude
             }
         
         # Oblicz aspekty dla vargi
-        varga_chart['aspects'] = self._calculate_aspects(varga_chart['planets'])
+        if with_aspects:
+            varga_chart['aspects'] = self._calculate_aspects(varga_chart['planets'])
         
         return varga_chart
     
+    def calculate_varga_set(self, birth_date, latitude, longitude):
+        """
+        Oblicza kosmogram D1 i zwraca zbiór varg obliczanych na żądanie.
+        
+        Args:
+            birth_date (datetime): Data i godzina urodzenia
+            latitude (float): Szerokość geograficzna miejsca urodzenia
+            longitude (float): Długość geograficzna miejsca urodzenia
+            
+        Returns:
+            VargaSet: Vargi D1-D12; D2-D12 są obliczane przy pierwszym dostępie
+        """
+        return VargaSet(self.calculate_chart(birth_date, latitude, longitude), self)
+    
     def calculate_all_vargas(self, birth_date, latitude, longitude):
         """
         Oblicza wszystkie vargi od D1 do D12.
@@ -415,19 +468,273 @@ class VedicAstroCalculator:
         Returns:
             dict: Słownik zawierający wszystkie vargi
         """
+        # Sprawdź, czy vargi były już obliczone
+        if self.cache is not None:
+            utc_dt = self._convert_to_utc(birth_date, latitude, longitude)
+            cache_key = self._cache_key('vargas', self._calc_julian_day(utc_dt), latitude, longitude)
+            cached = self._get_cached(cache_key, birth_date, latitude, longitude)
+            if cached is not None:
+                return cached
+        
         # Najpierw oblicz główny kosmogram (D1 Rasi)
         main_chart = self.calculate_chart(birth_date, latitude, longitude)
         
         # Słownik na wszystkie vargi
         vargas = {'D1': main_chart}
         
-        # Oblicz pozostałe vargi (D2-D12)
-        for varga_num in range(2, 13):
-            varga_chart = self.calculate_varga(main_chart, varga_num)
-            vargas[f'D{varga_num}'] = varga_chart
+        # Znaki wszystkich planet w D2-D12 w jednym przebiegu silnika varg
+        varga_nums = range(2, 13)
+        longitudes = [planet_data['longitude'] for planet_data in main_chart['planets'].values()]
+        signs = calculate_varga_signs(longitudes, varga_nums)
         
+        for index, varga_num in enumerate(varga_nums):
+            vargas[f'D{varga_num}'] = self._build_varga_chart(
+                main_chart, varga_num, signs[:, index], with_aspects=False
+            )
+        
+        # Aspekty wszystkich varg w jednym wywołaniu silnika aspektów
+        varga_charts = [vargas[f'D{varga_num}'] for varga_num in varga_nums]
+        all_aspects = calculate_aspects_many([chart['planets'] for chart in varga_charts])
+        for chart, aspects in zip(varga_charts, all_aspects):
+            chart['aspects'] = aspects
+
+        if self.cache is not None:
+            self._set_cached(cache_key, vargas)
+
         return vargas
-    
+
+    def _cache_key(self, kind, jd, latitude, longitude, house_system='Sripati'):
+        """Tworzy klucz pamięci podręcznej dla obliczeń tego kalkulatora."""
+        return make_chart_key(kind, jd, latitude, longitude, self.ayanamsa, house_system, ENGINE_VERSION)
+
+    def _get_cached(self, cache_key, birth_date, latitude, longitude):
+        """
+        Pobiera wynik z pamięci podręcznej.
+        
+        Zapisany wynik mógł powstać z innej reprezentacji tego samego momentu
+        (np. inna strefa czasowa), więc dane wejściowe są podstawiane z bieżącego wywołania.
+        """
+        if self.cache is None:
+            return None
+
+        cached = self.cache.get(cache_key)
+        if cached is None:
+            return None
+
+        charts = cached.values() if 'planets' not in cached else [cached]
+        for chart in charts:
+            chart['birth_date'] = birth_date.isoformat()
+            chart['latitude'] = latitude
+            chart['longitude'] = longitude
+
+        return cached
+
+    def _set_cached(self, cache_key, result):
+        """Zapisuje wynik w pamięci podręcznej, jeśli jest włączona."""
+        if self.cache is not None:
+            self.cache.set(cache_key, result)
+
+    def get_cached_chart(self, birth_date, latitude, longitude, house_system='Sripati'):
+        """
+        Zwraca kosmogram D1 z pamięci podręcznej bez obliczania go.
+
+        Args:
+            birth_date (datetime): Data i godzina urodzenia
+            latitude (float): Szerokość geograficzna miejsca urodzenia
+            longitude (float): Długość geograficzna miejsca urodzenia
+            house_system (str, optional): System domów
+
+        Returns:
+            dict: Dane kosmogramu lub None, jeśli nie ma go w pamięci podręcznej
+        """
+        if self.cache is None:
+            return None
+
+        jd = self._calc_julian_day(self._convert_to_utc(birth_date, latitude, longitude))
+        cache_key = self._cache_key('chart', jd, latitude, longitude, house_system)
+        return self._get_cached(cache_key, birth_date, latitude, longitude)
+
+    def cache_chart(self, chart, birth_date, latitude, longitude, house_system='Sripati'):
+        """
+        Zapisuje w pamięci podręcznej kosmogram D1 obliczony poza tym kalkulatorem
+        (np. w procesie roboczym puli).
+
+        Args:
+            chart (dict): Dane kosmogramu zwrócone przez calculate_chart
+            birth_date (datetime): Data i godzina urodzenia
+            latitude (float): Szerokość geograficzna miejsca urodzenia
+            longitude (float): Długość geograficzna miejsca urodzenia
+            house_system (str, optional): System domów
+        """
+        if self.cache is None:
+            return
+
+        jd = self._calc_julian_day(self._convert_to_utc(birth_date, latitude, longitude))
+        self._set_cached(self._cache_key('chart', jd, latitude, longitude, house_system), chart)
+
+    def worker_pool(self, workers=None):
+        """
+        Zwraca współdzieloną pulę procesów obliczeniowych kalkulatora.
+
+        Pula jest tworzona przy pierwszym wywołaniu i używana przez kolejne
+        żądania, więc koszt uruchomienia procesów i wczytania efemeryd jest
+        ponoszony raz. Zadania wykonują _calculate_batch_chunk.
+
+        Args:
+            workers (int, optional): Liczba procesów przy tworzeniu puli; domyślnie liczba rdzeni
+
+        Returns:
+            ProcessPoolExecutor: Pula procesów
+        """
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                                 initializer=_init_batch_worker,
+                                                 initargs=(self.ephe_path, self.ephemeris_table_path))
+            return self._pool
+
+    def submit_charts(self, births, workers=None):
+        """
+        Zleca obliczenie paczki kosmogramów D1 we współdzielonej puli procesów.
+
+        Args:
+            births (list): Rekordy (birth_date, latitude, longitude)
+            workers (int, optional): Liczba procesów, jeśli pula nie została jeszcze utworzona
+
+        Returns:
+            Future: Wynik (lista kosmogramów lub BatchError, czas obliczeń w sekundach)
+        """
+        return self.worker_pool(workers).submit(_calculate_batch_chunk, births, False,
+                                                capture_errors=True)
+
+    def shutdown_pool(self):
+        """Zamyka współdzieloną pulę procesów (jeśli została utworzona)."""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def calculate_charts_batch(self, births, workers=None, chunk_size=BATCH_CHUNK_SIZE,
+                               all_vargas=True, on_chunk=None, compact=False):
+        """
+        Oblicza wiele kosmogramów równolegle w puli procesów.
+
+        Rekordy są dzielone na paczki, a każdy proces roboczy ma własny,
+        zainicjalizowany kalkulator (swisseph przechowuje stan globalny).
+
+        Args:
+            births (iterable): Rekordy (birth_date, latitude, longitude)
+            workers (int, optional): Liczba procesów; 1 oznacza obliczenia w bieżącym procesie
+            chunk_size (int, optional): Liczba rekordów w jednej paczce
+            all_vargas (bool, optional): Czy obliczać wszystkie vargi (D1-D12), czy tylko D1
+            on_chunk (callable, optional): Funkcja wywoływana ze statystykami każdej paczki
+            compact (bool, optional): Czy zwracać zwarte kosmogramy Chart zamiast słowników
+                (np. do analiz na dużej liczbie kosmogramów w pamięci)
+
+        Returns:
+            list: Wyniki w kolejności rekordów wejściowych
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Nieprawidłowy rozmiar paczki: {chunk_size}")
+
+        births = list(births)
+        chunks = [births[i:i + chunk_size] for i in range(0, len(births), chunk_size)]
+
+        if workers == 1:
+            # Bez puli - bieżący kalkulator liczy wszystkie paczki
+            chunk_results = (_calculate_batch_chunk(chunk, all_vargas, self, compact) for chunk in chunks)
+            return self._collect_batch_results(chunks, chunk_results, on_chunk)
+
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_batch_worker,
+                                 initargs=(self.ephe_path, self.ephemeris_table_path)) as executor:
+            # map zachowuje kolejność paczek niezależnie od kolejności ich ukończenia
+            chunk_results = executor.map(_calculate_batch_chunk, chunks,
+                                         [all_vargas] * len(chunks),
+                                         [None] * len(chunks),
+                                         [compact] * len(chunks))
+            return self._collect_batch_results(chunks, chunk_results, on_chunk)
+
+    def iter_charts_batch(self, births, workers=None, chunk_size=BATCH_CHUNK_SIZE,
+                          all_vargas=True, capture_errors=False, max_pending=None):
+        """
+        Strumieniowo oblicza kosmogramy w puli procesów (np. import dużych plików).
+
+        W przeciwieństwie do calculate_charts_batch rekordy są pobierane
+        z iteratora na bieżąco, a w puli jest jednocześnie najwyżej max_pending
+        paczek, więc zużycie pamięci nie zależy od liczby rekordów.
+
+        Args:
+            births (iterable): Rekordy (birth_date, latitude, longitude)
+            workers (int, optional): Liczba procesów; 1 oznacza obliczenia w bieżącym procesie
+            chunk_size (int, optional): Liczba rekordów w jednej paczce
+            all_vargas (bool, optional): Czy obliczać wszystkie vargi (D1-D12), czy tylko D1
+            capture_errors (bool, optional): Czy zwracać BatchError dla błędnych rekordów
+            max_pending (int, optional): Limit paczek w toku; domyślnie 2 na proces
+
+        Yields:
+            tuple: (paczka rekordów, lista wyników, czas obliczeń w sekundach) w kolejności wejściowej
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Nieprawidłowy rozmiar paczki: {chunk_size}")
+
+        births = iter(births)
+        chunks = iter(lambda: list(islice(births, chunk_size)), [])
+
+        if workers == 1:
+            for chunk in chunks:
+                results, elapsed = _calculate_batch_chunk(chunk, all_vargas, self,
+                                                          capture_errors=capture_errors)
+                yield chunk, results, elapsed
+            return
+
+        workers = workers or os.cpu_count() or 1
+        max_pending = max_pending or 2 * workers
+
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_batch_worker,
+                                 initargs=(self.ephe_path, self.ephemeris_table_path)) as executor:
+            pending = deque()
+            for chunk in chunks:
+                future = executor.submit(_calculate_batch_chunk, chunk, all_vargas,
+                                         capture_errors=capture_errors)
+                pending.append((chunk, future))
+
+                # Odbieraj wyniki po kolei, gdy w puli jest już dość paczek
+                if len(pending) >= max_pending:
+                    chunk, future = pending.popleft()
+                    yield (chunk, *future.result())
+
+            while pending:
+                chunk, future = pending.popleft()
+                yield (chunk, *future.result())
+
+    def _collect_batch_results(self, chunks, chunk_results, on_chunk):
+        """Scala wyniki paczek i raportuje przepustowość każdej z nich."""
+        results = []
+
+        for index, (chunk_result, elapsed) in enumerate(chunk_results):
+            results.extend(chunk_result)
+
+            stats = {
+                'chunk': index,
+                'chunks_total': len(chunks),
+                'size': len(chunks[index]),
+                'seconds': elapsed,
+                'charts_per_second': len(chunks[index]) / elapsed if elapsed > 0 else None,
+                'completed': len(results)
+            }
+
+            logger.info(
+                f"Paczka {index + 1}/{len(chunks)}: {stats['size']} kosmogramów "
+                f"w {elapsed:.3f} s"
+            )
+
+            if on_chunk:
+                on_chunk(stats)
+
+        return results
+
     def _calculate_aspects(self, planets_data):
         """
         Oblicza aspekty między planetami według zasad astrologii wedyjskiej.
@@ -438,45 +745,4 @@ class VedicAstroCalculator:
         Returns:
             list: Lista aspektów
         """
-        aspects = []
-        
-        # Listę planet do obliczeń aspektów
-        planet_names = list(planets_data.keys())
-        
-        # Definicje aspektów wedyjskich dla różnych planet (uproszczone)
-        # W astrologii wedyjskiej każda planeta ma aspekty na określone domy od swojej pozycji
-        vedic_aspects = {
-            'Sun': [7],  # Aspekt na 7. dom
-            'Moon': [7],
-            'Mercury': [7],
-            'Venus': [7],
-            'Mars': [4, 7, 8],  # Aspekty na domy 4, 7 i 8
-            'Jupiter': [5, 7, 9],  # Aspekty na domy 5, 7 i 9
-            'Saturn': [3, 7, 10],  # Aspekty na domy 3, 7 i 10
-            'Rahu': [5, 7, 9],  # Podobnie jak Jowisz
-            'Ketu': [5, 7, 9],  # Podobnie jak Jowisz
-            'Ascendant': []  # Ascendent nie rzuca aspektów w astrologii wedyjskiej
-        }
-        
-        for i, p1_name in enumerate(planet_names):
-            p1_data = planets_data[p1_name]
-            p1_sign = p1_data['sign']
-            
-            # Oblicz aspekty dla tej planety
-            for aspect_house in vedic_aspects.get(p1_name, []):
-                # Oblicz znak, na który pada aspekt
-                aspected_sign = (p1_sign + aspect_house - 1) % 12
-                
-                # Sprawdź, które planety są w tym znaku
-                for p2_name in planet_names:
-                    if p2_name != p1_name:  # Nie sprawdzaj aspektów planety na samą siebie
-                        p2_data = planets_data[p2_name]
-                        if p2_data['sign'] == aspected_sign:
-                            aspects.append({
-                                'planet1': p1_name,
-                                'planet2': p2_name,
-                                'aspect_type': f"Aspekt z domu {aspect_house}",
-                                'strength': 100  # W astrologii wedyjskiej aspekty są pełne lub ich nie ma
-                            })
-        
-        return aspects
+        return calculate_graha_drishti(planets_data)
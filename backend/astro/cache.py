@@ -0,0 +1,296 @@
+"""
+Pamięć podręczna wyników obliczeń kosmogramów.
+
+Kluczem jest skrót znormalizowanych danych wejściowych (dzień juliański,
+współrzędne, ayanamsa, system domów) oraz wersji silnika obliczeń, dzięki
+czemu zmiana algorytmu unieważnia wcześniej zapisane wyniki. Wyniki są
+przechowywane w postaci zserializowanej, więc każdy odczyt zwraca
+niezależną kopię, którą wywołujący może modyfikować.
+"""
+
+import hashlib
+import logging
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Domyślne ustawienia pamięci podręcznej
+DEFAULT_CACHE_SIZE = 10000
+DEFAULT_CACHE_TTL = 7 * 24 * 3600
+
+# Jak często (w sekundach) odczyt z magazynu SQLite odświeża czas użycia wpisu -
+# częstsze zapisy przy każdym trafieniu blokowałyby bazę współdzieloną przez procesy
+DEFAULT_TOUCH_INTERVAL = 60
+
+# Precyzja normalizacji danych wejściowych
+JULIAN_DAY_PRECISION = 8   # ~1 ms
+COORDINATE_PRECISION = 6   # ~0.1 m
+
+
+def make_chart_key(kind, julian_day, latitude, longitude, ayanamsa, house_system, engine_version):
+    """
+    Tworzy klucz pamięci podręcznej dla obliczeń kosmogramu.
+
+    Args:
+        kind (str): Rodzaj wyniku (np. 'chart', 'vargas')
+        julian_day (float): Dzień juliański (UT)
+        latitude (float): Szerokość geograficzna
+        longitude (float): Długość geograficzna
+        ayanamsa (int): Identyfikator ayanamsy
+        house_system (str): System domów
+        engine_version (str): Wersja silnika obliczeń
+
+    Returns:
+        str: Skrót SHA-256 znormalizowanych danych wejściowych
+    """
+    normalized = "|".join([
+        kind,
+        f"{julian_day:.{JULIAN_DAY_PRECISION}f}",
+        f"{latitude:.{COORDINATE_PRECISION}f}",
+        f"{longitude:.{COORDINATE_PRECISION}f}",
+        str(ayanamsa),
+        house_system,
+        engine_version
+    ])
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class MemoryCacheBackend:
+    """Magazyn w pamięci procesu (LRU z czasem wygaśnięcia)."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        """
+        Args:
+            maxsize (int, optional): Maksymalna liczba wpisów
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now):
+        """Zwraca zapisaną wartość lub None, jeśli brak lub wygasła."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= now:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        """
+        Zapisuje wartość.
+
+        Returns:
+            int: Liczba wpisów usuniętych z powodu limitu rozmiaru
+        """
+        evicted = 0
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                evicted += 1
+        return evicted
+
+    def clear(self):
+        """Usuwa wszystkie wpisy."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """Magazyn na dysku w SQLite, współdzielony przez procesy robocze."""
+
+    def __init__(self, path, maxsize=DEFAULT_CACHE_SIZE, touch_interval=DEFAULT_TOUCH_INTERVAL):
+        """
+        Args:
+            path (str): Ścieżka do pliku bazy SQLite
+            maxsize (int, optional): Maksymalna liczba wpisów
+            touch_interval (float, optional): Minimalny odstęp (w sekundach) między zapisami
+                czasu użycia wpisu; kolejność usuwania wpisów jest z tą dokładnością
+        """
+        self.path = path
+        self.maxsize = maxsize
+        self.touch_interval = touch_interval
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS chart_cache ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " expires_at REAL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_chart_cache_accessed ON chart_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key, now):
+        """Zwraca zapisaną wartość lub None, jeśli brak lub wygasła."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at, accessed_at FROM chart_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, expires_at, accessed_at = row
+            if expires_at is not None and expires_at <= now:
+                self._conn.execute("DELETE FROM chart_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            # Czas użycia jest zapisywany co najwyżej raz na touch_interval - zwykłe trafienie to sam odczyt
+            if now - accessed_at >= self.touch_interval:
+                self._conn.execute(
+                    "UPDATE chart_cache SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+            return value
+
+    def set(self, key, value, expires_at):
+        """
+        Zapisuje wartość.
+
+        Returns:
+            int: Liczba wpisów usuniętych z powodu limitu rozmiaru
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO chart_cache (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, time.time())
+            )
+
+            # Usuń najdawniej używane wpisy ponad limit
+            cursor = self._conn.execute(
+                "DELETE FROM chart_cache WHERE key IN ("
+                " SELECT key FROM chart_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,)
+            )
+            self._conn.commit()
+            return max(cursor.rowcount, 0)
+
+    def clear(self):
+        """Usuwa wszystkie wpisy."""
+        with self._lock:
+            self._conn.execute("DELETE FROM chart_cache")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chart_cache").fetchone()[0]
+
+
+class ChartCache:
+    """Pamięć podręczna wyników obliczeń z czasem życia i statystykami."""
+
+    def __init__(self, backend=None, ttl=DEFAULT_CACHE_TTL):
+        """
+        Args:
+            backend (optional): Magazyn wpisów; domyślnie MemoryCacheBackend
+            ttl (float, optional): Czas życia wpisu w sekundach (None - bez wygasania)
+        """
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Zwraca kopię zapisanego wyniku.
+
+        Args:
+            key (str): Klucz utworzony przez make_chart_key
+
+        Returns:
+            object: Wynik lub None, jeśli nie ma go w pamięci podręcznej
+        """
+        payload = self.backend.get(key, time.time())
+
+        with self._lock:
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        return pickle.loads(payload)
+
+    def set(self, key, value):
+        """
+        Zapisuje wynik.
+
+        Args:
+            key (str): Klucz utworzony przez make_chart_key
+            value (object): Wynik obliczeń
+        """
+        expires_at = time.time() + self.ttl if self.ttl else None
+        evicted = self.backend.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires_at)
+
+        if evicted:
+            with self._lock:
+                self.evictions += evicted
+
+    def clear(self):
+        """Usuwa wszystkie wpisy."""
+        self.backend.clear()
+
+    def stats(self):
+        """
+        Zwraca statystyki pamięci podręcznej.
+
+        Returns:
+            dict: Liczba trafień, chybień, usunięć i wpisów
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self.backend),
+                'backend': type(self.backend).__name__
+            }
+
+
+def create_chart_cache(backend='memory', maxsize=DEFAULT_CACHE_SIZE, ttl=DEFAULT_CACHE_TTL, path=None):
+    """
+    Tworzy pamięć podręczną kosmogramów na podstawie konfiguracji.
+
+    Args:
+        backend (str, optional): 'memory', 'sqlite' lub 'none'
+        maxsize (int, optional): Maksymalna liczba wpisów
+        ttl (float, optional): Czas życia wpisu w sekundach
+        path (str, optional): Ścieżka pliku bazy dla magazynu 'sqlite'
+
+    Returns:
+        ChartCache: Pamięć podręczna lub None, jeśli wyłączona
+    """
+    if backend in (None, '', 'none'):
+        return None
+    if backend == 'memory':
+        return ChartCache(MemoryCacheBackend(maxsize), ttl)
+    if backend == 'sqlite':
+        if not path:
+            raise ValueError("Magazyn 'sqlite' wymaga ścieżki do pliku bazy")
+        return ChartCache(SQLiteCacheBackend(path, maxsize), ttl)
+
+    raise ValueError(f"Nieznany magazyn pamięci podręcznej: {backend}")
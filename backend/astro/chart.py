@@ -0,0 +1,335 @@
+"""
+Zwarta, tablicowa reprezentacja kosmogramu.
+
+Kosmogram w formacie słownikowym powtarza klucze 'longitude', 'sign',
+'sign_name' i 'degrees_in_sign' dla każdego ciała, domu i vargi. Chart
+przechowuje te same dane w kilku tablicach NumPy (pozycje float64, cuspidy
+domów float64, znaki we wszystkich vargach int8), a wartości pochodne są
+wyliczane przy odczycie. Dostęp do pojedynczych ciał zapewniają lekkie
+obiekty widoku z __slots__.
+
+VargaSet udostępnia vargi D1-D12 jednego kosmogramu, obliczając je
+dopiero przy pierwszym dostępie.
+"""
+
+from collections.abc import Mapping
+
+import numpy as np
+
+from .aspects import calculate_graha_drishti
+from .utils import ZODIAC_SIGNS
+from .varga import BODIES, ALL_VARGAS, calculate_varga_signs
+
+# Kolumny tablicy pozycji - takie same jak w słownikowych danych planet
+POSITION_FIELDS = ('longitude', 'latitude', 'distance')
+
+_BODY_INDEX = {name: index for index, name in enumerate(BODIES)}
+
+
+class PlanetView:
+    """Widok pojedynczego ciała w zwartym kosmogramie (bez kopiowania danych)."""
+
+    __slots__ = ('_chart', '_index')
+
+    def __init__(self, chart, index):
+        """
+        Args:
+            chart (Chart): Kosmogram
+            index (int): Indeks ciała w BODIES
+        """
+        self._chart = chart
+        self._index = index
+
+    @property
+    def name(self):
+        """Nazwa ciała."""
+        return BODIES[self._index]
+
+    @property
+    def longitude(self):
+        """Długość ekliptyczna."""
+        return float(self._chart.positions[self._index, 0])
+
+    @property
+    def latitude(self):
+        """Szerokość ekliptyczna."""
+        return float(self._chart.positions[self._index, 1])
+
+    @property
+    def distance(self):
+        """Odległość."""
+        return float(self._chart.positions[self._index, 2])
+
+    @property
+    def sign(self):
+        """Znak zodiaku w D1."""
+        return int(self.longitude / 30)
+
+    @property
+    def sign_name(self):
+        """Nazwa znaku zodiaku w D1."""
+        return ZODIAC_SIGNS[self.sign]
+
+    @property
+    def degrees_in_sign(self):
+        """Pozycja w stopniach w obrębie znaku."""
+        return self.longitude % 30
+
+    def varga_sign(self, varga_num):
+        """
+        Zwraca znak ciała w vardze.
+
+        Args:
+            varga_num (int): Numer vargi (1-12)
+
+        Returns:
+            int: Numer znaku (0-11)
+        """
+        return int(self._chart.varga_signs[self._index, varga_num - 1])
+
+    def to_dict(self):
+        """Konwertuje dane ciała na słownik w formacie calculate_chart."""
+        longitude, latitude, distance = self._chart.positions[self._index].tolist()
+        sign = int(longitude / 30)
+        return {
+            'longitude': longitude,
+            'latitude': latitude,
+            'distance': distance,
+            'sign': sign,
+            'sign_name': ZODIAC_SIGNS[sign],
+            'degrees_in_sign': longitude % 30
+        }
+
+    def __repr__(self):
+        return f'<PlanetView {self.name} {self.longitude:.4f}>'
+
+
+class Chart:
+    """Zwarty kosmogram D1 ze znakami wszystkich varg."""
+
+    __slots__ = (
+        'birth_date', 'latitude', 'longitude', 'julian_day', 'ayanamsa',
+        'positions', 'houses', '_varga_signs'
+    )
+
+    def __init__(self, birth_date, latitude, longitude, julian_day, ayanamsa, positions, houses,
+                 varga_signs=None):
+        """
+        Args:
+            birth_date (str): Data urodzenia w formacie ISO
+            latitude (float): Szerokość geograficzna miejsca urodzenia
+            longitude (float): Długość geograficzna miejsca urodzenia
+            julian_day (float): Dzień juliański (UT)
+            ayanamsa (float): Ayanamsa
+            positions (array_like): Tablica (len(BODIES), 3) z kolumnami POSITION_FIELDS
+            houses (array_like): Długości 12 cuspid domów
+            varga_signs (array_like, optional): Tablica int8 (len(BODIES), 12) znaków w D1-D12;
+                domyślnie obliczana z pozycji przy pierwszym użyciu
+        """
+        self.birth_date = birth_date
+        self.latitude = latitude
+        self.longitude = longitude
+        self.julian_day = julian_day
+        self.ayanamsa = ayanamsa
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(len(BODIES), len(POSITION_FIELDS))
+        self.houses = np.asarray(houses, dtype=np.float64).reshape(12)
+
+        if varga_signs is not None:
+            varga_signs = np.asarray(varga_signs, dtype=np.int8).reshape(len(BODIES), len(ALL_VARGAS))
+        self._varga_signs = varga_signs
+
+    @classmethod
+    def from_dict(cls, chart):
+        """
+        Tworzy zwarty kosmogram z wyniku calculate_chart (od razu ze znakami wszystkich varg).
+
+        Args:
+            chart (dict): Kosmogram D1 w formacie słownikowym
+
+        Returns:
+            Chart: Zwarty kosmogram
+        """
+        planets = chart['planets']
+        positions = np.array(
+            [[planets[body][field] for field in POSITION_FIELDS] for body in BODIES],
+            dtype=np.float64
+        )
+        houses = [chart['houses'][number]['longitude'] for number in range(1, 13)]
+
+        return cls(
+            chart['birth_date'], chart['latitude'], chart['longitude'],
+            chart['julian_day'], chart['ayanamsa'], positions, houses,
+            calculate_varga_signs(positions[:, 0], ALL_VARGAS)
+        )
+
+    def planet(self, name):
+        """
+        Zwraca widok ciała.
+
+        Args:
+            name (str): Nazwa ciała (np. 'Sun', 'Ascendant')
+
+        Returns:
+            PlanetView: Widok ciała
+        """
+        return PlanetView(self, _BODY_INDEX[name])
+
+    __getitem__ = planet
+
+    def __iter__(self):
+        return (PlanetView(self, index) for index in range(len(BODIES)))
+
+    def __len__(self):
+        return len(BODIES)
+
+    @property
+    def varga_signs(self):
+        """Tablica int8 (len(BODIES), 12) znaków ciał w D1-D12."""
+        if self._varga_signs is None:
+            self._varga_signs = calculate_varga_signs(self.positions[:, 0], ALL_VARGAS)
+        return self._varga_signs
+
+    @property
+    def ascendant(self):
+        """Widok ascendentu."""
+        return self.planet('Ascendant')
+
+    @property
+    def longitudes(self):
+        """Długości ekliptyczne wszystkich ciał (widok tablicy pozycji)."""
+        return self.positions[:, 0]
+
+    def signs(self, varga_num=1):
+        """
+        Zwraca znaki wszystkich ciał w vardze.
+
+        Args:
+            varga_num (int, optional): Numer vargi (1-12)
+
+        Returns:
+            numpy.ndarray: Znaki w kolejności BODIES
+        """
+        return self.varga_signs[:, varga_num - 1]
+
+    def nbytes(self):
+        """Zwraca rozmiar danych tablicowych kosmogramu w bajtach."""
+        return self.positions.nbytes + self.houses.nbytes + self.varga_signs.nbytes
+
+    def to_dict(self):
+        """
+        Konwertuje kosmogram na format słownikowy zwracany przez calculate_chart.
+
+        Returns:
+            dict: Dane kosmogramu (z aspektami)
+        """
+        planets = {view.name: view.to_dict() for view in self}
+
+        houses = {}
+        for number, cusp in enumerate(self.houses.tolist(), start=1):
+            sign = int(cusp / 30)
+            houses[number] = {
+                'longitude': cusp,
+                'sign': sign,
+                'sign_name': ZODIAC_SIGNS[sign],
+                'degrees_in_sign': cusp % 30
+            }
+
+        ascendant = planets['Ascendant']
+
+        return {
+            'birth_date': self.birth_date,
+            'latitude': self.latitude,
+            'longitude': self.longitude,
+            'julian_day': self.julian_day,
+            'ayanamsa': self.ayanamsa,
+            'ascendant': {
+                'longitude': ascendant['longitude'],
+                'sign': ascendant['sign'],
+                'sign_name': ascendant['sign_name'],
+                'degrees_in_sign': ascendant['degrees_in_sign']
+            },
+            'planets': planets,
+            'houses': houses,
+            'aspects': calculate_graha_drishti(planets)
+        }
+
+    def __repr__(self):
+        return f'<Chart {self.birth_date} ({self.latitude}, {self.longitude})>'
+
+
+# Typy varg w kolejności D1-D12
+VARGA_TYPES = tuple(f'D{varga_num}' for varga_num in ALL_VARGAS)
+
+# Pola słownikowego kosmogramu vargi, które można wybrać w VargaSet.select
+CHART_FIELDS = (
+    'varga_type', 'varga_name', 'birth_date', 'latitude', 'longitude', 'julian_day',
+    'ayanamsa', 'ascendant', 'planets', 'houses', 'aspects'
+)
+
+
+class VargaSet(Mapping):
+    """
+    Zbiór varg D1-D12 obliczanych na żądanie.
+
+    Przechowuje jedynie kosmogram D1; każda inna varga (razem z aspektami)
+    jest obliczana przy pierwszym dostępie i zapamiętywana. Zachowuje się
+    jak słownik zwracany przez calculate_all_vargas.
+    """
+
+    def __init__(self, main_chart, calculator):
+        """
+        Args:
+            main_chart (dict): Kosmogram D1 zwrócony przez calculate_chart
+            calculator (VedicAstroCalculator): Kalkulator używany do obliczania varg
+        """
+        self.main_chart = main_chart
+        self.calculator = calculator
+        self._vargas = {'D1': main_chart}
+
+    def __getitem__(self, varga_type):
+        varga = self._vargas.get(varga_type)
+        if varga is None:
+            if varga_type not in VARGA_TYPES:
+                raise KeyError(varga_type)
+            varga = self.calculator.calculate_varga(self.main_chart, int(varga_type[1:]))
+            self._vargas[varga_type] = varga
+        return varga
+
+    def __iter__(self):
+        return iter(VARGA_TYPES)
+
+    def __len__(self):
+        return len(VARGA_TYPES)
+
+    def __contains__(self, varga_type):
+        return varga_type in VARGA_TYPES
+
+    @property
+    def computed(self):
+        """Typy varg, które zostały już obliczone."""
+        return [varga_type for varga_type in VARGA_TYPES if varga_type in self._vargas]
+
+    def select(self, varga_types, fields=None):
+        """
+        Zwraca tylko wybrane vargi (obliczając brakujące).
+
+        Args:
+            varga_types (iterable): Typy varg (np. ['D1', 'D9'])
+            fields (iterable, optional): Pola kosmogramów z CHART_FIELDS (np. ['planets']);
+                domyślnie wszystkie. Pola, których varga nie ma, są pomijane.
+
+        Returns:
+            dict: Słownik varg w kolejności żądania
+        """
+        if fields is None:
+            return {varga_type: self[varga_type] for varga_type in varga_types}
+
+        selected = {}
+        for varga_type in varga_types:
+            varga = self[varga_type]
+            selected[varga_type] = {field: varga[field] for field in fields if field in varga}
+        return selected
+
+    def to_dict(self):
+        """Zwraca wszystkie vargi D1-D12 jako słownik."""
+        return self.select(VARGA_TYPES)
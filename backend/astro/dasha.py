@@ -0,0 +1,296 @@
+"""
+Leniwe drzewo okresów Vimshottari Dasha.
+
+Okresy (mahadasha, antardasha, pratyantardasha, sookshma) są liczone
+w dniach juliańskich i tworzone dopiero przy pierwszym dostępie, więc
+wyszukanie okresu dla daty wymaga jedynie wyszukiwania binarnego na
+każdym poziomie zamiast budowania wszystkich 9^4 węzłów kosmogramu.
+"""
+
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+
+# Okresy planet w latach i ich kolejność w systemie Vimshottari
+DASHA_PERIODS = {
+    'Ketu': 7,
+    'Venus': 20,
+    'Sun': 6,
+    'Moon': 10,
+    'Mars': 7,
+    'Rahu': 18,
+    'Jupiter': 16,
+    'Saturn': 19,
+    'Mercury': 17
+}
+
+DASHA_ORDER = ['Ketu', 'Venus', 'Sun', 'Moon', 'Mars', 'Rahu', 'Jupiter', 'Saturn', 'Mercury']
+
+DASHA_LEVELS = ['Mahadasha', 'Antardasha', 'Pratyantardasha', 'Sookshma']
+
+# Suma wszystkich okresów (120 lat)
+TOTAL_DASHA_YEARS = sum(DASHA_PERIODS.values())
+
+# Rok juliański w dniach
+DAYS_PER_YEAR = 365.25
+
+# Dla każdej planety początkowej: kolejność podokresów i skumulowane ułamki cyklu
+_SEQUENCES = {}
+for _start in range(9):
+    _planets = [DASHA_ORDER[(_start + i) % 9] for i in range(9)]
+    _bounds = [0] + list(accumulate(DASHA_PERIODS[p] for p in _planets))
+    _SEQUENCES[DASHA_ORDER[_start]] = (_planets, [b / TOTAL_DASHA_YEARS for b in _bounds])
+
+_JD_UNIX_EPOCH = 2440587.5
+_UNIX_EPOCH = datetime(1970, 1, 1)
+
+
+def datetime_to_jd(dt):
+    """
+    Konwertuje datę na dzień juliański (daty bez strefy traktowane są jak UTC).
+
+    Args:
+        dt (datetime): Data
+
+    Returns:
+        float: Dzień juliański
+    """
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return _JD_UNIX_EPOCH + (dt - _UNIX_EPOCH) / timedelta(days=1)
+
+
+def jd_to_datetime(jd, tzinfo=None):
+    """
+    Konwertuje dzień juliański na datę.
+
+    Wynik jest zaokrąglany do milisekund - dokładność dnia juliańskiego
+    zapisanego jako float64 to kilkanaście mikrosekund.
+
+    Args:
+        jd (float): Dzień juliański
+        tzinfo (tzinfo, optional): Strefa czasowa wyniku; None - data bez strefy (UTC)
+
+    Returns:
+        datetime: Data
+    """
+    milliseconds = round((jd - _JD_UNIX_EPOCH) * 86400000)
+    dt = _UNIX_EPOCH + timedelta(milliseconds=milliseconds)
+    if tzinfo is not None:
+        dt = dt.replace(tzinfo=timezone.utc).astimezone(tzinfo)
+    return dt
+
+
+class DashaPeriod:
+    """Węzeł drzewa okresów Dasha; podokresy są tworzone przy pierwszym dostępie."""
+
+    __slots__ = ('planet', 'depth', 'start_jd', 'end_jd', 'parent', '_children')
+
+    def __init__(self, planet, depth, start_jd, end_jd, parent=None):
+        """
+        Args:
+            planet (str): Władca okresu
+            depth (int): Poziom (1 - mahadasha ... 4 - sookshma)
+            start_jd (float): Początek okresu (dzień juliański)
+            end_jd (float): Koniec okresu (dzień juliański)
+            parent (DashaPeriod, optional): Okres nadrzędny
+        """
+        self.planet = planet
+        self.depth = depth
+        self.start_jd = start_jd
+        self.end_jd = end_jd
+        self.parent = parent
+        self._children = None
+
+    @property
+    def level(self):
+        """Nazwa poziomu okresu."""
+        return DASHA_LEVELS[self.depth - 1]
+
+    @property
+    def years(self):
+        """Długość okresu w latach."""
+        return (self.end_jd - self.start_jd) / DAYS_PER_YEAR
+
+    def _child(self, index):
+        """Tworzy podokres o danym indeksie bez budowania pozostałych."""
+        planets, bounds = _SEQUENCES[self.planet]
+        duration = self.end_jd - self.start_jd
+        # Ostatni podokres kończy się dokładnie z okresem (bez błędu zaokrągleń)
+        end_jd = self.end_jd if index == 8 else self.start_jd + duration * bounds[index + 1]
+        return DashaPeriod(planets[index], self.depth + 1, self.start_jd + duration * bounds[index], end_jd, self)
+
+    def children(self):
+        """
+        Zwraca podokresy (tworzone i zapamiętywane przy pierwszym wywołaniu).
+
+        Returns:
+            list: 9 obiektów DashaPeriod
+        """
+        if self.depth >= len(DASHA_LEVELS):
+            return []
+        if self._children is None:
+            self._children = [self._child(index) for index in range(9)]
+        return self._children
+
+    def child_at(self, jd):
+        """
+        Zwraca podokres obejmujący dany moment (wyszukiwanie binarne).
+
+        Args:
+            jd (float): Dzień juliański
+
+        Returns:
+            DashaPeriod: Podokres lub None, jeśli moment jest poza okresem
+        """
+        if self.depth >= len(DASHA_LEVELS) or not self.start_jd <= jd < self.end_jd:
+            return None
+
+        bounds = _SEQUENCES[self.planet][1]
+        fraction = (jd - self.start_jd) / (self.end_jd - self.start_jd)
+        index = min(max(bisect_right(bounds, fraction) - 1, 0), 8)
+
+        get_child = self._children.__getitem__ if self._children is not None else self._child
+        child = get_child(index)
+
+        # Na granicy podokresów ułamek może wskazać sąsiedni podokres - porównaj z jego granicami
+        while jd < child.start_jd and index > 0:
+            index -= 1
+            child = get_child(index)
+        while jd >= child.end_jd and index < 8:
+            index += 1
+            child = get_child(index)
+        return child
+
+    def to_dict(self, tzinfo=None):
+        """Konwertuje okres na słownik."""
+        return {
+            'planet': self.planet,
+            'level': self.level,
+            'start_date': jd_to_datetime(self.start_jd, tzinfo),
+            'end_date': jd_to_datetime(self.end_jd, tzinfo),
+            'years': self.years
+        }
+
+    def __repr__(self):
+        return f'<DashaPeriod {self.level} {self.planet}>'
+
+
+class VimshottariDasha:
+    """Leniwe drzewo okresów Vimshottari od momentu urodzenia."""
+
+    def __init__(self, birth_jd, birth_planet, years_elapsed):
+        """
+        Args:
+            birth_jd (float): Moment urodzenia (dzień juliański)
+            birth_planet (str): Władca mahadashy w momencie urodzenia
+            years_elapsed (float): Część mahadashy urodzeniowej, która upłynęła przed urodzeniem
+        """
+        self.birth_jd = birth_jd
+        self.birth_planet = birth_planet
+
+        # Nominalny początek mahadashy urodzeniowej (przed urodzeniem)
+        self.start_jd = birth_jd - years_elapsed * DAYS_PER_YEAR
+        self.cycle_days = TOTAL_DASHA_YEARS * DAYS_PER_YEAR
+
+    def mahadasha(self, index):
+        """
+        Zwraca mahadashę o danym numerze kolejnym (0 - mahadasha urodzeniowa).
+
+        Args:
+            index (int): Numer kolejny mahadashy
+
+        Returns:
+            DashaPeriod: Okres mahadashy
+        """
+        cycle, position = divmod(index, 9)
+        planets, bounds = _SEQUENCES[self.birth_planet]
+        cycle_start = self.start_jd + cycle * self.cycle_days
+
+        # Ostatnia mahadasha cyklu kończy się dokładnie z początkiem następnego cyklu
+        if position == 8:
+            end_jd = self.start_jd + (cycle + 1) * self.cycle_days
+        else:
+            end_jd = cycle_start + self.cycle_days * bounds[position + 1]
+
+        return DashaPeriod(planets[position], 1, cycle_start + self.cycle_days * bounds[position], end_jd)
+
+    def _mahadasha_index_at(self, jd):
+        """Zwraca numer kolejny mahadashy obejmującej moment."""
+        cycle, offset = divmod(jd - self.start_jd, self.cycle_days)
+        bounds = _SEQUENCES[self.birth_planet][1]
+        index = int(cycle) * 9 + min(max(bisect_right(bounds, offset / self.cycle_days) - 1, 0), 8)
+
+        # Na granicy okresów ułamek może wskazać sąsiednią mahadashę - porównaj z jej granicami
+        period = self.mahadasha(index)
+        while jd < period.start_jd:
+            index -= 1
+            period = self.mahadasha(index)
+        while jd >= period.end_jd:
+            index += 1
+            period = self.mahadasha(index)
+        return index
+
+    def period_at(self, date, depth=2):
+        """
+        Zwraca okresy obowiązujące w danym momencie.
+
+        Args:
+            date (datetime or float): Data lub dzień juliański
+            depth (int, optional): Liczba poziomów (1-4)
+
+        Returns:
+            list: Okresy od mahadashy do żądanego poziomu lub pusta lista przed urodzeniem
+        """
+        if not 1 <= depth <= len(DASHA_LEVELS):
+            raise ValueError(f"Nieprawidłowy poziom Dasha: {depth}. Dopuszczalne wartości: 1-4.")
+
+        jd = date if isinstance(date, (int, float)) else datetime_to_jd(date)
+        if jd < self.birth_jd:
+            return []
+
+        path = [self.mahadasha(self._mahadasha_index_at(jd))]
+        while len(path) < depth:
+            path.append(path[-1].child_at(jd))
+        return path
+
+    def iter_periods(self, start_date, end_date, depth=1):
+        """
+        Generuje kolejne okresy danego poziomu nakładające się na przedział dat.
+
+        Args:
+            start_date (datetime or float): Początek przedziału
+            end_date (datetime or float): Koniec przedziału
+            depth (int, optional): Poziom okresów (1-4)
+
+        Yields:
+            DashaPeriod: Okresy w kolejności chronologicznej
+        """
+        if not 1 <= depth <= len(DASHA_LEVELS):
+            raise ValueError(f"Nieprawidłowy poziom Dasha: {depth}. Dopuszczalne wartości: 1-4.")
+
+        start_jd = start_date if isinstance(start_date, (int, float)) else datetime_to_jd(start_date)
+        end_jd = end_date if isinstance(end_date, (int, float)) else datetime_to_jd(end_date)
+        start_jd = max(start_jd, self.birth_jd)
+
+        index = self._mahadasha_index_at(start_jd)
+        while True:
+            mahadasha = self.mahadasha(index)
+            if mahadasha.start_jd >= end_jd:
+                return
+            yield from self._iter_descendants(mahadasha, depth, start_jd, end_jd)
+            index += 1
+
+    def _iter_descendants(self, period, depth, start_jd, end_jd):
+        """Generuje potomków okresu na danym poziomie w przedziale (bez zapamiętywania węzłów)."""
+        if period.depth == depth:
+            yield period
+            return
+
+        for index in range(9):
+            child = period._child(index)
+            if child.end_jd <= start_jd:
+                continue
+            if child.start_jd >= end_jd:
+                return
+            yield from self._iter_descendants(child, depth, start_jd, end_jd)
@@ -1,6 +1,15 @@
+from .aspects import calculate_aspects_many
+from .dasha import VimshottariDasha, DAYS_PER_YEAR, datetime_to_jd, jd_to_datetime
+
+
 class PlanetInfo:
     """Klasa przechowująca informacje o planecie."""
     
+    __slots__ = (
+        'name', 'longitude', 'latitude', 'distance', 'speed', 'retrograde',
+        'sign', 'degrees_in_sign', 'minutes'
+    )
+    
     def __init__(self, name, longitude, latitude=0, distance=0, speed=0, retrograde=False):
         """
         Inicjalizuje informacje o planecie.
@@ -43,6 +52,8 @@ class PlanetInfo:
 class HouseInfo:
     """Klasa przechowująca informacje o domu astrologicznym."""
     
+    __slots__ = ('house_number', 'cusp_longitude', 'sign', 'degrees_in_sign')
+    
     def __init__(self, house_number, cusp_longitude, sign=None):
         """
         Inicjalizuje informacje o domu.
@@ -139,58 +150,38 @@ class AspectsInfo:
         Returns:
             list: Lista aspektów
         """
-        aspects = []
-        planet_names = list(planets.keys())
-        
-        # Oblicz standardowe aspekty
-        for i in range(len(planet_names)):
-            for j in range(i + 1, len(planet_names)):
-                planet1 = planet_names[i]
-                planet2 = planet_names[j]
-                
-                longitude1 = planets[planet1]['longitude']
-                longitude2 = planets[planet2]['longitude']
-                
-                angle = self.calculate_angle(longitude1, longitude2)
-                
-                for aspect_type, aspect_data in self.standard_aspects.items():
-                    if self.is_aspect(angle, aspect_type):
-                        # Oblicz siłę aspektu (im bliżej dokładnego kąta, tym silniejszy)
-                        exact_angle = aspect_data['angle']
-                        orb = aspect_data['orb']
-                        diff = abs(angle - exact_angle)
-                        strength = 100 - (diff / orb * 100)
-                        
-                        aspects.append({
-                            'planet1': planet1,
-                            'planet2': planet2,
-                            'aspect_type': aspect_type,
-                            'angle': angle,
-                            'exact_angle': exact_angle,
-                            'orb': diff,
-                            'strength': strength
-                        })
-        
-        # Oblicz wedyjskie aspekty specjalne
-        for planet_name in planet_names:
-            if planet_name in self.vedic_special_aspects:
-                planet_sign = planets[planet_name]['sign']
-                
-                for house_offset in self.vedic_special_aspects[planet_name]:
-                    # Oblicz znak zodiaku, na który rzucany jest aspekt
-                    aspected_sign = (planet_sign + house_offset - 1) % 12
-                    
-                    # Sprawdź, które planety są w tym znaku
-                    for target_planet in planet_names:
-                        if target_planet != planet_name and planets[target_planet]['sign'] == aspected_sign:
-                            aspects.append({
-                                'planet1': planet_name,
-                                'planet2': target_planet,
-                                'aspect_type': f"Wedyjski aspekt z domu {house_offset}",
-                                'strength': 100  # W astrologii wedyjskiej aspekty są pełne
-                            })
-        
-        return aspects
+        return self.calculate_aspects_many([planets])[0]
+
+    def calculate_aspects_many(self, planets_list):
+        """
+        Oblicza aspekty dla wielu kosmogramów (np. wszystkich varg) w jednym wywołaniu.
+        
+        Args:
+            planets_list (list): Słowniki z informacjami o planetach
+            
+        Returns:
+            list: Listy aspektów dla każdego kosmogramu
+        """
+        return calculate_aspects_many(
+            planets_list,
+            aspect_houses=self.vedic_special_aspects,
+            label="Wedyjski aspekt z domu {}",
+            standard_aspects=self.standard_aspects
+        )
+
+    def calculate_varga_aspects(self, vargas):
+        """
+        Oblicza aspekty dla wszystkich varg kosmogramu.
+        
+        Args:
+            vargas (dict): Słownik varg (np. wynik calculate_all_vargas)
+            
+        Returns:
+            dict: Listy aspektów, gdzie kluczem jest typ vargi
+        """
+        varga_types = list(vargas.keys())
+        results = self.calculate_aspects_many([vargas[varga_type]['planets'] for varga_type in varga_types])
+        return dict(zip(varga_types, results))
 
 
 class VedicChartDasa:
@@ -238,6 +229,13 @@ class VedicChartDasa:
         # Oblicz główną planetę (mahadasha) w momencie urodzenia
         self.birth_mahadasha = self._calculate_birth_mahadasha()
         
+        # Leniwe drzewo okresów (mahadasha - sookshma) w dniach juliańskich
+        self.dasha_tree = VimshottariDasha(
+            datetime_to_jd(birth_date),
+            self.birth_mahadasha['planet'],
+            self.birth_mahadasha['years_elapsed']
+        )
+        
     def _calculate_nakshatra(self):
         """
         Oblicza nakshatra (gwiazdozbiór księżycowy) na podstawie pozycji Księżyca.
@@ -307,80 +305,52 @@ class VedicChartDasa:
             list: Lista okresów Dasha
         """
         dashas = []
+        end_jd = self.dasha_tree.birth_jd + years_ahead * DAYS_PER_YEAR
         
-        # Rozpocznij od mahadasha w momencie urodzenia
-        current_planet = self.birth_mahadasha['planet']
-        current_planet_index = self.dasha_order.index(current_planet)
-        
-        # Dodaj pozostałą część bieżącej mahadasha
-        start_date = self.birth_date
-        remaining_years = self.birth_mahadasha['years_remaining']
-        
-        if remaining_years > 0:
-            end_date = self._add_years_to_date(start_date, remaining_years)
-            
-            dashas.append({
-                'planet': current_planet,
-                'level': 'Mahadasha',
-                'start_date': start_date,
-                'end_date': end_date,
-                'years': remaining_years
-            })
-            
-            start_date = end_date
-        
-        # Oblicz kolejne mahadashas
-        years_calculated = remaining_years
-        current_planet_index = (current_planet_index + 1) % 9
-        
-        while years_calculated < years_ahead:
-            current_planet = self.dasha_order[current_planet_index]
-            period_years = self.dasha_periods[current_planet]
-            
-            # Jeśli dodanie całego okresu przekroczyłoby limit, ogranicz
-            if years_calculated + period_years > years_ahead:
-                period_years = years_ahead - years_calculated
+        for period in self.dasha_tree.iter_periods(self.dasha_tree.birth_jd, end_jd, depth=1):
+            # Pierwsza mahadasha liczona od urodzenia, ostatnia ograniczona do limitu lat
+            start_jd = max(period.start_jd, self.dasha_tree.birth_jd)
+            period_end_jd = min(period.end_jd, end_jd)
             
-            end_date = self._add_years_to_date(start_date, period_years)
+            if start_jd == self.dasha_tree.birth_jd:
+                start_date = self.birth_date
+            else:
+                start_date = jd_to_datetime(start_jd, self.birth_date.tzinfo)
             
             dashas.append({
-                'planet': current_planet,
-                'level': 'Mahadasha',
+                'planet': period.planet,
+                'level': period.level,
                 'start_date': start_date,
-                'end_date': end_date,
-                'years': period_years
+                'end_date': jd_to_datetime(period_end_jd, self.birth_date.tzinfo),
+                'years': (period_end_jd - start_jd) / DAYS_PER_YEAR
             })
-            
-            start_date = end_date
-            years_calculated += period_years
-            current_planet_index = (current_planet_index + 1) % 9
         
         return dashas
     
-    def _add_years_to_date(self, date, years):
+    def period_at(self, date, depth=2):
         """
-        Dodaje określoną liczbę lat do daty.
+        Zwraca okresy Dasha obowiązujące w danym momencie.
         
         Args:
-            date (datetime): Data początkowa
-            years (float): Liczba lat do dodania
+            date (datetime): Data
+            depth (int, optional): Liczba poziomów (1 - mahadasha ... 4 - sookshma)
             
         Returns:
-            datetime: Nowa data
+            list: Słowniki okresów od mahadashy do żądanego poziomu
         """
-        # Proste dodanie lat (ignoruje lata przestępne dla uproszczenia)
-        # W rzeczywistej implementacji należałoby użyć dokładniejszego algorytmu
-        import datetime
-        
-        # Rozdziel lata całkowite i część ułamkową
-        whole_years = int(years)
-        fractional_years = years - whole_years
-        
-        # Dodaj całkowite lata
-        new_date = date.replace(year=date.year + whole_years)
-        
-        # Dodaj część ułamkową jako dni
-        days_to_add = int(fractional_years * 365.25)
-        new_date = new_date + datetime.timedelta(days=days_to_add)
+        return [period.to_dict(self.birth_date.tzinfo) for period in self.dasha_tree.period_at(date, depth)]
+    
+    def iter_periods(self, start_date, end_date, depth=1):
+        """
+        Generuje okresy Dasha danego poziomu w przedziale dat.
         
-        return new_date
+        Args:
+            start_date (datetime): Początek przedziału
+            end_date (datetime): Koniec przedziału
+            depth (int, optional): Poziom okresów (1-4)
+            
+        Yields:
+            dict: Kolejne okresy Dasha
+        """
+        for period in self.dasha_tree.iter_periods(start_date, end_date, depth):
+            yield period.to_dict(self.birth_date.tzinfo)
@@ -0,0 +1,185 @@
+"""
+Zwięzły zapis kosmogramu dla modelu językowego.
+
+Zamiast opisowych wierszy dla każdej planety, domu i aspektu kosmogram jest
+zapisywany w postaci tabeli: jeden wiersz na ciało niebieskie z kolumnami
+dla wszystkich połączonych varg (combine_varga_charts), jeden wiersz domów
+i jeden wiersz aspektów. Zapis jest deterministyczny - ten sam kosmogram
+daje zawsze ten sam tekst (i ten sam klucz pamięci podręcznej odpowiedzi).
+
+Liczba tokenów jest liczona tokenizerem tiktoken, jeśli jest zainstalowany
+(w przeciwnym razie szacowana). Przy przekroczeniu limitu tokenów pomijane
+są najpierw najsłabsze aspekty, a następnie wiersz domów.
+"""
+
+import logging
+import math
+import re
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - zależność opcjonalna
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Kodowanie tokenizera modeli GPT-3.5/GPT-4
+TOKENIZER_ENCODING = 'cl100k_base'
+
+# Precyzja stopni w znaku (0.1° wystarcza do interpretacji)
+DEGREE_PRECISION = 1
+
+# Siła aspektu pełnego (nie jest zapisywana)
+FULL_STRENGTH = 100
+
+_WORD_PATTERN = re.compile(r"\w+|[^\w\s]")
+_HOUSE_NUMBER_PATTERN = re.compile(r"\d+")
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(name):
+    """Zwraca kodowanie tiktoken lub None, jeśli tokenizer jest niedostępny."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"Tokenizer {name} niedostępny, liczba tokenów będzie szacowana: {str(e)}")
+        return None
+
+
+def approximate_tokens(text):
+    """
+    Szacuje liczbę tokenów bez tokenizera.
+
+    Słowa są liczone jako ok. 4 znaki na token (3 dla słów z polskimi
+    znakami, które tokenizery BPE dzielą częściej), znaki interpunkcyjne
+    jako osobne tokeny.
+
+    Args:
+        text (str): Tekst
+
+    Returns:
+        int: Szacowana liczba tokenów
+    """
+    return sum(
+        math.ceil(len(word) / (4 if word.isascii() else 3))
+        for word in _WORD_PATTERN.findall(text)
+    )
+
+
+def count_tokens(text, encoding=TOKENIZER_ENCODING):
+    """
+    Liczy tokeny tekstu.
+
+    Args:
+        text (str): Tekst
+        encoding (str, optional): Nazwa kodowania tiktoken
+
+    Returns:
+        int: Liczba tokenów (szacowana, jeśli tiktoken nie jest dostępny)
+    """
+    tokenizer = _get_encoding(encoding)
+    if tokenizer is None:
+        return approximate_tokens(text)
+    return len(tokenizer.encode(text))
+
+
+def _position(data, with_degrees=True):
+    """Zapisuje pozycję: znak i stopnie w znaku."""
+    if not with_degrees:
+        return data['sign_name']
+    return f"{data['sign_name']} {data['degrees_in_sign']:.{DEGREE_PRECISION}f}"
+
+
+def _ranked_aspects(chart_data):
+    """Zwraca aspekty od najsilniejszego (przy równej sile - w kolejności kosmogramu)."""
+    aspects = chart_data.get('aspects') or []
+    return sorted(aspects, key=lambda aspect: -aspect.get('strength', 0))
+
+
+def _aspect_entries(aspects):
+    """
+    Zapisuje aspekty pogrupowane według planety i domu: "Jupiter 7: Sun,Saturn".
+
+    Siła jest podawana tylko dla aspektów niepełnych (np. "Mars 4: Moon~75").
+    """
+    groups = {}
+    for aspect in aspects:
+        match = _HOUSE_NUMBER_PATTERN.search(aspect['aspect_type'])
+        kind = match.group(0) if match else aspect['aspect_type']
+        target = aspect['planet2']
+        if aspect.get('strength', FULL_STRENGTH) < FULL_STRENGTH:
+            target += f"~{aspect['strength']:g}"
+        groups.setdefault((aspect['planet1'], kind), []).append(target)
+
+    return [f"{planet} {kind}: {','.join(targets)}" for (planet, kind), targets in groups.items()]
+
+
+def _render(chart_data, life_area, aspects, include_houses):
+    """Tworzy tekst zwięzłego zapisu kosmogramu."""
+    vargas = chart_data.get('combined_vargas') or [chart_data.get('varga_type', 'D1')]
+    extra_vargas = vargas[1:]
+
+    lines = [
+        f"KOSMOGRAM WEDYJSKI (ayanamsa {chart_data['ayanamsa']:.2f})",
+        f"Urodzenie: {chart_data['birth_date']}; szer. {chart_data['latitude']}, dł. {chart_data['longitude']}",
+        f"Pozycje (vargi {', '.join(extra_vargas)}: tylko znak)" if extra_vargas else "Pozycje",
+        "Ciało|" + "|".join(vargas)
+    ]
+
+    planets = chart_data['planets']
+    if 'Ascendant' not in planets and 'ascendant' in chart_data:
+        lines.append(f"Ascendant|{_position(chart_data['ascendant'])}")
+
+    for planet_name, planet_data in planets.items():
+        row = [planet_name, _position(planet_data)]
+        for varga_type in extra_vargas:
+            varga_data = planet_data.get(varga_type)
+            row.append(_position(varga_data, with_degrees=False) if varga_data else '-')
+        lines.append("|".join(row))
+
+    if include_houses and chart_data.get('houses'):
+        houses = chart_data['houses']
+        lines.append("Domy: " + "|".join(
+            f"{house_num} {_position(houses[house_num])}" for house_num in sorted(houses, key=int)
+        ))
+
+    if aspects:
+        lines.append("Aspekty (planeta dom: cele): " + "|".join(_aspect_entries(aspects)))
+
+    if life_area:
+        lines.append(f"OBSZAR ŻYCIA: {life_area['name']} - {life_area['description']}")
+
+    return "\n".join(lines)
+
+
+def encode_chart_compact(chart_data, life_area=None, token_budget=None):
+    """
+    Zapisuje kosmogram w zwięzłej postaci tabelarycznej.
+
+    Args:
+        chart_data (dict): Kosmogram (także połączony przez combine_varga_charts)
+        life_area (dict, optional): Informacje o obszarze życia
+        token_budget (int, optional): Maksymalna liczba tokenów zapisu; None - bez limitu
+
+    Returns:
+        str: Zapis kosmogramu
+    """
+    aspects = _ranked_aspects(chart_data)
+    text = _render(chart_data, life_area, aspects, include_houses=True)
+    if token_budget is None:
+        return text
+
+    # Pomijaj najsłabsze aspekty, aż zapis zmieści się w limicie
+    while aspects and count_tokens(text) > token_budget:
+        aspects = aspects[:-1]
+        text = _render(chart_data, life_area, aspects, include_houses=True)
+
+    if count_tokens(text) > token_budget:
+        text = _render(chart_data, life_area, aspects, include_houses=False)
+        if count_tokens(text) > token_budget:
+            logger.warning(f"Zapis kosmogramu przekracza limit {token_budget} tokenów")
+
+    return text
@@ -0,0 +1,341 @@
+"""
+Współdzielony w procesie mechanizm określania stref czasowych.
+
+Dane TimezoneFinder są ładowane tylko raz, a wyniki trafiają do
+ograniczonej pamięci podręcznej LRU, której kluczem są współrzędne
+skwantowane do siatki o zadanym rozmiarze oczka. Oczka, przez które
+przebiega granica stref czasowych, są rozpoznawane przy pierwszym
+wyszukiwaniu i dla nich zawsze wykonywane jest dokładne wyszukiwanie.
+
+Oczko jest uznawane za jednorodne tylko wtedy, gdy wszystkie wielokąty
+stref mogące je przecinać (z podziału kuli ziemskiej na heksagony H3
+używanego przez TimezoneFinder) należą do jednej strefy albo gdy żaden
+brzeg wielokąta innej strefy nie przecina prostokąta oczka. Wykrywane są
+więc także granice wchodzące i wychodzące tą samą krawędzią oczka oraz
+enklawy w jego wnętrzu.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+from h3.api import numpy_int as h3
+import numpy as np
+import pytz
+from timezonefinder import TimezoneFinder
+from timezonefinder.configs import COORD2INT_FACTOR, SHORTCUT_H3_RES
+
+# Domyślny rozmiar oczka siatki w stopniach (~5 km)
+DEFAULT_GRID = 0.05
+
+# Domyślna maksymalna liczba oczek w pamięci podręcznej
+DEFAULT_CACHE_SIZE = 100000
+
+# Maksymalna liczba wielokątów stref przechowywanych w pamięci (sprawdzanie granic oczek)
+POLYGON_CACHE_SIZE = 256
+
+# Odstęp (w stopniach) punktów, dla których wyznaczane są heksagony H3 pokrywające oczko -
+# mniejszy niż promień heksagonu rozdzielczości SHORTCUT_H3_RES (~40 km)
+_SHORTCUT_SAMPLE_STEP = 0.25
+
+# Znacznik oczka, przez które przebiega granica strefy czasowej
+_BORDER = object()
+
+
+def _ring_edges(coords):
+    """
+    Zamienia wierzchołki łamanej zamkniętej na jej odcinki.
+
+    Args:
+        coords (ndarray): Współrzędne wierzchołków, kształt (2, n) - długości i szerokości
+
+    Returns:
+        tuple: Tablice x0, y0, x1, y1 początków i końców odcinków
+    """
+    x0, y0 = coords[0].astype(np.int64), coords[1].astype(np.int64)
+    return x0, y0, np.roll(x0, -1), np.roll(y0, -1)
+
+
+def _segments_cross_box(edges, xmin, xmax, ymin, ymax):
+    """
+    Sprawdza, czy któryś odcinek przecina prostokąt (algorytm Lianga-Barsky'ego).
+
+    Args:
+        edges (tuple): Tablice x0, y0, x1, y1 odcinków (wynik _ring_edges)
+        xmin, xmax, ymin, ymax (int): Granice prostokąta w tych samych jednostkach
+
+    Returns:
+        bool: True, jeśli co najmniej jeden odcinek ma punkt wspólny z prostokątem
+    """
+    x0, y0, x1, y1 = edges
+
+    # Dokładny test tylko dla odcinków, których prostokąt otaczający zachodzi na oczko
+    near = ((np.minimum(x0, x1) <= xmax) & (np.maximum(x0, x1) >= xmin)
+            & (np.minimum(y0, y1) <= ymax) & (np.maximum(y0, y1) >= ymin))
+    if not near.any():
+        return False
+
+    x0, y0 = x0[near].astype(np.float64), y0[near].astype(np.float64)
+    dx, dy = x1[near] - x0, y1[near] - y0
+
+    t0 = np.zeros_like(x0)
+    t1 = np.ones_like(x0)
+    rejected = np.zeros(x0.shape, dtype=bool)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for p, q in ((-dx, x0 - xmin), (dx, xmax - x0), (-dy, y0 - ymin), (dy, ymax - y0)):
+            rejected |= (p == 0) & (q < 0)
+            ratio = q / p
+            t0 = np.where(p < 0, np.maximum(t0, ratio), t0)
+            t1 = np.where(p > 0, np.minimum(t1, ratio), t1)
+
+    return bool(np.any(~rejected & (t0 <= t1)))
+
+
+class TimezoneResolver:
+    """Określa strefy czasowe dla współrzędnych z pamięcią podręczną na siatce."""
+
+    def __init__(self, grid=DEFAULT_GRID, cache_size=DEFAULT_CACHE_SIZE, in_memory=False):
+        """
+        Inicjalizuje resolver stref czasowych.
+
+        Args:
+            grid (float, optional): Rozmiar oczka siatki w stopniach
+            cache_size (int, optional): Maksymalna liczba oczek w pamięci podręcznej
+            in_memory (bool, optional): Czy wczytać dane TimezoneFinder całkowicie do pamięci
+        """
+        if grid <= 0:
+            raise ValueError(f"Nieprawidłowy rozmiar oczka siatki: {grid}")
+
+        self.grid = grid
+        self.cache_size = cache_size
+        self.in_memory = in_memory
+
+        self._finder = None
+        self._cells = OrderedDict()
+        self._zones = {}
+        self._polygons = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.border_lookups = 0
+        self.evictions = 0
+
+    def load(self):
+        """Wczytuje dane TimezoneFinder (jednorazowo, np. przy starcie aplikacji)."""
+        with self._lock:
+            if self._finder is None:
+                self._finder = TimezoneFinder(in_memory=self.in_memory)
+        return self._finder
+
+    def _timezone_name_at(self, latitude, longitude):
+        """Wykonuje dokładne wyszukiwanie nazwy strefy czasowej."""
+        finder = self._finder or self.load()
+        return finder.timezone_at(lng=longitude, lat=latitude)
+
+    def _get_zone(self, tz_name):
+        """Zwraca obiekt pytz dla nazwy strefy (z pamięci podręcznej)."""
+        if not tz_name:
+            # Jeśli nie można określić strefy czasowej, użyj UTC
+            return pytz.UTC
+
+        zone = self._zones.get(tz_name)
+        if zone is None:
+            zone = pytz.timezone(tz_name)
+            self._zones[tz_name] = zone
+        return zone
+
+    def _cell(self, latitude, longitude):
+        """Zwraca indeks oczka siatki dla współrzędnych."""
+        return (int(latitude // self.grid), int(longitude // self.grid))
+
+    def _candidate_polygons(self, lat0, lon0, lat1, lon1):
+        """
+        Zwraca wielokąty stref, które mogą przecinać prostokąt oczka.
+
+        Heksagony H3 punktów rozmieszczonych co _SHORTCUT_SAMPLE_STEP (z sąsiadami)
+        pokrywają całe oczko; TimezoneFinder przechowuje dla każdego heksagonu
+        wielokąty, które go przecinają.
+        """
+        finder = self._finder or self.load()
+        lat_steps = max(1, math.ceil((lat1 - lat0) / _SHORTCUT_SAMPLE_STEP))
+        lon_steps = max(1, math.ceil((lon1 - lon0) / _SHORTCUT_SAMPLE_STEP))
+
+        hexagons = set()
+        for i in range(lat_steps + 1):
+            for j in range(lon_steps + 1):
+                lat = lat0 + (lat1 - lat0) * i / lat_steps
+                lon = lon0 + (lon1 - lon0) * j / lon_steps
+                hexagons.update(h3.k_ring(h3.geo_to_h3(lat, lon, SHORTCUT_H3_RES), 1))
+
+        polygons = set()
+        for hexagon in hexagons:
+            polygons.update(int(poly_id) for poly_id in finder.shortcut_mapping.get(hexagon, ()))
+        return sorted(polygons)
+
+    def _polygon_edges(self, poly_id):
+        """
+        Zwraca prostokąt otaczający i odcinki brzegu wielokąta strefy (z ograniczonej pamięci podręcznej).
+
+        Returns:
+            tuple: (xmin, xmax, ymin, ymax) i odcinki w postaci zwracanej przez _ring_edges
+        """
+        with self._lock:
+            polygon = self._polygons.get(poly_id)
+            if polygon is not None:
+                self._polygons.move_to_end(poly_id)
+                return polygon
+
+        coords = self._finder.coords_of(polygon_nr=poly_id)
+        bbox = (int(coords[0].min()), int(coords[0].max()), int(coords[1].min()), int(coords[1].max()))
+        polygon = (bbox, _ring_edges(coords))
+        with self._lock:
+            self._polygons[poly_id] = polygon
+            if len(self._polygons) > POLYGON_CACHE_SIZE:
+                self._polygons.popitem(last=False)
+        return polygon
+
+    def _resolve_cell(self, cell):
+        """
+        Określa strefę czasową oczka.
+
+        Oczko należy do jednej strefy, jeśli wszystkie wielokąty mogące je przecinać
+        należą do tej samej strefy lub żaden brzeg wielokąta nie przecina prostokąta oczka.
+        Brzegi otworów wielokątów są brzegami wielokątów stref je wypełniających.
+
+        Returns:
+            str or object: Nazwa strefy lub znacznik _BORDER, jeśli przez oczko przebiega granica stref
+        """
+        lat0 = cell[0] * self.grid
+        lon0 = cell[1] * self.grid
+        lat1 = min(lat0 + self.grid, 90.0)
+        lon1 = min(lon0 + self.grid, 180.0)
+
+        polygons = self._candidate_polygons(lat0, lon0, lat1, lon1)
+        if len(set(self._finder.zone_ids_of(polygons))) > 1:
+            xmin, xmax = int(lon0 * COORD2INT_FACTOR), int(lon1 * COORD2INT_FACTOR)
+            ymin, ymax = int(lat0 * COORD2INT_FACTOR), int(lat1 * COORD2INT_FACTOR)
+            for poly_id in polygons:
+                (pxmin, pxmax, pymin, pymax), edges = self._polygon_edges(poly_id)
+                if pxmin > xmax or pxmax < xmin or pymin > ymax or pymax < ymin:
+                    continue
+                if _segments_cross_box(edges, xmin, xmax, ymin, ymax):
+                    return _BORDER
+
+        return self._timezone_name_at((lat0 + lat1) / 2, (lon0 + lon1) / 2)
+
+    def resolve(self, latitude, longitude):
+        """
+        Określa strefę czasową dla współrzędnych geograficznych.
+
+        Args:
+            latitude (float): Szerokość geograficzna
+            longitude (float): Długość geograficzna
+
+        Returns:
+            tzinfo: Obiekt strefy czasowej pytz
+        """
+        cell = self._cell(latitude, longitude)
+
+        with self._lock:
+            cached = self._cells.get(cell)
+            if cached is not None:
+                self._cells.move_to_end(cell)
+                self.hits += 1
+
+        if cached is None:
+            cached = self._resolve_cell(cell)
+
+            with self._lock:
+                self.misses += 1
+                self._cells[cell] = cached
+                self._cells.move_to_end(cell)
+                if len(self._cells) > self.cache_size:
+                    self._cells.popitem(last=False)
+                    self.evictions += 1
+
+        if cached is _BORDER:
+            # Oczko na granicy stref - dokładne wyszukiwanie
+            with self._lock:
+                self.border_lookups += 1
+            return self._get_zone(self._timezone_name_at(latitude, longitude))
+
+        return self._get_zone(cached)
+
+    def resolve_many(self, coords):
+        """
+        Określa strefy czasowe dla wielu współrzędnych (np. import danych).
+
+        Każde oczko siatki jest rozstrzygane tylko raz.
+
+        Args:
+            coords (iterable): Pary (latitude, longitude)
+
+        Returns:
+            list: Obiekty stref czasowych w kolejności wejściowej
+        """
+        return [self.resolve(latitude, longitude) for latitude, longitude in coords]
+
+    def stats(self):
+        """
+        Zwraca statystyki pamięci podręcznej.
+
+        Returns:
+            dict: Liczniki trafień, chybień, wyszukiwań granicznych i usunięć
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'border_lookups': self.border_lookups,
+                'evictions': self.evictions,
+                'cached_cells': len(self._cells),
+                'grid': self.grid
+            }
+
+
+# Resolver współdzielony w obrębie procesu
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def configure_timezone_resolver(grid=DEFAULT_GRID, cache_size=DEFAULT_CACHE_SIZE,
+                                in_memory=False, preload=True):
+    """
+    Tworzy współdzielony resolver stref czasowych (wywoływane przy starcie aplikacji).
+
+    Args:
+        grid (float, optional): Rozmiar oczka siatki w stopniach
+        cache_size (int, optional): Maksymalna liczba oczek w pamięci podręcznej
+        in_memory (bool, optional): Czy wczytać dane TimezoneFinder do pamięci
+        preload (bool, optional): Czy od razu wczytać dane TimezoneFinder
+
+    Returns:
+        TimezoneResolver: Skonfigurowany resolver
+    """
+    global _resolver
+
+    resolver = TimezoneResolver(grid=grid, cache_size=cache_size, in_memory=in_memory)
+    if preload:
+        resolver.load()
+
+    with _resolver_lock:
+        _resolver = resolver
+    return resolver
+
+
+def get_timezone_resolver():
+    """
+    Zwraca współdzielony resolver stref czasowych, tworząc go przy pierwszym użyciu.
+
+    Returns:
+        TimezoneResolver: Resolver stref czasowych
+    """
+    global _resolver
+
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = TimezoneResolver()
+    return _resolver
@@ -1,7 +1,8 @@
 from datetime import datetime, timezone
 import pytz
-from timezonefinder import TimezoneFinder
 import math
+from .timezones import get_timezone_resolver
+from .prompt_encoder import encode_chart_compact
 
 # Stałe
 ZODIAC_SIGNS = [
@@ -56,14 +57,7 @@ def get_local_timezone(latitude, longitude):
     Returns:
         tzinfo: Obiekt strefy czasowej
     """
-    tf = TimezoneFinder()
-    tz_name = tf.timezone_at(lng=longitude, lat=latitude)
-    
-    if tz_name:
-        return pytz.timezone(tz_name)
-    else:
-        # Jeśli nie można określić strefy czasowej, użyj UTC
-        return pytz.UTC
+    return get_timezone_resolver().resolve(latitude, longitude)
 
 
 def normalize_degrees(degrees):
@@ -200,17 +194,23 @@ def get_nakshatra(longitude):
     }
 
 
-def format_chart_for_ai(chart_data, life_area=None):
+def format_chart_for_ai(chart_data, life_area=None, compact=False, token_budget=None):
     """
     Formatuje dane kosmogramu do analizy przez AI.
     
     Args:
         chart_data (dict): Dane kosmogramu
         life_area (dict, optional): Informacje o obszarze życia
+        compact (bool, optional): Czy użyć zwięzłego zapisu tabelarycznego
+            ze wszystkimi połączonymi vargami (encode_chart_compact)
+        token_budget (int, optional): Limit tokenów zwięzłego zapisu
         
     Returns:
         str: Sformatowane dane kosmogramu
     """
+    if compact:
+        return encode_chart_compact(chart_data, life_area, token_budget)
+    
     output = []
     
     # Dodaj informacje podstawowe
@@ -522,7 +522,12 @@ def combine_varga_charts(charts_dict, varga_types):
     if first_varga not in charts_dict:
         return None
         
+    # Kopia słowników planet - dane innych varg są dopisywane do nich, a kosmogramy
+    # wejściowe mogą być współdzielone (np. przez analizy kilku obszarów życia)
     combined_chart = charts_dict[first_varga].copy()
+    combined_chart['planets'] = {
+        planet_name: dict(planet_data) for planet_name, planet_data in combined_chart['planets'].items()
+    }
     
     # Dodaj informacje o łączonych vargach
     combined_chart['combined_vargas'] = varga_types
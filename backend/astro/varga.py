@@ -0,0 +1,160 @@
+"""
+Tablicowy, zwektoryzowany silnik varg (kosmogramów harmonicznych D1-D12).
+
+Każda reguła podziału znaku jest zapisana jako tablica przeglądowa
+(znak, część) -> znak w vardze, dzięki czemu całą tablicę długości D1
+(wszystkie planety x wszystkie kosmogramy) można przeliczyć na wszystkie
+vargi w jednym przebiegu NumPy.
+"""
+
+import numpy as np
+
+# Kolejność ciał w zwartej reprezentacji tablicowej
+BODIES = [
+    'Sun', 'Moon', 'Mercury', 'Venus', 'Mars',
+    'Jupiter', 'Saturn', 'Rahu', 'Ketu', 'Ascendant'
+]
+
+ALL_VARGAS = tuple(range(1, 13))
+
+# Rozmiar części znaku (w stopniach) dla każdej vargi - wartości identyczne
+# z dotychczasowym algorytmem, łącznie z przybliżeniem 3.333333 dla D9
+VARGA_DIVISORS = {
+    1: 30,
+    2: 15,
+    3: 10,
+    4: 7.5,
+    5: 6,
+    6: 5,
+    7: 30 / 7,
+    8: 3.75,
+    9: 3.333333,
+    10: 3,
+    11: 30 / 11,
+    12: 2.5
+}
+
+# Reguły podziału: (znak, część) -> znak w vardze (przed modulo 12)
+VARGA_RULES = {
+    # D1 (Rasi) - bez zmian
+    1: lambda rasi, part: rasi,
+    # D2 (Hora) - dla znaków parzystych najpierw Hora Księżyca, dla nieparzystych Słońca
+    2: lambda rasi, part: (4 if part == 0 else 0) if rasi % 2 == 0 else (0 if part == 0 else 4),
+    # D3 (Drekkana) - znak, znak + 4, znak + 8
+    3: lambda rasi, part: rasi + 4 * part,
+    # D4 (Chaturthamsa)
+    4: lambda rasi, part: rasi * 4 + part,
+    # D5 (Panchamsa) - znaki ruchome, stałe i zmienne
+    5: lambda rasi, part: rasi + 4 * (rasi % 3) + part,
+    # D6 (Shashthamsa)
+    6: lambda rasi, part: rasi * 6 + part,
+    # D7 (Saptamsa) - znaki parzyste zaczynają od znaku przeciwnego
+    7: lambda rasi, part: rasi + 6 + part if rasi % 2 == 0 else rasi + part,
+    # D8 (Ashtamsa)
+    8: lambda rasi, part: rasi * 8 + part,
+    # D9 (Navamsa) - ogień od Barana, ziemia od Lwa, powietrze od Strzelca, woda od Barana
+    9: lambda rasi, part: {0: 0, 1: 4, 2: 8, 3: 0}[rasi % 4] + part,
+    # D10 (Dasamsa)
+    10: lambda rasi, part: rasi * 10 + part if rasi % 2 == 0 else rasi * 10 + 9 + part,
+    # D11 (Ekadasamsa)
+    11: lambda rasi, part: rasi * 11 + part,
+    # D12 (Dvadasamsa)
+    12: lambda rasi, part: rasi * 12 + part
+}
+
+# Liczba kolumn części w tablicach - z zapasem na przybliżony dzielnik D9,
+# dla którego końcówka znaku daje część o numerze 9
+MAX_PARTS = 13
+
+
+def _build_varga_tables():
+    """
+    Buduje tablice przeglądowe dla wszystkich varg.
+
+    Returns:
+        numpy.ndarray: Tablica int8 o kształcie (13, 12, MAX_PARTS) indeksowana
+        numerem vargi, znakiem D1 i numerem części
+    """
+    tables = np.zeros((13, 12, MAX_PARTS), dtype=np.int8)
+
+    for varga_num, rule in VARGA_RULES.items():
+        for rasi in range(12):
+            for part in range(MAX_PARTS):
+                tables[varga_num, rasi, part] = rule(rasi, part) % 12
+
+    tables.setflags(write=False)
+    return tables
+
+
+VARGA_TABLES = _build_varga_tables()
+
+
+def _validate_vargas(vargas):
+    """Sprawdza, czy wszystkie numery varg są obsługiwane."""
+    for varga_num in vargas:
+        if varga_num not in VARGA_RULES:
+            raise ValueError(f"Nieprawidłowy numer vargi: {varga_num}. Dopuszczalne wartości: 1-12.")
+
+
+def get_varga_sign(longitude, varga_num):
+    """
+    Zwraca znak w vardze dla pojedynczej długości D1.
+
+    Args:
+        longitude (float): Długość w D1 (Rasi)
+        varga_num (int): Numer vargi (1-12)
+
+    Returns:
+        int: Numer znaku w vardze (0-11)
+    """
+    _validate_vargas([varga_num])
+
+    rasi = int(longitude / 30)
+    part = int((longitude % 30) / VARGA_DIVISORS[varga_num])
+    return int(VARGA_TABLES[varga_num, rasi % 12, part])
+
+
+def calculate_varga_signs(longitudes, vargas=ALL_VARGAS):
+    """
+    Przelicza tablicę długości D1 na znaki we wszystkich żądanych vargach.
+
+    Args:
+        longitudes (array_like): Długości D1 o dowolnym kształcie,
+            np. (n_charts, n_bodies)
+        vargas (iterable, optional): Numery varg do obliczenia
+
+    Returns:
+        numpy.ndarray: Tablica int8 o kształcie longitudes.shape + (len(vargas),)
+    """
+    vargas = tuple(vargas)
+    _validate_vargas(vargas)
+
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+
+    # Obcięcie (a nie floor) odpowiada int() z algorytmu skalarnego
+    rasi = np.trunc(longitudes / 30).astype(np.intp) % 12
+    degrees = np.mod(longitudes, 30)
+
+    signs = np.empty(longitudes.shape + (len(vargas),), dtype=np.int8)
+    for index, varga_num in enumerate(vargas):
+        part = np.trunc(degrees / VARGA_DIVISORS[varga_num]).astype(np.intp)
+        signs[..., index] = VARGA_TABLES[varga_num, rasi, part]
+
+    return signs
+
+
+def chart_longitudes(charts, bodies=BODIES):
+    """
+    Buduje tablicę długości D1 z listy kosmogramów w formacie słownikowym.
+
+    Args:
+        charts (list): Kosmogramy D1 zwrócone przez calculate_chart
+        bodies (list, optional): Kolejność ciał w tablicy
+
+    Returns:
+        numpy.ndarray: Tablica float64 o kształcie (n_charts, n_bodies)
+    """
+    return np.array(
+        [[chart['planets'][body]['longitude'] for body in bodies] for chart in charts],
+        dtype=np.float64
+    ).reshape(len(charts), len(bodies))
@@ -0,0 +1,245 @@
+"""
+Polecenia wiersza poleceń aplikacji (flask --app app <polecenie>).
+"""
+
+import json
+import signal
+import time
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from flask.json.provider import DefaultJSONProvider
+
+from database.export import iter_charts_ndjson, parse_includes
+from database.utils import migrate_varga_chart_data
+from api.importer import import_births, detect_format, IMPORT_FORMATS
+from api.routes import calculator, openai_client
+from api.jobs import AnalysisWorkerPool
+from api.analysis import load_varga_set, combine_for_area
+from astro.chart import VargaSet
+from astro.utils import format_chart_for_ai
+from astro.prompt_encoder import count_tokens, tiktoken, TOKENIZER_ENCODING
+from database.models import LifeArea
+from api.compression import brotli
+from serialization import dumps, HAS_ORJSON
+
+
+@click.command('export-charts')
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-',
+              help="Plik wyjściowy NDJSON (domyślnie standardowe wyjście)")
+@click.option('--created-from', type=click.DateTime(), default=None,
+              help="Tylko kosmogramy utworzone od tej chwili")
+@click.option('--created-to', type=click.DateTime(), default=None,
+              help="Tylko kosmogramy utworzone przed tą chwilą")
+@click.option('--user-id', type=int, default=None, help="Tylko kosmogramy danego użytkownika")
+@click.option('--include', default='', help="Dodatkowe dane oddzielone przecinkami: vargas, analyses")
+@click.option('--cursor', default=None, help="Wznów eksport za kosmogramem o tym znaczniku")
+@with_appcontext
+def export_charts_command(output, created_from, created_to, user_id, include, cursor):
+    """Eksportuje kosmogramy do pliku NDJSON."""
+    try:
+        includes = parse_includes(include)
+    except ValueError as e:
+        raise click.BadParameter(str(e), param_hint='--include')
+
+    count = 0
+    last_line = None
+    for line in iter_charts_ndjson(created_from=created_from, created_to=created_to,
+                                   user_id=user_id, cursor=cursor, includes=includes):
+        output.write(line)
+        last_line = line
+        count += 1
+
+    # Znacznik ostatniego wiersza pozwala wznowić przerwany lub przyrostowy eksport
+    last_cursor = json.loads(last_line)['cursor'] if last_line else cursor
+    click.echo(f"Wyeksportowano {count} kosmogramów. Ostatni znacznik: {last_cursor}", err=True)
+
+
+@click.command('import-charts')
+@click.argument('input_file', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'file_format', type=click.Choice(IMPORT_FORMATS), default=None,
+              help="Format pliku (domyślnie na podstawie rozszerzenia)")
+@click.option('--workers', type=int, default=None,
+              help="Liczba procesów obliczeniowych (domyślnie IMPORT_WORKERS)")
+@click.option('--batch-size', type=int, default=None,
+              help="Liczba kosmogramów zapisywanych w jednej transakcji (domyślnie IMPORT_BATCH_SIZE)")
+@click.option('--errors', 'errors_file', type=click.File('w', encoding='utf-8'), default=None,
+              help="Plik, do którego zostanie zapisany pełny raport z błędami wierszy (JSON)")
+@with_appcontext
+def import_charts_command(input_file, file_format, workers, batch_size, errors_file):
+    """Importuje dane urodzeniowe z pliku CSV lub NDJSON."""
+    file_format = file_format or detect_format(input_file.name)
+    if file_format is None:
+        raise click.BadParameter("Nie można rozpoznać formatu pliku - użyj --format", param_hint='--format')
+
+    def report_progress(progress):
+        click.echo(
+            f"Wierszy: {progress['rows']}, zapisano: {progress['imported']}, "
+            f"błędów: {progress['failed']} ({progress['rows_per_second'] or 0:.0f} wierszy/s)",
+            err=True
+        )
+
+    report = import_births(
+        input_file, file_format, calculator,
+        workers=workers or current_app.config.get('IMPORT_WORKERS') or None,
+        chunk_size=current_app.config.get('IMPORT_CHUNK_SIZE', 100),
+        batch_size=batch_size or current_app.config.get('IMPORT_BATCH_SIZE', 500),
+        on_progress=report_progress
+    )
+    result = report.to_dict()
+
+    if errors_file:
+        json.dump(result, errors_file, ensure_ascii=False, indent=2)
+
+    for error in result['errors'][:10]:
+        click.echo(f"Wiersz {error['row']}: {error['error']}", err=True)
+
+    click.echo(
+        f"Zaimportowano {result['imported']} kosmogramów, błędnych wierszy: {result['failed']}",
+        err=True
+    )
+
+
+@click.command('migrate-varga-data')
+@click.option('--batch-size', type=int, default=500, help="Liczba wierszy przekodowywanych w jednej transakcji")
+@with_appcontext
+def migrate_varga_data_command(batch_size):
+    """Zapisuje dane varg w poprzednim formacie (JSON) w formacie binarnym."""
+    migrated = migrate_varga_chart_data(batch_size=batch_size)
+    click.echo(f"Przekodowano {migrated} wierszy varg.", err=True)
+
+
+@click.command('analysis-worker')
+@click.option('--workers', type=int, default=None,
+              help="Liczba wątków wykonujących analizy (domyślnie ANALYSIS_WORKERS lub 2)")
+@with_appcontext
+def analysis_worker_command(workers):
+    """Wykonuje zadania analiz z kolejki w bazie danych (do przerwania: Ctrl+C lub SIGTERM)."""
+    config = current_app.config
+    pool = AnalysisWorkerPool(
+        current_app._get_current_object(), calculator, openai_client,
+        workers=workers or config.get('ANALYSIS_WORKERS') or 2,
+        poll_interval=config.get('ANALYSIS_POLL_INTERVAL', 1.0),
+        job_timeout=config.get('ANALYSIS_JOB_TIMEOUT', 900),
+        max_attempts=config.get('ANALYSIS_MAX_ATTEMPTS', 3)
+    )
+
+    # SIGTERM (np. zatrzymanie kontenera) kończy pracę po bieżących zadaniach
+    signal.signal(signal.SIGTERM, lambda signum, frame: pool.stop(wait=False))
+
+    pool.start()
+    click.echo(f"Wątki robocze analiz: {pool.workers}. Oczekiwanie na zadania...", err=True)
+    try:
+        pool.join()
+    except KeyboardInterrupt:
+        click.echo("Zatrzymywanie po zakończeniu bieżących zadań...", err=True)
+        pool.stop()
+
+
+def _measure(client, method, url, repeat, **kwargs):
+    """Wykonuje żądanie repeat razy; zwraca (średni czas w ms, rozmiar odpowiedzi w bajtach, odpowiedź)."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        response = client.open(url, method=method, **kwargs)
+        data = response.get_data()  # Odczytuje także odpowiedzi strumieniowe
+    return (time.perf_counter() - started) / repeat * 1000, len(data), response
+
+
+@click.command('benchmark-responses')
+@click.option('--chart-id', type=int, required=True, help="ID kosmogramu dla GET /api/chart/<id>")
+@click.option('--repeat', type=int, default=20, help="Liczba powtórzeń każdego żądania")
+@click.option('--batch-size', type=int, default=100, help="Liczba rekordów w POST /api/compute/batch")
+@with_appcontext
+def benchmark_responses_command(chart_id, repeat, batch_size):
+    """Porównuje czas i rozmiar odpowiedzi API przed i po włączeniu szybkiej serializacji i kompresji."""
+    app = current_app._get_current_object()
+    client = app.test_client()
+    fast_provider = app.json
+    compress = app.config.get('COMPRESS_RESPONSES', True)
+
+    births = [
+        {"birth_date": f"{1950 + i % 50}-{1 + i % 12:02d}-{1 + i % 28:02d}T12:00:00",
+         "latitude": 50.0 + i % 10, "longitude": 19.0 + i % 10}
+        for i in range(batch_size)
+    ]
+    endpoints = [
+        (f'GET /api/chart/{chart_id}', 'GET', f'/api/chart/{chart_id}', {}),
+        ('GET /api/export/charts?include=vargas', 'GET', '/api/export/charts?include=vargas', {}),
+        (f'POST /api/compute/batch ({batch_size})', 'POST', '/api/compute/batch?vargas=D1,D9', {'json': births}),
+    ]
+
+    variants = [('json', DefaultJSONProvider(app), None), ('orjson' if HAS_ORJSON else 'json', fast_provider, None)]
+    variants.append(('+ gzip', fast_provider, 'gzip'))
+    if brotli is not None:
+        variants.append(('+ br', fast_provider, 'br'))
+
+    try:
+        for label, method, url, kwargs in endpoints:
+            click.echo(label)
+            for name, provider, encoding in variants:
+                app.json = provider
+                app.config['COMPRESS_RESPONSES'] = encoding is not None
+                headers = {'Accept-Encoding': encoding or 'identity'}
+                elapsed, size, response = _measure(client, method, url, repeat, headers=headers, **kwargs)
+                click.echo(f"  {name:8} {elapsed:9.2f} ms {size:12d} B  (HTTP {response.status_code})")
+
+            # Wiersze NDJSON są serializowane poza dostawcą JSON Flask - porównanie samej serializacji
+            if response.mimetype == 'application/x-ndjson':
+                app.config['COMPRESS_RESPONSES'] = False
+                records = [json.loads(line) for line in client.open(url, method=method, **kwargs).get_data(as_text=True).splitlines()]
+                for name, serialize in (('json', lambda record: json.dumps(record, ensure_ascii=False)), ('dumps', dumps)):
+                    started = time.perf_counter()
+                    for _ in range(repeat):
+                        for record in records:
+                            serialize(record)
+                    elapsed = (time.perf_counter() - started) / repeat * 1000
+                    click.echo(f"  serializacja wierszy ({name}): {elapsed:.2f} ms / {len(records)} wierszy")
+    finally:
+        app.json = fast_provider
+        app.config['COMPRESS_RESPONSES'] = compress
+
+
+@click.command('benchmark-prompts')
+@click.option('--chart-id', type=int, default=None,
+              help="ID kosmogramu (domyślnie kosmogram przykładowy: 1990-01-01 12:00, Warszawa)")
+@click.option('--budget', type=int, default=None,
+              help="Limit tokenów zapisu kosmogramu (domyślnie PROMPT_TOKEN_BUDGET)")
+@with_appcontext
+def benchmark_prompts_command(chart_id, budget):
+    """Porównuje liczbę tokenów opisowego i zwięzłego zapisu kosmogramu dla obszarów życia."""
+    if budget is None:
+        budget = current_app.config.get('PROMPT_TOKEN_BUDGET')
+
+    if chart_id is not None:
+        varga_set = load_varga_set(chart_id, calculator)
+    else:
+        varga_set = VargaSet(calculator.calculate_chart(datetime(1990, 1, 1, 12, 0), 52.23, 21.01), calculator)
+
+    tokenizer = f"tiktoken {TOKENIZER_ENCODING}" if tiktoken is not None else "szacowanie (brak tiktoken)"
+    click.echo(f"Tokenizer: {tokenizer}")
+    click.echo(f"{'Obszar życia':24} {'opisowy':>8} {'zwięzły':>8} {'limit ' + str(budget) if budget else '':>12}")
+
+    for life_area in LifeArea.query.order_by(LifeArea.id).all():
+        chart_data, area = combine_for_area(varga_set, life_area)
+        verbose = count_tokens(format_chart_for_ai(chart_data, area))
+        compact = count_tokens(format_chart_for_ai(chart_data, area, compact=True))
+        budgeted = count_tokens(format_chart_for_ai(chart_data, area, compact=True, token_budget=budget)) if budget else ''
+        click.echo(f"{life_area.name:24} {verbose:8d} {compact:8d} {budgeted:>12}  "
+                   f"(-{100 * (verbose - compact) / verbose:.0f}%)")
+
+
+def register_commands(app):
+    """
+    Rejestruje polecenia wiersza poleceń aplikacji.
+
+    Args:
+        app (Flask): Aplikacja Flask
+    """
+    app.cli.add_command(export_charts_command)
+    app.cli.add_command(import_charts_command)
+    app.cli.add_command(migrate_varga_data_command)
+    app.cli.add_command(analysis_worker_command)
+    app.cli.add_command(benchmark_responses_command)
+    app.cli.add_command(benchmark_prompts_command)
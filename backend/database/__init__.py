@@ -2,10 +2,11 @@
 Pakiet zawierający modele bazy danych i funkcje pomocnicze.
 """
 
-from .models import db, User, BirthChart, VargaChart, LifeArea, ChartAnalysis
+from .models import db, User, BirthChart, VargaChart, LifeArea, ChartAnalysis, AnalysisJob
 from .utils import (
     init_db, save_birth_chart, save_varga_chart, save_chart_analysis,
-    get_birth_charts, get_birth_chart, get_varga_charts,
+    save_chart_with_vargas, save_charts_bulk,
+    get_birth_charts, get_birth_charts_page, get_birth_chart, get_varga_charts,
     get_life_areas, get_life_area, get_chart_analyses,
     get_chart_analysis, update_life_area_prompt
 )
@@ -17,11 +18,15 @@ __all__ = [
     'VargaChart',
     'LifeArea',
     'ChartAnalysis',
+    'AnalysisJob',
     'init_db',
     'save_birth_chart',
     'save_varga_chart',
     'save_chart_analysis',
+    'save_chart_with_vargas',
+    'save_charts_bulk',
     'get_birth_charts',
+    'get_birth_charts_page',
     'get_birth_chart',
     'get_varga_charts',
     'get_life_areas',
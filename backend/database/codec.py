@@ -0,0 +1,182 @@
+"""
+Zwarty, wersjonowany format binarny danych kosmogramów (VargaChart.chart_data).
+
+Nagłówek: MAGIC (3 bajty), wersja formatu (1 bajt), rodzaj danych (1 bajt),
+a po nim dane skompresowane zlib:
+- CHART_D1 - kosmogram D1 zwrócony przez calculate_chart: metadane JSON
+  i tablica float64 (dzień juliański, ayanamsa, długość/szerokość/odległość
+  ciał, cuspidy domów); znaki, nazwy znaków i aspekty są odtwarzane przy
+  odczycie,
+- GENERIC_JSON - dowolne inne dane jako zwarty JSON.
+
+Kosmogram D1 jest zapisywany binarnie tylko wtedy, gdy odczyt odtwarza
+dokładnie te same dane; w przeciwnym razie używany jest GENERIC_JSON.
+Dane zapisane wcześniej jako tekst JSON (bez nagłówka) są odczytywane bez zmian.
+"""
+
+import json
+import struct
+import zlib
+
+import numpy as np
+
+from ..astro.chart import Chart, POSITION_FIELDS
+from ..astro.varga import BODIES
+from ..serialization import dumps
+
+MAGIC = b'\x00VC'
+CODEC_VERSION = 1
+
+# Rodzaje danych
+GENERIC_JSON = 0
+CHART_D1 = 1
+
+_HEADER = struct.Struct('<3sBB')
+_META_LENGTH = struct.Struct('<H')
+
+# Klucze kosmogramu D1 - inne dane nie mogą być zapisane w formacie CHART_D1
+_CHART_KEYS = {
+    'birth_date', 'latitude', 'longitude', 'julian_day', 'ayanamsa',
+    'ascendant', 'planets', 'houses', 'aspects'
+}
+
+_N_FLOATS = 2 + len(BODIES) * len(POSITION_FIELDS) + 12
+
+
+def _normalize(value):
+    """Zwraca dane w postaci, jaką daje zapis i odczyt JSON (np. klucze domów jako tekst)."""
+    return json.loads(json.dumps(value))
+
+
+def _pack_chart(chart):
+    """
+    Pakuje kosmogram D1 do postaci binarnej.
+
+    Returns:
+        bytes: Dane przed kompresją lub None, jeśli dane nie mają kształtu kosmogramu D1
+    """
+    if set(chart.keys()) != _CHART_KEYS:
+        return None
+
+    try:
+        planets = chart['planets']
+        if list(planets.keys()) != BODIES:
+            return None
+
+        values = [chart['julian_day'], chart['ayanamsa']]
+        for body in BODIES:
+            values.extend(planets[body][field] for field in POSITION_FIELDS)
+        values.extend(chart['houses'][str(number)]['longitude'] for number in range(1, 13))
+
+        floats = np.array(values, dtype='<f8')
+        meta = json.dumps(
+            [chart['birth_date'], chart['latitude'], chart['longitude']],
+            separators=(',', ':')
+        ).encode('utf-8')
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    return _META_LENGTH.pack(len(meta)) + meta + floats.tobytes()
+
+
+def _unpack_chart(payload):
+    """Odtwarza kosmogram D1 z postaci binarnej (w formie odczytu JSON)."""
+    meta_length, = _META_LENGTH.unpack_from(payload)
+    offset = _META_LENGTH.size
+    birth_date, latitude, longitude = json.loads(payload[offset:offset + meta_length])
+
+    floats = np.frombuffer(payload, dtype='<f8', count=_N_FLOATS, offset=offset + meta_length)
+    n_positions = len(BODIES) * len(POSITION_FIELDS)
+
+    chart = Chart(
+        birth_date, latitude, longitude,
+        float(floats[0]), float(floats[1]),
+        floats[2:2 + n_positions], floats[2 + n_positions:]
+    ).to_dict()
+
+    # Zapis JSON zamienia klucze domów na tekst
+    chart['houses'] = {str(number): house for number, house in chart['houses'].items()}
+    return chart
+
+
+def encode(value):
+    """
+    Koduje dane kosmogramu do formatu binarnego.
+
+    Args:
+        value (dict): Dane kosmogramu (dowolny obiekt serializowalny do JSON)
+
+    Returns:
+        bytes: Zakodowane dane
+    """
+    normalized = _normalize(value)
+
+    kind = GENERIC_JSON
+    payload = None
+
+    if isinstance(normalized, dict):
+        packed = _pack_chart(normalized)
+        # Format binarny tylko wtedy, gdy odczyt daje identyczne dane
+        if packed is not None and _normalize(_unpack_chart(packed)) == normalized:
+            kind, payload = CHART_D1, packed
+
+    if payload is None:
+        payload = json.dumps(normalized, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    return _HEADER.pack(MAGIC, CODEC_VERSION, kind) + zlib.compress(payload, 6)
+
+
+def is_encoded(raw):
+    """Sprawdza, czy dane są zapisane w formacie binarnym (a nie jako tekst JSON)."""
+    return isinstance(raw, (bytes, bytearray, memoryview)) and bytes(raw[:len(MAGIC)]) == MAGIC
+
+
+def decode(raw):
+    """
+    Dekoduje dane kosmogramu.
+
+    Args:
+        raw (bytes or str): Dane w formacie binarnym lub tekst JSON z poprzedniego formatu
+
+    Returns:
+        object: Dane kosmogramu
+
+    Raises:
+        ValueError: Jeśli wersja formatu lub rodzaj danych są nieobsługiwane
+    """
+    if not is_encoded(raw):
+        # Poprzedni format - tekst JSON
+        return json.loads(raw)
+
+    raw = bytes(raw)
+    _, version, kind = _HEADER.unpack_from(raw)
+    if version != CODEC_VERSION:
+        raise ValueError(f"Nieobsługiwana wersja formatu danych kosmogramu: {version}")
+
+    payload = zlib.decompress(raw[_HEADER.size:])
+
+    if kind == CHART_D1:
+        return _unpack_chart(payload)
+    if kind == GENERIC_JSON:
+        return json.loads(payload)
+
+    raise ValueError(f"Nieznany rodzaj danych kosmogramu: {kind}")
+
+
+def decode_json_text(raw):
+    """
+    Zwraca dane kosmogramu jako tekst JSON (np. do eksportu).
+
+    Dane w poprzednim formacie są zwracane bez parsowania.
+
+    Args:
+        raw (bytes or str): Dane kosmogramu
+
+    Returns:
+        str: Tekst JSON
+    """
+    if is_encoded(raw):
+        return dumps(decode(raw))
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        return bytes(raw).decode('utf-8')
+    return raw
@@ -0,0 +1,168 @@
+"""
+Strumieniowy eksport kosmogramów do formatu NDJSON (jeden obiekt JSON w wierszu).
+
+Kosmogramy są odczytywane paczkami po kluczu (created_at, id), a vargi
+i analizy dociągane jednym zapytaniem na paczkę kosmogramów, więc zużycie
+pamięci nie zależy od rozmiaru tabeli. Dane varg są wstawiane do wyniku
+jako tekst JSON odczytany przez codec (dane w poprzednim formacie - bez
+ponownego parsowania). Eksportowany jest tylko zapisany kosmogram D1 -
+pozostałe vargi API wylicza z niego na żądanie (VargaSet), a wiersze D2-D12
+zapisane przez poprzednią wersję silnika nie są już odczytywane.
+
+Każdy wiersz zawiera pole 'cursor' - przekazanie go jako początku kolejnego
+eksportu wznawia eksport za tym kosmogramem.
+"""
+
+from sqlalchemy import tuple_
+
+from . import codec
+from ..serialization import dumps
+from .models import BirthChart, VargaChart, ChartAnalysis
+from .utils import encode_cursor, decode_cursor
+
+# Liczba kosmogramów pobieranych i uzupełnianych o vargi jednym zapytaniem
+EXPORT_BATCH_SIZE = 1000
+
+# Dodatkowe dane, które można dołączyć do eksportu
+EXPORT_INCLUDES = ('vargas', 'analyses')
+
+# Kolumny kosmogramu w eksporcie - wiersze, a nie obiekty ORM, aby sesja ich nie gromadziła
+_EXPORT_COLUMNS = (
+    BirthChart.id, BirthChart.name, BirthChart.birth_date, BirthChart.latitude,
+    BirthChart.longitude, BirthChart.user_id, BirthChart.created_at
+)
+
+
+def _chart_record(chart):
+    """Zwraca podstawowe dane kosmogramu (wiersz _EXPORT_COLUMNS) do eksportu."""
+    return {
+        'id': chart.id,
+        'name': chart.name,
+        'birth_date': chart.birth_date.isoformat(),
+        'latitude': chart.latitude,
+        'longitude': chart.longitude,
+        'user_id': chart.user_id,
+        'created_at': chart.created_at.isoformat(),
+        'cursor': encode_cursor(chart.created_at, chart.id)
+    }
+
+
+def _load_vargas(chart_ids):
+    """Pobiera zapisane dane kosmogramu D1 (tekst JSON) dla paczki kosmogramów."""
+    rows = VargaChart.query.with_entities(
+        VargaChart.birth_chart_id, VargaChart.varga_type, VargaChart.chart_data
+    ).filter(
+        VargaChart.birth_chart_id.in_(chart_ids), VargaChart.varga_type == 'D1'
+    ).order_by(VargaChart.id)
+
+    vargas = {}
+    for chart_id, varga_type, chart_data in rows:
+        vargas.setdefault(chart_id, []).append((varga_type, codec.decode_json_text(chart_data)))
+    return vargas
+
+
+def _load_analyses(chart_ids):
+    """Pobiera analizy dla paczki kosmogramów."""
+    rows = ChartAnalysis.query.with_entities(
+        ChartAnalysis.birth_chart_id, ChartAnalysis.id, ChartAnalysis.life_area_id,
+        ChartAnalysis.analysis_result, ChartAnalysis.created_at
+    ).filter(ChartAnalysis.birth_chart_id.in_(chart_ids)).order_by(ChartAnalysis.id)
+
+    analyses = {}
+    for chart_id, analysis_id, life_area_id, analysis_result, created_at in rows:
+        analyses.setdefault(chart_id, []).append({
+            'id': analysis_id,
+            'life_area_id': life_area_id,
+            'analysis_result': analysis_result,
+            'created_at': created_at.isoformat()
+        })
+    return analyses
+
+
+def parse_includes(value):
+    """
+    Parsuje listę dodatkowych danych eksportu (np. 'vargas,analyses').
+
+    Args:
+        value (str): Nazwy oddzielone przecinkami
+
+    Returns:
+        set: Nazwy z EXPORT_INCLUDES
+
+    Raises:
+        ValueError: Jeśli nazwa jest nieznana
+    """
+    includes = {item.strip() for item in (value or '').split(',') if item.strip()}
+    unknown = includes - set(EXPORT_INCLUDES)
+    if unknown:
+        raise ValueError(
+            f"Nieznane dane eksportu: {', '.join(sorted(unknown))}. "
+            f"Dopuszczalne wartości: {', '.join(EXPORT_INCLUDES)}."
+        )
+    return includes
+
+
+def iter_charts_ndjson(created_from=None, created_to=None, user_id=None, cursor=None,
+                       includes=(), batch_size=EXPORT_BATCH_SIZE):
+    """
+    Generuje kolejne wiersze eksportu NDJSON (od najstarszych kosmogramów).
+
+    Args:
+        created_from (datetime, optional): Tylko kosmogramy utworzone od tej chwili
+        created_to (datetime, optional): Tylko kosmogramy utworzone przed tą chwilą
+        user_id (int, optional): Tylko kosmogramy danego użytkownika
+        cursor (str, optional): Wznów eksport za kosmogramem o tym znaczniku
+        includes (iterable, optional): Dodatkowe dane - 'vargas' i/lub 'analyses'
+        batch_size (int, optional): Rozmiar paczki odczytu
+
+    Yields:
+        str: Wiersz JSON zakończony znakiem nowej linii
+
+    Raises:
+        ValueError: Jeśli znacznik jest nieprawidłowy
+    """
+    includes = set(includes)
+    query = BirthChart.query.with_entities(*_EXPORT_COLUMNS)
+
+    if created_from is not None:
+        query = query.filter(BirthChart.created_at >= created_from)
+    if created_to is not None:
+        query = query.filter(BirthChart.created_at < created_to)
+    if user_id is not None:
+        query = query.filter(BirthChart.user_id == user_id)
+
+    position = decode_cursor(cursor) if cursor else None
+
+    while True:
+        # Każda paczka to osobne zapytanie po kluczu (created_at, id) - bez otwartego
+        # kursora, który blokowałby połączenie dla zapytań o vargi i analizy
+        batch_query = query
+        if position is not None:
+            batch_query = batch_query.filter(tuple_(BirthChart.created_at, BirthChart.id) > position)
+
+        batch = batch_query.order_by(BirthChart.created_at, BirthChart.id).limit(batch_size).all()
+        if not batch:
+            return
+
+        position = (batch[-1].created_at, batch[-1].id)
+
+        chart_ids = [chart.id for chart in batch]
+        vargas = _load_vargas(chart_ids) if 'vargas' in includes else {}
+        analyses = _load_analyses(chart_ids) if 'analyses' in includes else {}
+
+        for chart in batch:
+            record = _chart_record(chart)
+            if 'analyses' in includes:
+                record['analyses'] = analyses.get(chart.id, [])
+
+            line = dumps(record)
+
+            if 'vargas' in includes:
+                # Tekst JSON vargi jest wstawiany bez ponownej deserializacji i serializacji
+                varga_items = ','.join(
+                    f'{dumps(varga_type)}:{chart_data}'
+                    for varga_type, chart_data in vargas.get(chart.id, [])
+                )
+                line = f'{line[:-1]},"vargas":{{{varga_items}}}}}'
+
+            yield line + '\n'
@@ -1,6 +1,7 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-import json
+
+from . import codec
 
 db = SQLAlchemy()
 
@@ -23,6 +24,11 @@ class User(db.Model):
 class BirthChart(db.Model):
     """Model kosmogramu urodzeniowego."""
     __tablename__ = 'birth_charts'
+    __table_args__ = (
+        # Stronicowanie po (created_at, id) - globalnie i dla użytkownika
+        db.Index('ix_birth_charts_created_at_id', 'created_at', 'id'),
+        db.Index('ix_birth_charts_user_created_at_id', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -43,11 +49,16 @@ class BirthChart(db.Model):
 class VargaChart(db.Model):
     """Model kosmogramu vargi."""
     __tablename__ = 'varga_charts'
+    __table_args__ = (
+        db.Index('ix_varga_charts_chart_type', 'birth_chart_id', 'varga_type'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     birth_chart_id = db.Column(db.Integer, db.ForeignKey('birth_charts.id'), nullable=False)
     varga_type = db.Column(db.String(20), nullable=False)  # D1, D2, D3, etc.
-    chart_data = db.Column(db.Text, nullable=False)  # JSON z danymi kosmogramu
+    # Dane kosmogramu w formacie codec (starsze wiersze mogą zawierać tekst JSON)
+    # Długość 2**24 - 1 - na MySQL MEDIUMBLOB (jak po zmianie typu kolumny w init_db)
+    chart_data = db.Column(db.LargeBinary(length=2**24 - 1), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     def __repr__(self):
@@ -55,13 +66,23 @@ class VargaChart(db.Model):
     
     @property
     def data(self):
-        """Deserializuj dane kosmogramu z JSON."""
-        return json.loads(self.chart_data)
+        """
+        Deserializuj dane kosmogramu.
+
+        Wynik jest zapamiętywany w obiekcie do czasu zmiany chart_data,
+        więc kolejne odczyty w obrębie żądania nie dekodują danych ponownie.
+        """
+        cache = getattr(self, '_data_cache', None)
+        if cache is None or cache[0] is not self.chart_data:
+            cache = (self.chart_data, codec.decode(self.chart_data))
+            self._data_cache = cache
+        return cache[1]
     
     @data.setter
     def data(self, value):
-        """Serializuj dane kosmogramu do JSON."""
-        self.chart_data = json.dumps(value)
+        """Serializuj dane kosmogramu do formatu codec."""
+        self.chart_data = codec.encode(value)
+        self._data_cache = None
 
 
 class LifeArea(db.Model):
@@ -84,6 +105,10 @@ class LifeArea(db.Model):
 class ChartAnalysis(db.Model):
     """Model analizy kosmogramu."""
     __tablename__ = 'chart_analyses'
+    __table_args__ = (
+        db.Index('ix_chart_analyses_chart_created_at', 'birth_chart_id', 'created_at'),
+        db.Index('ix_chart_analyses_chart_area', 'birth_chart_id', 'life_area_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     birth_chart_id = db.Column(db.Integer, db.ForeignKey('birth_charts.id'), nullable=False)
@@ -95,6 +120,40 @@ class ChartAnalysis(db.Model):
         return f'<ChartAnalysis for Chart #{self.birth_chart_id}, Area: {self.life_area_id}>'
 
 
+class AnalysisJob(db.Model):
+    """Model zadania analizy wykonywanego w tle (kolejka zadań w bazie danych)."""
+    __tablename__ = 'analysis_jobs'
+    __table_args__ = (
+        # Pobieranie najstarszych zadań o danym stanie
+        db.Index('ix_analysis_jobs_status_id', 'status', 'id'),
+    )
+    
+    # Stany zadania
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    birth_chart_id = db.Column(db.Integer, db.ForeignKey('birth_charts.id'), nullable=False)
+    life_area_id = db.Column(db.Integer, db.ForeignKey('life_areas.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    fresh = db.Column(db.Boolean, nullable=False, default=False)  # Bez odpowiedzi z pamięci podręcznej
+    worker_id = db.Column(db.String(100), nullable=True)  # Proces i wątek wykonujący zadanie
+    analysis_id = db.Column(db.Integer, db.ForeignKey('chart_analyses.id'), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    # Relacje
+    analysis = db.relationship('ChartAnalysis', lazy=True)
+    
+    def __repr__(self):
+        return f'<AnalysisJob #{self.id} {self.status}>'
+
+
 # Inicjalizacja domyślnych obszarów życia
 def init_life_areas():
     """Inicjalizuje domyślne obszary życia w bazie danych."""
@@ -1,17 +1,150 @@
 from .models import db, LifeArea, init_life_areas, BirthChart, VargaChart, ChartAnalysis
+from . import codec
+from sqlalchemy import inspect, insert, text, tuple_, update
+from sqlalchemy.types import String
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
+from datetime import datetime
+import base64
+import binascii
+import json
 import logging
+from itertools import islice
 
 logger = logging.getLogger(__name__)
 
+# Domyślna liczba kosmogramów zapisywanych w jednej transakcji
+BULK_BATCH_SIZE = 500
+
+# Domyślny i maksymalny rozmiar strony list
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
 def init_db(app):
     """Inicjalizuje bazę danych i tworzy wszystkie tabele."""
     with app.app_context():
         db.init_app(app)
         db.create_all()
+        create_missing_indexes()
+        upgrade_varga_chart_data_column()
         init_life_areas()
         logger.info("Baza danych zainicjalizowana pomyślnie.")
 
+def create_missing_indexes():
+    """
+    Tworzy indeksy zdefiniowane w modelach, których brakuje w istniejących tabelach.
+    
+    db.create_all() tworzy indeksy tylko razem z nowymi tabelami.
+    """
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+
+def upgrade_varga_chart_data_column():
+    """
+    Zmienia typ kolumny varga_charts.chart_data z tekstowego na binarny.
+    
+    Istniejące dane JSON są zachowywane bez zmian - codec odczytuje je
+    jako poprzedni format, a migrate_varga_chart_data zapisuje je ponownie
+    w formacie binarnym.
+    
+    Returns:
+        bool: True, jeśli typ kolumny został zmieniony
+    """
+    columns = {column['name']: column for column in inspect(db.engine).get_columns(VargaChart.__tablename__)}
+    column = columns.get('chart_data')
+    if column is None or not isinstance(column['type'], String):
+        return False
+    
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        statement = 'ALTER TABLE varga_charts MODIFY chart_data MEDIUMBLOB NOT NULL'
+    elif dialect == 'postgresql':
+        statement = (
+            'ALTER TABLE varga_charts ALTER COLUMN chart_data TYPE BYTEA '
+            "USING convert_to(chart_data, 'UTF8')"
+        )
+    else:
+        # SQLite przechowuje w kolumnie dowolne wartości - zmiana typu nie jest potrzebna
+        return False
+    
+    with db.engine.begin() as connection:
+        connection.execute(text(statement))
+    logger.info("Kolumna varga_charts.chart_data zmieniona na typ binarny.")
+    return True
+
+def migrate_varga_chart_data(batch_size=BULK_BATCH_SIZE):
+    """
+    Zapisuje dane varg w poprzednim formacie (tekst JSON) w formacie binarnym codec.
+    
+    Wiersze są przetwarzane paczkami po id, jedna transakcja na paczkę,
+    więc migrację można przerwać i wznowić.
+    
+    Args:
+        batch_size (int, optional): Liczba wierszy w paczce
+        
+    Returns:
+        int: Liczba przekodowanych wierszy
+    """
+    upgrade_varga_chart_data_column()
+    
+    migrated = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(VargaChart.id, VargaChart.chart_data).filter(
+            VargaChart.id > last_id
+        ).order_by(VargaChart.id).limit(batch_size).all()
+        if not rows:
+            return migrated
+        
+        last_id = rows[-1].id
+        updates = [
+            {'id': row_id, 'chart_data': codec.encode(codec.decode(chart_data))}
+            for row_id, chart_data in rows
+            if not codec.is_encoded(chart_data)
+        ]
+        
+        if updates:
+            # UPDATE po kluczu głównym wykonywane przez executemany
+            db.session.execute(update(VargaChart), updates)
+            db.session.commit()
+            migrated += len(updates)
+            logger.info(f"Przekodowano {migrated} wierszy varg.")
+
+def encode_cursor(created_at, record_id):
+    """
+    Koduje pozycję rekordu jako nieprzezroczysty znacznik stronicowania.
+    
+    Args:
+        created_at (datetime): Data utworzenia rekordu
+        record_id (int): ID rekordu
+        
+    Returns:
+        str: Znacznik (base64 URL-safe)
+    """
+    payload = json.dumps([created_at.isoformat(), record_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    Dekoduje znacznik stronicowania.
+    
+    Args:
+        cursor (str): Znacznik utworzony przez encode_cursor
+        
+    Returns:
+        tuple: (created_at, id)
+        
+    Raises:
+        ValueError: Jeśli znacznik jest nieprawidłowy
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(created_at), int(record_id)
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise ValueError(f"Nieprawidłowy znacznik stronicowania: {cursor}") from e
+
 def save_birth_chart(name, birth_date, latitude, longitude, user_id=None):
     """
     Zapisuje nowy kosmogram urodzeniowy do bazy danych.
@@ -72,6 +205,125 @@ def save_varga_chart(birth_chart_id, varga_type, chart_data):
         logger.error(f"Błąd podczas zapisywania vargi {varga_type}: {str(e)}")
         return None
 
+def _save_chart_batch(records):
+    """
+    Zapisuje paczkę kosmogramów razem z vargami w bieżącej transakcji (bez zatwierdzania).
+    
+    Args:
+        records (list): Słowniki z kluczami name, birth_date, latitude, longitude,
+            opcjonalnie user_id i vargas (słownik typ vargi -> dane)
+        
+    Returns:
+        list: Zapisane obiekty BirthChart
+    """
+    birth_charts = [
+        BirthChart(
+            name=record['name'],
+            birth_date=record['birth_date'],
+            latitude=record['latitude'],
+            longitude=record['longitude'],
+            user_id=record.get('user_id')
+        )
+        for record in records
+    ]
+    
+    db.session.add_all(birth_charts)
+    db.session.flush()  # Nadaje identyfikatory kosmogramom
+    
+    varga_rows = [
+        {
+            'birth_chart_id': birth_chart.id,
+            'varga_type': varga_type,
+            'chart_data': codec.encode(varga_data)
+        }
+        for birth_chart, record in zip(birth_charts, records)
+        for varga_type, varga_data in (record.get('vargas') or {}).items()
+    ]
+    
+    if varga_rows:
+        # Jedno INSERT wykonywane przez executemany dla wszystkich varg paczki
+        db.session.execute(insert(VargaChart), varga_rows)
+    
+    return birth_charts
+
+def save_chart_with_vargas(name, birth_date, latitude, longitude, vargas, user_id=None):
+    """
+    Zapisuje kosmogram urodzeniowy i jego vargi w jednej transakcji.
+    
+    Jeśli zapis którejkolwiek vargi się nie powiedzie, kosmogram również
+    nie zostanie zapisany.
+    
+    Args:
+        name (str): Imię i nazwisko osoby
+        birth_date (datetime): Data i godzina urodzenia
+        latitude (float): Szerokość geograficzna
+        longitude (float): Długość geograficzna
+        vargas (dict): Słownik typ vargi (D1, D2, ...) -> dane kosmogramu
+        user_id (int, optional): ID użytkownika, jeśli dostępne
+        
+    Returns:
+        BirthChart: Zapisany obiekt kosmogramu lub None w przypadku błędu
+    """
+    try:
+        birth_chart, = _save_chart_batch([{
+            'name': name,
+            'birth_date': birth_date,
+            'latitude': latitude,
+            'longitude': longitude,
+            'user_id': user_id,
+            'vargas': vargas
+        }])
+        db.session.commit()
+        return birth_chart
+        
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"Błąd podczas zapisywania kosmogramu z vargami: {str(e)}")
+        return None
+
+def save_charts_bulk(records, batch_size=BULK_BATCH_SIZE):
+    """
+    Zapisuje wiele kosmogramów z vargami, zatwierdzając jedną transakcję na paczkę.
+    
+    Błąd zapisu wycofuje tylko bieżącą paczkę i przerywa import; paczki
+    zatwierdzone wcześniej pozostają w bazie.
+    
+    Args:
+        records (iterable): Słowniki z kluczami name, birth_date, latitude, longitude,
+            opcjonalnie user_id i vargas (słownik typ vargi -> dane)
+        batch_size (int, optional): Liczba kosmogramów w jednej transakcji
+        
+    Returns:
+        list: ID zapisanych kosmogramów w kolejności rekordów
+    """
+    if batch_size < 1:
+        raise ValueError(f"Nieprawidłowy rozmiar paczki: {batch_size}")
+    
+    saved_ids = []
+    records = iter(records)
+    
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+        
+        try:
+            birth_charts = _save_chart_batch(batch)
+            # ID odczytywane przed zatwierdzeniem - po commit obiekty są wygaszane
+            batch_ids = [birth_chart.id for birth_chart in birth_charts]
+            db.session.commit()
+            saved_ids.extend(batch_ids)
+            
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.error(
+                f"Błąd podczas zapisywania paczki kosmogramów "
+                f"(zapisano {len(saved_ids)}): {str(e)}"
+            )
+            break
+    
+    return saved_ids
+
 def save_chart_analysis(birth_chart_id, life_area_id, analysis_result):
     """
     Zapisuje analizę kosmogramu do bazy danych.
@@ -113,6 +365,49 @@ def save_chart_analysis(birth_chart_id, life_area_id, analysis_result):
         logger.error(f"Błąd podczas zapisywania analizy: {str(e)}")
         return None
 
+def save_chart_analyses(birth_chart_id, analysis_results):
+    """
+    Zapisuje analizy kilku obszarów życia w jednej transakcji.
+    
+    Args:
+        birth_chart_id (int): ID kosmogramu urodzeniowego
+        analysis_results (dict): Słownik life_area_id -> wynik analizy
+        
+    Returns:
+        dict: Słownik life_area_id -> zapisany obiekt ChartAnalysis lub None w przypadku błędu
+    """
+    try:
+        # Istniejące analizy są aktualizowane (jak w save_chart_analysis)
+        existing = {
+            analysis.life_area_id: analysis
+            for analysis in ChartAnalysis.query.filter(
+                ChartAnalysis.birth_chart_id == birth_chart_id,
+                ChartAnalysis.life_area_id.in_(list(analysis_results))
+            )
+        }
+        
+        saved = {}
+        for life_area_id, analysis_result in analysis_results.items():
+            analysis = existing.get(life_area_id)
+            if analysis:
+                analysis.analysis_result = analysis_result
+            else:
+                analysis = ChartAnalysis(
+                    birth_chart_id=birth_chart_id,
+                    life_area_id=life_area_id,
+                    analysis_result=analysis_result
+                )
+                db.session.add(analysis)
+            saved[life_area_id] = analysis
+        
+        db.session.commit()
+        return saved
+        
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        logger.error(f"Błąd podczas zapisywania analiz: {str(e)}")
+        return None
+
 def get_birth_charts():
     """
     Pobiera wszystkie kosmogramy urodzeniowe z bazy danych.
@@ -122,6 +417,48 @@ def get_birth_charts():
     """
     return BirthChart.query.order_by(BirthChart.created_at.desc()).all()
 
+def get_birth_charts_page(limit=DEFAULT_PAGE_SIZE, cursor=None, user_id=None):
+    """
+    Pobiera stronę kosmogramów od najnowszych (stronicowanie po kluczu).
+    
+    Kolejna strona zaczyna się bezpośrednio za ostatnim rekordem poprzedniej
+    według (created_at, id), więc koszt zapytania nie rośnie z numerem strony.
+    
+    Args:
+        limit (int, optional): Liczba kosmogramów na stronie (1-MAX_PAGE_SIZE)
+        cursor (str, optional): Znacznik next_cursor z poprzedniej strony
+        user_id (int, optional): Tylko kosmogramy danego użytkownika
+        
+    Returns:
+        tuple: (lista obiektów BirthChart, znacznik następnej strony lub None)
+        
+    Raises:
+        ValueError: Jeśli limit lub znacznik są nieprawidłowe
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"Nieprawidłowy rozmiar strony: {limit}. Dopuszczalne wartości: 1-{MAX_PAGE_SIZE}.")
+    
+    query = BirthChart.query
+    
+    if user_id is not None:
+        query = query.filter(BirthChart.user_id == user_id)
+        
+    if cursor:
+        created_at, chart_id = decode_cursor(cursor)
+        query = query.filter(tuple_(BirthChart.created_at, BirthChart.id) < (created_at, chart_id))
+    
+    # Jeden rekord ponad limit informuje, czy istnieje następna strona
+    charts = query.order_by(
+        BirthChart.created_at.desc(), BirthChart.id.desc()
+    ).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(charts) > limit:
+        charts = charts[:limit]
+        next_cursor = encode_cursor(charts[-1].created_at, charts[-1].id)
+        
+    return charts, next_cursor
+
 def get_birth_chart(chart_id):
     """
     Pobiera pojedynczy kosmogram urodzeniowy.
@@ -195,7 +532,8 @@ def get_chart_analyses(birth_chart_id=None, life_area_id=None):
     Returns:
         list: Lista obiektów ChartAnalysis
     """
-    query = ChartAnalysis.query
+    # Obszary życia ładowane w tym samym zapytaniu (bez zapytania na każdą analizę)
+    query = ChartAnalysis.query.options(joinedload(ChartAnalysis.life_area))
     
     if birth_chart_id:
         query = query.filter_by(birth_chart_id=birth_chart_id)
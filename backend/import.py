@@ -0,0 +1,100 @@
+"""
+Import danych urodzeniowych z pliku CSV lub NDJSON.
+
+Użycie (z katalogu głównego repozytorium):
+    python -m backend.import births.csv [--format csv|ndjson] [--workers N]
+                                        [--batch-size N] [--errors raport.json]
+
+Odpowiednik polecenia flask --app app import-charts: tworzy kontekst
+aplikacji z konfiguracji (FLASK_CONFIG, DATABASE_URL) z bazą danych,
+strefami czasowymi i tablicą efemeryd, a następnie wywołuje import_births.
+"""
+
+import json
+import logging
+import os
+
+import click
+from flask import Flask
+
+from .config import config
+from .database.utils import init_db
+from .astro.timezones import configure_timezone_resolver
+from .api.importer import import_births, detect_format, IMPORT_FORMATS
+from .api.routes import calculator
+
+
+def create_import_app(config_name=None):
+    """
+    Tworzy aplikację z ustawieniami potrzebnymi do importu (bez tras API i wątków analiz).
+
+    Args:
+        config_name (str, optional): Nazwa konfiguracji; domyślnie FLASK_CONFIG
+
+    Returns:
+        Flask: Aplikacja Flask
+    """
+    app = Flask(__name__)
+    app.config.from_object(config[config_name or os.environ.get('FLASK_CONFIG', 'development')])
+    init_db(app)
+
+    configure_timezone_resolver(
+        grid=app.config['TIMEZONE_GRID'],
+        cache_size=app.config['TIMEZONE_CACHE_SIZE'],
+        in_memory=app.config['TIMEZONE_IN_MEMORY']
+    )
+    if app.config.get('EPHEMERIS_TABLE'):
+        calculator.set_ephemeris_table(app.config['EPHEMERIS_TABLE'])
+    return app
+
+
+@click.command()
+@click.argument('input_file', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--format', 'file_format', type=click.Choice(IMPORT_FORMATS), default=None,
+              help="Format pliku (domyślnie na podstawie rozszerzenia)")
+@click.option('--workers', type=int, default=None,
+              help="Liczba procesów obliczeniowych (domyślnie IMPORT_WORKERS)")
+@click.option('--batch-size', type=int, default=None,
+              help="Liczba kosmogramów zapisywanych w jednej transakcji (domyślnie IMPORT_BATCH_SIZE)")
+@click.option('--errors', 'errors_file', type=click.File('w', encoding='utf-8'), default=None,
+              help="Plik, do którego zostanie zapisany pełny raport z błędami wierszy (JSON)")
+def main(input_file, file_format, workers, batch_size, errors_file):
+    """Importuje dane urodzeniowe z pliku CSV lub NDJSON."""
+    file_format = file_format or detect_format(input_file.name)
+    if file_format is None:
+        raise click.BadParameter("Nie można rozpoznać formatu pliku - użyj --format", param_hint='--format')
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    app = create_import_app()
+
+    def report_progress(progress):
+        click.echo(
+            f"Wierszy: {progress['rows']}, zapisano: {progress['imported']}, "
+            f"błędów: {progress['failed']} ({progress['rows_per_second'] or 0:.0f} wierszy/s)",
+            err=True
+        )
+
+    with app.app_context():
+        report = import_births(
+            input_file, file_format, calculator,
+            workers=workers or app.config.get('IMPORT_WORKERS') or None,
+            chunk_size=app.config.get('IMPORT_CHUNK_SIZE', 100),
+            batch_size=batch_size or app.config.get('IMPORT_BATCH_SIZE', 500),
+            on_progress=report_progress
+        )
+    result = report.to_dict()
+
+    if errors_file:
+        json.dump(result, errors_file, ensure_ascii=False, indent=2)
+
+    for error in result['errors'][:10]:
+        click.echo(f"Wiersz {error['row']}: {error['error']}", err=True)
+
+    click.echo(
+        f"Zaimportowano {result['imported']} kosmogramów, błędnych wierszy: {result['failed']}",
+        err=True
+    )
+
+
+if __name__ == '__main__':
+    main(prog_name='python -m backend.import')
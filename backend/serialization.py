@@ -0,0 +1,123 @@
+"""
+Szybka serializacja JSON odpowiedzi API.
+
+Jeśli zainstalowany jest pakiet orjson, jest on używany do serializacji
+(kilkukrotnie szybszy od modułu json przy dużych strukturach z liczbami
+zmiennoprzecinkowymi); w przeciwnym razie używany jest moduł json.
+Opcjonalnie liczby zmiennoprzecinkowe są zaokrąglane do zadanej liczby
+miejsc po przecinku, co zmniejsza rozmiar odpowiedzi.
+
+FastJSONProvider podłącza serializację do Flask (jsonify, request.json).
+"""
+
+import json
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - zależność opcjonalna
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+if HAS_ORJSON:
+    # Klucze liczbowe (np. numery domów) jak w json; daty przez funkcję default (jak we Flask)
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+def round_floats(obj, precision):
+    """
+    Zaokrągla liczby zmiennoprzecinkowe w zagnieżdżonych słownikach i listach.
+
+    Args:
+        obj: Dane do serializacji
+        precision (int): Liczba miejsc po przecinku
+
+    Returns:
+        Dane z zaokrąglonymi liczbami (kopia słowników i list)
+    """
+    if isinstance(obj, float):
+        return round(obj, precision)
+    if isinstance(obj, dict):
+        return {key: round_floats(value, precision) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [round_floats(value, precision) for value in obj]
+    return obj
+
+
+def dumps_bytes(obj, precision=None, indent=False, default=None):
+    """
+    Serializuje dane do JSON (UTF-8).
+
+    Args:
+        obj: Dane do serializacji
+        precision (int, optional): Liczba miejsc po przecinku liczb zmiennoprzecinkowych;
+            None - pełna precyzja
+        indent (bool, optional): Czy formatować wynik z wcięciami
+        default (callable, optional): Funkcja serializująca nieobsługiwane typy
+
+    Returns:
+        bytes: Dane JSON
+    """
+    if precision is not None:
+        obj = round_floats(obj, precision)
+
+    if HAS_ORJSON:
+        options = _ORJSON_OPTIONS | orjson.OPT_INDENT_2 if indent else _ORJSON_OPTIONS
+        return orjson.dumps(obj, default=default, option=options)
+
+    return json.dumps(
+        obj, default=default, ensure_ascii=False,
+        indent=2 if indent else None, separators=None if indent else (',', ':')
+    ).encode('utf-8')
+
+
+def dumps(obj, precision=None, indent=False, default=None):
+    """
+    Serializuje dane do JSON.
+
+    Args:
+        obj: Dane do serializacji
+        precision (int, optional): Jak w dumps_bytes
+        indent (bool, optional): Czy formatować wynik z wcięciami
+        default (callable, optional): Funkcja serializująca nieobsługiwane typy
+
+    Returns:
+        str: Tekst JSON
+    """
+    return dumps_bytes(obj, precision, indent, default).decode('utf-8')
+
+
+def loads(data):
+    """Deserializuje JSON (bytes lub str)."""
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Dostawca JSON dla Flask oparty na dumps_bytes.
+
+    W odróżnieniu od domyślnego nie sortuje kluczy - kolejność varg (D1-D12)
+    i pól jest zachowywana.
+    """
+
+    sort_keys = False
+
+    # Liczba miejsc po przecinku w odpowiedziach; None - pełna precyzja
+    float_precision = None
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, precision=self.float_precision, indent=bool(kwargs.get('indent')),
+                     default=kwargs.get('default', self.default))
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self._app.debug if self.compact is None else not self.compact
+        data = dumps_bytes(obj, precision=self.float_precision, indent=indent, default=self.default)
+        return self._app.response_class(data + b'\n', mimetype=self.mimetype)
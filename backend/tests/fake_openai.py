@@ -0,0 +1,137 @@
+"""
+Lokalny serwer imitujący API OpenAI (chat completions) do testów.
+
+Odpowiada na POST /v1/chat/completions zadanym tekstem podzielonym na
+fragmenty - jako strumień SSE (stream=True) lub pojedynczą odpowiedź JSON.
+Klienta kieruje się na serwer przez base_url (OPENAI_BASE_URL).
+Serwer może też zwrócić zadane błędy (np. 429 z Retry-After, 503)
+na pierwsze żądania - do testów ponawiania i wyłącznika.
+
+Przykład:
+    with FakeOpenAIServer(["Mars ", "w ", "domu 10."]) as server:
+        client = OpenAIClient(api_key='test', base_url=server.base_url)
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """Serwer nie wypisuje błędów połączeń zerwanych przez klienta (np. po limicie czasu)."""
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+class FakeOpenAIServer:
+    """Serwer HTTP w osobnym wątku zwracający odpowiedzi w formacie API OpenAI."""
+
+    def __init__(self, chunks, delay=0.0, errors=None):
+        """
+        Args:
+            chunks (list): Fragmenty tekstu odpowiedzi
+            delay (float, optional): Opóźnienie (w sekundach) generowania każdego fragmentu
+            errors (list, optional): Błędy zwracane na kolejne żądania przed odpowiedziami
+                poprawnymi: kody HTTP lub krotki (kod, słownik nagłówków)
+        """
+        self.chunks = list(chunks)
+        self.delay = delay
+        self.errors = list(errors or [])
+        self.requests = []  # Treści otrzymanych żądań (JSON)
+        self._server = _QuietHTTPServer(('127.0.0.1', 0), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        """Adres API do przekazania klientowi (base_url)."""
+        return f'http://127.0.0.1:{self._server.server_port}/v1'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+                server.requests.append(body)
+
+                if server.errors:
+                    self._send_error(server.errors.pop(0))
+                elif body.get('stream'):
+                    self._send_stream(body.get('model'))
+                else:
+                    self._send_json(body.get('model'))
+
+            def _send_error(self, error):
+                status, headers = error if isinstance(error, tuple) else (error, {})
+                data = json.dumps({"error": {"message": f"Błąd testowy {status}", "type": "server_error"}}).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_json(self, model):
+                time.sleep(server.delay * len(server.chunks))
+                data = json.dumps({
+                    "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": model,
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": ''.join(server.chunks)}}],
+                    "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+                }).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_stream(self, model):
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+
+                for index, text in enumerate(server.chunks):
+                    time.sleep(server.delay)
+                    delta = {"role": "assistant", "content": text} if index == 0 else {"content": text}
+                    self._send_event({
+                        "id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
+                    })
+
+                self._send_event({
+                    "id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+                })
+                self.wfile.write(b'data: [DONE]\n\n')
+                self.wfile.flush()
+                self.close_connection = True
+
+            def _send_event(self, data):
+                self.wfile.write(f'data: {json.dumps(data)}\n\n'.encode('utf-8'))
+                self.wfile.flush()
+
+        return Handler
@@ -1,9 +1,22 @@
 import unittest
+import threading
+import time
+from unittest import mock
+import gzip
 import json
+import zlib
 from datetime import datetime
 from flask import url_for
 from .. import create_app
-from ..database.models import db, User, BirthChart, VargaChart, LifeArea, ChartAnalysis
+from ..database.models import db, User, BirthChart, VargaChart, LifeArea, ChartAnalysis, AnalysisJob
+from ..database import codec
+from ..database.utils import save_charts_bulk, migrate_varga_chart_data
+from ..api.jobs import process_next_job, claim_next_job, execute_job, requeue_stale_jobs
+from ..api.openai_client import OpenAIClient
+from ..api.admission import AdmissionController, AdmissionRejected
+from ..api.llm_transport import LLMTransport, CircuitOpenError
+from ..astro.cache import create_chart_cache
+from .fake_openai import FakeOpenAIServer
 
 class TestAPI(unittest.TestCase):
     
@@ -69,6 +82,73 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(len(data['charts']), 1)
         self.assertEqual(data['charts'][0]['name'], "Jan Testowy")
     
+    def test_get_charts_pagination(self):
+        """Testuje stronicowanie listy kosmogramów po znaczniku."""
+        for i in range(4):
+            db.session.add(BirthChart(
+                name=f"Strona {i}",
+                birth_date=datetime(1990, 1, 1, 12, 0, 0),
+                latitude=52.2297,
+                longitude=21.0122
+            ))
+        db.session.commit()
+        
+        names = []
+        cursor = None
+        while True:
+            query = {'limit': 2}
+            if cursor:
+                query['cursor'] = cursor
+            response = self.client.get('/api/charts', query_string=query)
+            data = json.loads(response.data)
+            
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(data['charts']), 2)
+            names.extend(chart['name'] for chart in data['charts'])
+            
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        
+        self.assertEqual(len(names), 5)
+        self.assertEqual(len(set(names)), 5)
+        
+        response = self.client.get('/api/charts?cursor=nieprawidlowy')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_export_charts_ndjson(self):
+        """Testuje strumieniowy eksport kosmogramów i wznawianie po znaczniku."""
+        save_charts_bulk([
+            {
+                "name": f"Eksport {i}",
+                "birth_date": datetime(1985, 6, 1 + i, 8, 0, 0),
+                "latitude": 50.0,
+                "longitude": 20.0,
+                "vargas": {"D1": {"index": i}}
+            }
+            for i in range(3)
+        ])
+        # Nieaktualna varga zapisana przez poprzednią wersję silnika nie jest eksportowana
+        db.session.add(VargaChart(birth_chart_id=BirthChart.query.filter_by(name="Eksport 2").one().id,
+                                  varga_type="D9", data={"index": 9}))
+        db.session.commit()
+        
+        response = self.client.get('/api/export/charts?include=vargas')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        
+        records = [json.loads(line) for line in response.data.decode('utf-8').splitlines()]
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[-1]['vargas'], {"D1": {"index": 2}})
+        
+        # Wznowienie za pierwszym kosmogramem
+        response = self.client.get(f"/api/export/charts?cursor={records[0]['cursor']}")
+        resumed = [json.loads(line) for line in response.data.decode('utf-8').splitlines()]
+        self.assertEqual([r['id'] for r in resumed], [r['id'] for r in records[1:]])
+        
+        response = self.client.get('/api/export/charts?include=nieznane')
+        self.assertEqual(response.status_code, 400)
+    
     def test_get_chart_details(self):
         """Testuje pobieranie szczegółów kosmogramu."""
         response = self.client.get(f'/api/chart/{self.test_chart_id}')
@@ -80,6 +160,109 @@ class TestAPI(unittest.TestCase):
         self.assertIn('latitude', data)
         self.assertIn('longitude', data)
     
+    def test_get_chart_sparse_fields(self):
+        """Testuje wybór varg i pól kosmogramu."""
+        response = self.client.post('/api/chart', json={
+            "name": "Wybór pól",
+            "birth_date": "1990-01-01T12:00:00",
+            "latitude": 52.2297,
+            "longitude": 21.0122
+        })
+        chart_id = json.loads(response.data)['chart_id']
+        
+        response = self.client.get(f'/api/chart/{chart_id}?vargas=D1,D9&fields=planets,ascendant')
+        data = json.loads(response.data)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(data['vargas']), ['D1', 'D9'])
+        self.assertEqual(set(data['vargas']['D1']), {'planets', 'ascendant'})
+        self.assertEqual(set(data['vargas']['D9']), {'planets'})
+        
+        response = self.client.get(f'/api/chart/{chart_id}?vargas=')
+        self.assertEqual(json.loads(response.data)['vargas'], {})
+        
+        response = self.client.get(f'/api/chart/{chart_id}?vargas=D13')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(f'/api/chart/{chart_id}?fields=nieznane')
+        self.assertEqual(response.status_code, 400)
+    
+    def test_chart_conditional_get(self):
+        """Testuje ETag i odpowiedź 304 dla niezmiennego kosmogramu."""
+        response = self.client.get(f'/api/chart/{self.test_chart_id}')
+        etag = response.headers['ETag']
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response.headers['Cache-Control'])
+        
+        response = self.client.get(f'/api/chart/{self.test_chart_id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(response.data, b'')
+        
+        response = self.client.get(f'/api/chart/{self.test_chart_id}', headers={'If-None-Match': '"inny"'})
+        self.assertEqual(response.status_code, 200)
+    
+    def test_life_areas_etag_changes_on_update(self):
+        """Testuje zmianę ETag listy obszarów życia po aktualizacji promptu."""
+        response = self.client.get('/api/life-areas')
+        etag = response.headers['ETag']
+        self.assertIn('no-cache', response.headers['Cache-Control'])
+        
+        response = self.client.get('/api/life-areas', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        
+        self.client.put(f'/api/life-area/{self.test_area_id}', json={"prompt_template": "Nowy prompt"})
+        
+        response = self.client.get('/api/life-areas', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+    
+    def test_compressed_response(self):
+        """Testuje kompresję gzip odpowiedzi i ETag skompresowanej reprezentacji."""
+        response = self.client.post('/api/chart', json={
+            "name": "Kompresja",
+            "birth_date": "1990-01-01T12:00:00",
+            "latitude": 52.2297,
+            "longitude": 21.0122
+        })
+        chart_id = json.loads(response.data)['chart_id']
+        
+        plain = self.client.get(f'/api/chart/{chart_id}')
+        response = self.client.get(f'/api/chart/{chart_id}', headers={'Accept-Encoding': 'gzip'})
+        
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertLess(len(response.data), len(plain.data))
+        self.assertEqual(json.loads(gzip.decompress(response.data)), json.loads(plain.data))
+        
+        etag = response.headers['ETag']
+        self.assertNotEqual(etag, plain.headers['ETag'])
+        response = self.client.get(f'/api/chart/{chart_id}', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+    
+    def test_compressed_ndjson_stream(self):
+        """Testuje, czy każdy wiersz skompresowanego strumienia NDJSON można zdekodować od razu."""
+        birth = {"birth_date": "1990-01-01T12:00:00", "latitude": 52.2297, "longitude": 21.0122}
+        self.app.config['COMPUTE_WORKERS'] = 1
+        
+        response = self.client.post('/api/compute/batch?fields=planets', json=[birth, birth, {"latitude": 50.0}],
+                                    headers={'Accept-Encoding': 'gzip'}, buffered=False)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        
+        # Każdy fragment strumienia dekoduje się do pełnego wiersza (bez czekania na kolejne fragmenty)
+        decompressor = zlib.decompressobj(31)
+        lines = []
+        for chunk in response.response:
+            data = decompressor.decompress(chunk)
+            if data:
+                self.assertEqual(data.count(b'\n'), 1)
+                self.assertTrue(data.endswith(b'\n'))
+                lines.append(json.loads(data))
+        response.close()
+        
+        self.assertEqual([line['index'] for line in lines], [0, 1, 2])
+        self.assertIn('error', lines[2])
+    
     def test_get_life_areas(self):
         """Testuje pobieranie obszarów życia."""
         response = self.client.get('/api/life-areas')
@@ -114,6 +297,446 @@ class TestAPI(unittest.TestCase):
         # Sprawdź, czy kosmogram został rzeczywiście dodany do bazy
         chart = BirthChart.query.filter_by(name="Anna Testowa").first()
         self.assertIsNotNone(chart)
+        
+        # Zapisywana jest tylko varga D1 - pozostałe są wyliczane przy odczycie
+        vargas = VargaChart.query.filter_by(birth_chart_id=chart.id).all()
+        self.assertEqual([varga.varga_type for varga in vargas], ['D1'])
+    
+    def test_compute_chart(self):
+        """Testuje obliczanie kosmogramów bez zapisu w bazie danych."""
+        birth = {"birth_date": "1990-01-01T12:00:00", "latitude": 52.2297, "longitude": 21.0122}
+        
+        response = self.client.post('/api/compute?vargas=D1,D9', json=birth)
+        data = json.loads(response.data)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(data['vargas']), ['D1', 'D9'])
+        self.assertEqual(BirthChart.query.count(), 1)  # Tylko kosmogram z danych testowych
+        
+        self.app.config['COMPUTE_WORKERS'] = 1
+        response = self.client.post('/api/compute/batch?fields=planets', json=[birth, {"latitude": 50.0}, birth])
+        lines = [json.loads(line) for line in response.data.decode('utf-8').splitlines()]
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual(sorted(line['index'] for line in lines), [0, 1, 2])
+        results = {line['index']: line for line in lines}
+        self.assertIn('error', results[1])
+        self.assertEqual(results[0]['vargas'], results[2]['vargas'])
+        self.assertEqual(list(results[0]['vargas']['D1']), ['planets'])
+        
+        response = self.client.post('/api/compute/batch', json={"births": "nie lista"})
+        self.assertEqual(response.status_code, 400)
+    
+    def _save_test_d1(self):
+        """Zapisuje kosmogram D1 testowego kosmogramu (potrzebny do analiz)."""
+        from ..api.routes import calculator
+        
+        d1 = VargaChart(birth_chart_id=self.test_chart_id, varga_type='D1')
+        d1.data = calculator.calculate_chart(datetime(1990, 1, 1, 12, 0, 0), 52.2297, 21.0122)
+        db.session.add(d1)
+        db.session.commit()
+    
+    def test_analysis_job(self):
+        """Testuje zlecanie analizy jako zadania w tle i sprawdzanie jego stanu."""
+        from ..api.routes import calculator
+        
+        class FakeClient:
+            def analyze_area(self, chart_data, life_area, use_cache=True):
+                return f"Analiza: {life_area['name']}"
+        
+        self._save_test_d1()
+        
+        response = self.client.post('/api/analyze', json={"chart_id": self.test_chart_id, "life_area_id": self.test_area_id})
+        data = json.loads(response.data)
+        
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(data['status'], AnalysisJob.QUEUED)
+        self.assertEqual(response.headers['Location'], data['status_url'])
+        
+        job = process_next_job('test-worker', calculator, FakeClient())
+        self.assertEqual(job.id, data['job_id'])
+        self.assertIsNone(process_next_job('test-worker', calculator, FakeClient()))
+        
+        response = self.client.get(data['status_url'])
+        job_data = json.loads(response.data)
+        
+        self.assertEqual(job_data['status'], AnalysisJob.SUCCEEDED)
+        self.assertEqual(job_data['attempts'], 1)
+        self.assertEqual(job_data['analysis_result'], "Analiza: Zdrowie")
+        self.assertEqual(ChartAnalysis.query.get(job_data['analysis_id']).analysis_result, "Analiza: Zdrowie")
+        
+        # Kosmogram bez zapisanego D1 - zadanie kończy się błędem
+        chart = BirthChart(name="Bez varg", birth_date=datetime(1985, 5, 5, 5, 0, 0), latitude=50.0, longitude=20.0)
+        db.session.add(chart)
+        db.session.commit()
+        
+        response = self.client.post('/api/analyze', json={"chart_id": chart.id, "life_area_id": self.test_area_id})
+        job = process_next_job('test-worker', calculator, FakeClient())
+        
+        self.assertEqual(job.status, AnalysisJob.FAILED)
+        self.assertEqual(job.error, "Brak danych kosmogramu D1")
+        
+        response = self.client.post('/api/analyze', json={"chart_id": 999, "life_area_id": self.test_area_id})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get('/api/jobs/999').status_code, 404)
+    
+    def test_stale_job_result_not_overwritten(self):
+        """Testuje, że wątek, któremu odebrano zadanie, nie nadpisuje wyniku nowego wykonania."""
+        from ..api.routes import calculator
+        
+        class SlowClient:
+            """Klient, w trakcie którego zapytania zadanie wraca do kolejki i przejmuje je inny wątek."""
+            def analyze_area(self, chart_data, life_area, use_cache=True):
+                self.requeued = requeue_stale_jobs(timeout=-1)
+                claim_next_job('worker-b')
+                return "Wynik A"
+        
+        class FakeClient:
+            def analyze_area(self, chart_data, life_area, use_cache=True):
+                return "Wynik B"
+        
+        self._save_test_d1()
+        response = self.client.post('/api/analyze', json={"chart_id": self.test_chart_id, "life_area_id": self.test_area_id})
+        job_id = json.loads(response.data)['job_id']
+        
+        slow_client = SlowClient()
+        job = execute_job(claim_next_job('worker-a'), calculator, slow_client)
+        self.assertEqual(slow_client.requeued, (1, 0))
+        self.assertEqual(job.id, job_id)
+        self.assertEqual(job.status, AnalysisJob.RUNNING)
+        self.assertEqual(job.worker_id, 'worker-b')
+        self.assertIsNone(job.analysis_id)
+        
+        job = execute_job(job, calculator, FakeClient())
+        self.assertEqual(job.status, AnalysisJob.SUCCEEDED)
+        self.assertEqual(job.attempts, 2)
+        self.assertEqual(job.analysis.analysis_result, "Wynik B")
+    
+    def test_analyze_all_areas(self):
+        """Testuje jednoczesną analizę kilku obszarów życia."""
+        from ..api import routes
+        
+        class ConcurrentClient:
+            """Klient czekający, aż obie analizy zostaną uruchomione jednocześnie."""
+            def __init__(self):
+                self.barrier = threading.Barrier(2, timeout=5)
+            
+            def analyze_area(self, chart_data, life_area, use_cache=True):
+                self.barrier.wait()
+                return f"Analiza: {life_area['name']} ({', '.join(chart_data['combined_vargas'])})"
+        
+        career_area = LifeArea(
+            name="Kariera",
+            description="Analiza kariery",
+            prompt_template="Proszę o analizę kariery: {{chart_data}}",
+            varga_combination="D1,D10"
+        )
+        db.session.add(career_area)
+        db.session.commit()
+        self._save_test_d1()
+        
+        with mock.patch.object(routes, 'openai_client', ConcurrentClient()):
+            response = self.client.post('/api/analyze/all', json={"chart_id": self.test_chart_id})
+        data = json.loads(response.data)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['errors'], [])
+        self.assertEqual(
+            [analysis['analysis_result'] for analysis in data['analyses']],
+            ["Analiza: Zdrowie (D1, D6, D12)", "Analiza: Kariera (D1, D10)"]
+        )
+        self.assertEqual(ChartAnalysis.query.filter_by(birth_chart_id=self.test_chart_id).count(), 2)
+        
+        response = self.client.post('/api/analyze/all', json={"chart_id": self.test_chart_id, "life_area_ids": [999]})
+        self.assertEqual(response.status_code, 404)
+    
+    def test_stream_analysis(self):
+        """Testuje strumieniowanie analizy (SSE) z lokalnego serwera imitującego API OpenAI."""
+        from ..api import routes
+        
+        self._save_test_d1()
+        chunks = ["Saturn ", "w ", "domu 6."]
+        
+        with FakeOpenAIServer(chunks) as server:
+            client = OpenAIClient(api_key='test', base_url=server.base_url)
+            with mock.patch.object(routes, 'openai_client', client):
+                response = self.client.get(
+                    f'/api/analyze/stream?chart_id={self.test_chart_id}&life_area_id={self.test_area_id}'
+                )
+                events = [
+                    (block.split('\n')[0][len('event: '):], json.loads(block.split('\n')[1][len('data: '):]))
+                    for block in response.get_data(as_text=True).strip().split('\n\n')
+                ]
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'text/event-stream')
+        self.assertTrue(server.requests[0]['stream'])
+        self.assertEqual([data['text'] for event, data in events if event == 'delta'], chunks)
+        
+        event, data = events[-1]
+        self.assertEqual(event, 'done')
+        self.assertEqual(ChartAnalysis.query.get(data['analysis_id']).analysis_result, "Saturn w domu 6.")
+        
+        response = self.client.get(f'/api/analyze/stream?chart_id=999&life_area_id={self.test_area_id}')
+        self.assertEqual(response.status_code, 404)
+    
+    def test_llm_response_cache(self):
+        """Testuje pamięć podręczną odpowiedzi modelu i łączenie jednoczesnych identycznych zapytań."""
+        with FakeOpenAIServer(["Jowisz ", "w ", "domu 9."], delay=0.05) as server:
+            client = OpenAIClient(api_key='test', base_url=server.base_url)
+            client.cache = create_chart_cache('memory')
+            
+            results = []
+            threads = [
+                threading.Thread(target=lambda: results.append(client.analyze_chart("dane", "Analiza: {{chart_data}}")))
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            self.assertEqual(results, ["Jowisz w domu 9."] * 4)
+            self.assertEqual(len(server.requests), 1)
+            self.assertEqual(server.requests[0]['messages'][1]['content'], "Analiza: dane")
+            
+            # Ponowna analiza z pamięci podręcznej, nowa analiza na żądanie
+            self.assertEqual(client.analyze_chart("dane", "Analiza: {{chart_data}}"), "Jowisz w domu 9.")
+            self.assertEqual(len(server.requests), 1)
+            client.analyze_chart("dane", "Analiza: {{chart_data}}", use_cache=False)
+            self.assertEqual(len(server.requests), 2)
+            
+            # Inny limit tokenów - inny klucz
+            client.analyze_chart("dane", "Analiza: {{chart_data}}", max_tokens=100)
+            self.assertEqual(len(server.requests), 3)
+        
+        stats = client.cache_stats()
+        self.assertEqual(stats['hits'] + stats['coalesced'], 4)
+        self.assertEqual(stats['size'], 2)
+    
+    def test_admission_controller(self):
+        """Testuje limity jednoczesnych zapytań (łączny i na użytkownika) i ograniczoną kolejkę."""
+        admission = AdmissionController(max_in_flight=2, max_per_user=1, max_queue=1, queue_timeout=0.05)
+        
+        first = admission.acquire(user_id=1)
+        # Limit użytkownika - żądanie czeka w kolejce i jest odrzucane po czasie oczekiwania
+        with self.assertRaises(AdmissionRejected) as context:
+            admission.acquire(user_id=1)
+        self.assertGreaterEqual(context.exception.retry_after, 1)
+        
+        # Inny użytkownik mieści się w limicie łącznym
+        second = admission.acquire(user_id=2)
+        self.assertEqual(admission.stats()['in_flight'], 2)
+        
+        # Zwolnienie miejsca przez jedno żądanie dopuszcza oczekujące
+        releaser = threading.Timer(0.02, first.release)
+        releaser.start()
+        admission.queue_timeout = 5
+        with admission.acquire(user_id=3):
+            self.assertEqual(admission.stats()['in_flight'], 2)
+        releaser.join()
+        
+        # Pełna kolejka - natychmiastowe odrzucenie
+        third = admission.acquire(user_id=4)
+        admission.max_queue = 0
+        with self.assertRaises(AdmissionRejected):
+            admission.acquire(user_id=5)
+        
+        third.release()
+        second.release()
+        second.release()  # Ponowne zwolnienie nie zmienia liczników
+        stats = admission.stats()
+        self.assertEqual(stats['in_flight'], 0)
+        self.assertEqual(stats['users'], 0)
+        self.assertEqual(stats['admitted'], 4)
+        self.assertEqual(stats['rejected'], 2)
+        self.assertEqual(stats['max_queue_depth'], 1)
+        self.assertGreater(stats['max_wait_ms'], 0)
+    
+    def test_analysis_admission_limits(self):
+        """Testuje odpowiedzi 429 z Retry-After dla analiz ponad limit."""
+        from ..api import routes
+        
+        user = User(username="tester", email="tester@example.com")
+        db.session.add(user)
+        db.session.commit()
+        chart = db.session.get(BirthChart, self.test_chart_id)
+        chart.user_id = user.id
+        db.session.commit()
+        self._save_test_d1()
+        
+        # Limit niezakończonych zadań użytkownika
+        self.app.config['ANALYSIS_MAX_PENDING_PER_USER'] = 1
+        payload = {"chart_id": self.test_chart_id, "life_area_id": self.test_area_id}
+        self.assertEqual(self.client.post('/api/analyze', json=payload).status_code, 202)
+        response = self.client.post('/api/analyze', json=payload)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response.headers)
+        
+        # Analizy w trakcie żądania ponad limit jednoczesnych zapytań - bez oczekiwania w kolejce
+        admission = AdmissionController(max_in_flight=1, max_queue=0)
+        with mock.patch.object(routes, 'admission', admission):
+            slot = admission.acquire()
+            response = self.client.get(
+                f'/api/analyze/stream?chart_id={self.test_chart_id}&life_area_id={self.test_area_id}'
+            )
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response.headers['Retry-After'], str(json.loads(response.data)['retry_after']))
+            self.assertEqual(self.client.post('/api/analyze/all', json={"chart_id": self.test_chart_id}).status_code, 429)
+            
+            # Tanie żądania nie są ograniczane
+            self.assertEqual(self.client.get(f'/api/chart/{self.test_chart_id}').status_code, 200)
+            slot.release()
+            
+            stats = json.loads(self.client.get('/api/admission/stats').data)
+        
+        self.assertEqual(stats['admission']['rejected'], 2)
+        self.assertEqual(stats['admission']['in_flight'], 0)
+        self.assertEqual(stats['pending_jobs'], 1)
+    
+    def test_openai_transport_retries_and_breaker(self):
+        """Testuje ponawianie zapytań po błędach 429/5xx, limit czasu i wyłącznik."""
+        options = {'backoff_base': 0.01, 'read_timeout': 0.5, 'breaker_threshold': 3, 'breaker_reset': 60}
+        
+        # 429 z Retry-After i 503 - trzecia próba się udaje
+        with FakeOpenAIServer(["Wenus ", "w ", "domu 7."], errors=[(429, {'Retry-After': '0.05'}), 503]) as server:
+            client = OpenAIClient(api_key='test', base_url=server.base_url, transport_options=options)
+            self.assertEqual(client.analyze_chart("dane", "{{chart_data}}"), "Wenus w domu 7.")
+            self.assertEqual(len(server.requests), 3)
+            self.assertEqual(client.transport_stats()['retries'], 2)
+            self.assertEqual(client.transport_stats()['breaker_state'], 'closed')
+        
+        # Retry-After dłuższy niż maksymalny czas oczekiwania - bez ponawiania
+        with FakeOpenAIServer(["Wenus"], errors=[(429, {'Retry-After': '3600'})]) as server:
+            client = OpenAIClient(api_key='test', base_url=server.base_url, transport_options=options)
+            self.assertIsNone(client.analyze_chart("dane", "{{chart_data}}"))
+            self.assertEqual(len(server.requests), 1)
+        
+        # Wolne API - limit czasu odczytu, a po serii błędów wyłącznik odrzuca zapytania bez wysyłania
+        with FakeOpenAIServer(["Ketu"], delay=2.0) as server:
+            client = OpenAIClient(api_key='test', base_url=server.base_url,
+                                  transport_options=dict(options, max_retries=1))
+            started = time.monotonic()
+            self.assertIsNone(client.analyze_chart("dane", "{{chart_data}}"))
+            self.assertLess(time.monotonic() - started, 1.9)
+            self.assertEqual(len(server.requests), 2)
+            
+            # Trzeci błąd otwiera wyłącznik - ponowienie i kolejne zapytania są odrzucane
+            self.assertIsNone(client.analyze_chart("inne dane", "{{chart_data}}"))
+            self.assertIsNone(client.analyze_chart("jeszcze inne dane", "{{chart_data}}"))
+            self.assertEqual(len(server.requests), 3)
+            stats = client.transport_stats()
+            self.assertEqual(stats['breaker_state'], 'open')
+            self.assertEqual(stats['rejected'], 2)
+    
+    def test_circuit_breaker_trial_unexpected_error(self):
+        """Testuje, czy nieoczekiwany błąd zapytania próbnego nie blokuje wyłącznika w stanie half_open."""
+        transport = LLMTransport('test', max_retries=0, breaker_threshold=1, breaker_reset=0.05)
+        create = mock.Mock(side_effect=ValueError("Niepoprawna odpowiedź"))
+        try:
+            with mock.patch.object(transport._client.chat.completions, 'create', create):
+                with self.assertRaises(ValueError):
+                    transport.chat_completion(model='gpt-4', messages=[])
+                self.assertEqual(transport.stats()['breaker_state'], 'open')
+                
+                # Zapytanie próbne kończy się tym samym błędem - wyłącznik ponownie otwarty
+                time.sleep(0.06)
+                with self.assertRaises(ValueError):
+                    transport.chat_completion(model='gpt-4', messages=[])
+                self.assertEqual(transport.stats()['breaker_state'], 'open')
+                with self.assertRaises(CircuitOpenError):
+                    transport.chat_completion(model='gpt-4', messages=[])
+                
+                # Po czasie resetu kolejne zapytanie próbne zamyka wyłącznik
+                time.sleep(0.06)
+                create.side_effect = None
+                create.return_value = "odpowiedź"
+                self.assertEqual(transport.chat_completion(model='gpt-4', messages=[]), "odpowiedź")
+                self.assertEqual(transport.stats()['breaker_state'], 'closed')
+        finally:
+            transport.close()
+    
+    def test_save_charts_bulk(self):
+        """Testuje zapis wielu kosmogramów z vargami w paczkach."""
+        records = [
+            {
+                "name": f"Import {i}",
+                "birth_date": datetime(1980, 1, 1 + i, 12, 0, 0),
+                "latitude": 50.0,
+                "longitude": 20.0,
+                "vargas": {"D1": {"index": i}}
+            }
+            for i in range(5)
+        ]
+        
+        chart_ids = save_charts_bulk(records, batch_size=2)
+        
+        self.assertEqual(len(chart_ids), 5)
+        for i, chart_id in enumerate(chart_ids):
+            varga = VargaChart.query.filter_by(birth_chart_id=chart_id, varga_type="D1").first()
+            self.assertEqual(varga.data, {"index": i})
+    
+    def test_varga_chart_data_codec(self):
+        """Testuje binarny zapis danych varg i migrację danych w poprzednim formacie (JSON)."""
+        response = self.client.post('/api/chart', json={
+            "name": "Kodek",
+            "birth_date": "1990-01-01T12:00:00",
+            "latitude": 52.2297,
+            "longitude": 21.0122
+        })
+        chart_id = json.loads(response.data)['chart_id']
+        
+        varga = VargaChart.query.filter_by(birth_chart_id=chart_id, varga_type="D1").first()
+        d1 = varga.data
+        self.assertTrue(codec.is_encoded(varga.chart_data))
+        self.assertLess(len(varga.chart_data), len(json.dumps(d1)) // 4)
+        self.assertIs(varga.data, d1)  # Odczyt zapamiętany w obiekcie
+        
+        # Wiersz w poprzednim formacie jest odczytywany i przekodowywany przez migrację
+        legacy = VargaChart(birth_chart_id=chart_id, varga_type="D9", chart_data=json.dumps(d1).encode('utf-8'))
+        db.session.add(legacy)
+        db.session.commit()
+        self.assertEqual(legacy.data, d1)
+        
+        self.assertEqual(migrate_varga_chart_data(), 1)
+        db.session.expire_all()
+        legacy = VargaChart.query.filter_by(birth_chart_id=chart_id, varga_type="D9").first()
+        self.assertTrue(codec.is_encoded(legacy.chart_data))
+        self.assertEqual(legacy.data, d1)
+        
+        response = self.client.get(f'/api/chart/{chart_id}')
+        self.assertEqual(json.loads(response.data)['vargas']['D1'], d1)
+    
+    def test_bulk_import_charts(self):
+        """Testuje import wielu kosmogramów z pliku CSV z błędnymi wierszami."""
+        csv_data = (
+            "name,birth_date,latitude,longitude\n"
+            "Import 1,1990-01-01T12:00:00,52.2297,21.0122\n"
+            "Zła data,1990-13-01T12:00:00,52.2297,21.0122\n"
+            "Import 2,1985-05-05T05:05:00,50.0647,19.9450\n"
+        )
+        
+        response = self.client.post('/api/charts/bulk', data=csv_data, content_type='text/csv')
+        data = json.loads(response.data)
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['report']['rows'], 3)
+        self.assertEqual(data['report']['imported'], 2)
+        self.assertEqual(data['report']['failed'], 1)
+        self.assertEqual(data['report']['errors'][0]['row'], 3)
+        self.assertIsNotNone(BirthChart.query.filter_by(name="Import 2").first())
+        
+        response = self.client.post('/api/charts/bulk', data=csv_data, content_type='text/plain')
+        self.assertEqual(response.status_code, 400)
+        
+        # Plik ponad limit wierszy jest odrzucany przed zapisem
+        self.app.config['IMPORT_MAX_ROWS'] = 3
+        count = BirthChart.query.count()
+        response = self.client.post('/api/charts/bulk', data=csv_data, content_type='text/csv')
+        self.assertEqual(response.status_code, 413)
+        self.assertIn('python -m backend.import', json.loads(response.data)['error'])
+        self.assertEqual(BirthChart.query.count(), count)
     
     def test_update_life_area_prompt(self):
         """Testuje aktualizację promptu dla obszaru życia."""
@@ -1,7 +1,20 @@
 import unittest
+import os
+import tempfile
 from datetime import datetime
+import numpy as np
 import pytz
-from ..astro.calculator import VedicAstroCalculator
+import swisseph as swe
+from ..astro.calculator import VedicAstroCalculator, BatchError
+from ..astro.varga import calculate_varga_signs, chart_longitudes, BODIES
+from ..astro.ephemeris import build_ephemeris_table, EPHEMERIS_BODIES
+from ..astro.timezones import TimezoneResolver, _ring_edges, _segments_cross_box
+from ..astro.cache import ChartCache, MemoryCacheBackend, SQLiteCacheBackend
+from ..astro.models import AspectsInfo, VedicChartDasa
+from ..astro.chart import Chart, VargaSet
+from ..astro.dasha import VimshottariDasha
+from ..astro.utils import combine_varga_charts, format_chart_for_ai
+from ..astro.prompt_encoder import encode_chart_compact, count_tokens
 
 class TestVedicAstroCalculator(unittest.TestCase):
     
@@ -112,5 +125,353 @@ class TestVedicAstroCalculator(unittest.TestCase):
         # D1 nie zmienia położenia
         self.assertEqual(varga_d1, longitude)
 
+    def test_calculate_charts_batch(self):
+        """Sprawdza, czy obliczenia wsadowe zachowują kolejność rekordów."""
+        births = [
+            (datetime(1980 + i, 6, 15, 8, 30, 0, tzinfo=pytz.UTC), 52.2297, 21.0122)
+            for i in range(5)
+        ]
+        chunk_stats = []
+
+        results = self.calculator.calculate_charts_batch(
+            births, workers=1, chunk_size=2, on_chunk=chunk_stats.append
+        )
+
+        self.assertEqual(len(results), len(births))
+        for (birth_date, latitude, longitude), vargas in zip(births, results):
+            expected = self.calculator.calculate_all_vargas(birth_date, latitude, longitude)
+            self.assertEqual(vargas, expected)
+
+        # Statystyki przepustowości dla każdej paczki (2 + 2 + 1)
+        self.assertEqual([stats['size'] for stats in chunk_stats], [2, 2, 1])
+        self.assertEqual(chunk_stats[-1]['completed'], len(births))
+
+    def test_calculate_varga_signs_matches_charts(self):
+        """Sprawdza, czy zwektoryzowany silnik varg zgadza się z kosmogramami słownikowymi."""
+        charts = [
+            self.calculator.calculate_all_vargas(
+                datetime(1970 + i, 3, 10, 6, 0, 0, tzinfo=pytz.UTC), 50.0619, 19.9368
+            )
+            for i in range(3)
+        ]
+
+        longitudes = chart_longitudes([vargas['D1'] for vargas in charts])
+        signs = calculate_varga_signs(longitudes)
+
+        # Kształt (n_charts, n_bodies, n_vargas)
+        self.assertEqual(signs.shape, (3, len(BODIES), 12))
+
+        for chart_index, vargas in enumerate(charts):
+            for body_index, body in enumerate(BODIES):
+                for varga_num in range(1, 13):
+                    self.assertEqual(
+                        signs[chart_index, body_index, varga_num - 1],
+                        vargas[f'D{varga_num}']['planets'][body]['sign']
+                    )
+
+    def test_calculate_varga_signs_invalid_varga(self):
+        """Sprawdza obsługę nieprawidłowego numeru vargi."""
+        with self.assertRaises(ValueError):
+            calculate_varga_signs([10.0], [13])
+
+    def test_ephemeris_table_matches_swisseph(self):
+        """Sprawdza, czy interpolacja z tablicy efemeryd zgadza się ze Swiss Ephemeris."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = build_ephemeris_table(os.path.join(tmp_dir, 'ephe.npy'), 2000, 2001)
+            table_calculator = VedicAstroCalculator(ephemeris_table=path)
+
+            jd = swe.julday(2000, 7, 14, 17.37)
+            for planet_id in EPHEMERIS_BODIES:
+                expected = swe.calc_ut(jd, planet_id)[0]
+                longitude, latitude, distance = table_calculator._calc_planet_position(jd, planet_id)
+
+                # Różnica długości poniżej 1 sekundy łuku
+                diff = (longitude - expected[0] + 180) % 360 - 180
+                self.assertLess(abs(diff), 1 / 3600)
+                self.assertAlmostEqual(latitude, expected[1], places=3)
+
+            # Moment poza zakresem tablicy liczony jest przez Swiss Ephemeris
+            jd_outside = swe.julday(1990, 1, 1, 12.0)
+            self.assertEqual(
+                table_calculator._calc_planet_position(jd_outside, swe.MOON),
+                self.calculator._calc_planet_position(jd_outside, swe.MOON)
+            )
+
+    def test_timezone_resolver_cache(self):
+        """Sprawdza pamięć podręczną stref czasowych na siatce współrzędnych."""
+        resolver = TimezoneResolver(grid=0.1, cache_size=2)
+
+        self.assertEqual(resolver.resolve(52.2297, 21.0122).zone, 'Europe/Warsaw')
+        self.assertEqual(resolver.resolve(52.2301, 21.0150).zone, 'Europe/Warsaw')
+        self.assertEqual(resolver.stats()['misses'], 1)
+        self.assertEqual(resolver.stats()['hits'], 1)
+
+        zones = resolver.resolve_many([(48.8566, 2.3522), (40.7128, -74.0060)])
+        self.assertEqual([zone.zone for zone in zones], ['Europe/Paris', 'America/New_York'])
+        self.assertEqual(resolver.stats()['evictions'], 1)
+
+    def test_timezone_resolver_border(self):
+        """Sprawdza dokładne wyszukiwanie w oczku przeciętym granicą stref."""
+        # Oczko 1° obejmuje granicę polsko-niemiecką na Odrze
+        resolver = TimezoneResolver(grid=1.0)
+
+        self.assertEqual(resolver.resolve(52.35, 14.55).zone, 'Europe/Berlin')
+        self.assertEqual(resolver.resolve(52.35, 14.60).zone, 'Europe/Warsaw')
+        self.assertEqual(resolver.stats()['border_lookups'], 2)
+
+    def test_timezone_cell_boundary_detection(self):
+        """Sprawdza wykrywanie granic, które omijają narożniki i środek oczka."""
+        # Granica wchodząca i wychodząca dolną krawędzią oczka [0, 10] x [0, 10]
+        spike = np.array([[4, 5, 6], [-5, 3, -5]])
+        self.assertTrue(_segments_cross_box(_ring_edges(spike), 0, 10, 0, 10))
+
+        # Enklawa w całości wewnątrz oczka
+        enclave = np.array([[2, 3, 3, 2], [7, 7, 8, 8]])
+        self.assertTrue(_segments_cross_box(_ring_edges(enclave), 0, 10, 0, 10))
+
+        # Wielokąt poza oczkiem i wielokąt obejmujący całe oczko
+        self.assertFalse(_segments_cross_box(_ring_edges(np.array([[20, 30, 30], [20, 20, 30]])), 0, 10, 0, 10))
+        self.assertFalse(_segments_cross_box(_ring_edges(np.array([[-5, 15, 15, -5], [-5, -5, 15, 15]])), 0, 10, 0, 10))
+
+        # Oczko z wielokątami jednej strefy nie wymaga dokładnego wyszukiwania
+        resolver = TimezoneResolver(grid=0.05)
+        self.assertEqual(resolver.resolve(52.2297, 21.0122).zone, 'Europe/Warsaw')
+        self.assertEqual(resolver.stats()['border_lookups'], 0)
+
+    def test_chart_cache(self):
+        """Sprawdza pamięć podręczną wyników obliczeń kosmogramów."""
+        cache = ChartCache(MemoryCacheBackend(maxsize=1))
+        cached_calculator = VedicAstroCalculator(cache=cache)
+
+        birth_date = datetime(1990, 1, 1, 12, 0, 0, tzinfo=pytz.UTC)
+        first = cached_calculator.calculate_all_vargas(birth_date, 52.2297, 21.0122)
+
+        # Ten sam moment w innej strefie czasowej trafia w pamięć podręczną
+        warsaw_date = birth_date.astimezone(pytz.timezone('Europe/Warsaw'))
+        second = cached_calculator.calculate_all_vargas(warsaw_date, 52.2297, 21.0122)
+
+        self.assertEqual(second['D9']['planets'], first['D9']['planets'])
+        self.assertEqual(second['D1']['birth_date'], warsaw_date.isoformat())
+        self.assertEqual(cache.stats()['hits'], 1)
+
+        # Zwracana jest kopia - modyfikacja nie wpływa na zapisany wynik
+        second['D1']['planets']['Sun']['sign'] = -1
+        third = cached_calculator.calculate_all_vargas(birth_date, 52.2297, 21.0122)
+        self.assertEqual(third['D1']['planets']['Sun']['sign'], first['D1']['planets']['Sun']['sign'])
+
+        # Limit rozmiaru - kosmogram D1 wypiera vargi
+        cached_calculator.calculate_chart(datetime(2000, 1, 1, tzinfo=pytz.UTC), 0.0, 0.0)
+        self.assertGreaterEqual(cache.stats()['evictions'], 1)
+
+    def test_chart_cache_sqlite_backend(self):
+        """Sprawdza magazyn SQLite pamięci podręcznej."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'cache.sqlite')
+            cache = ChartCache(SQLiteCacheBackend(path, maxsize=2, touch_interval=0), ttl=None)
+
+            cache.set('a', {'value': 1})
+            cache.set('b', {'value': 2})
+            self.assertEqual(cache.get('a'), {'value': 1})
+            cache.set('c', {'value': 3})
+
+            # Najdawniej używany wpis ('b') został usunięty
+            self.assertIsNone(cache.get('b'))
+            self.assertEqual(ChartCache(SQLiteCacheBackend(path)).get('c'), {'value': 3})
+            self.assertEqual(cache.stats()['evictions'], 1)
+
+            # Trafienie zapisuje czas użycia dopiero po upływie touch_interval
+            backend = SQLiteCacheBackend(path, touch_interval=60)
+            accessed_at = lambda: backend._conn.execute(
+                "SELECT accessed_at FROM chart_cache WHERE key = 'c'").fetchone()[0]
+            touched = accessed_at()
+            self.assertIsNotNone(backend.get('c', touched + 30))
+            self.assertEqual(accessed_at(), touched)
+            self.assertIsNotNone(backend.get('c', touched + 60))
+            self.assertEqual(accessed_at(), touched + 60)
+
+    def test_aspects_engine(self):
+        """Sprawdza aspekty wedyjskie i aspekty z orbem dla prostego układu planet."""
+        planets = {
+            'Sun': {'longitude': 10.0, 'sign': 0},
+            'Mars': {'longitude': 100.0, 'sign': 3},
+            'Jupiter': {'longitude': 185.0, 'sign': 6}
+        }
+
+        aspects = AspectsInfo().calculate_aspects(planets)
+        pairs = [(a['planet1'], a['planet2'], a['aspect_type']) for a in aspects]
+
+        self.assertEqual(pairs, [
+            ('Sun', 'Mars', 'Kwadratura'),
+            ('Sun', 'Jupiter', 'Opozycja'),
+            ('Mars', 'Jupiter', 'Kwadratura'),
+            ('Mars', 'Jupiter', 'Wedyjski aspekt z domu 4'),
+            ('Jupiter', 'Sun', 'Wedyjski aspekt z domu 7')
+        ])
+        self.assertAlmostEqual(aspects[1]['strength'], 50.0)
+
+        # Kalkulator uwzględnia aspekt 7. domu dla wszystkich planet
+        vedic = self.calculator._calculate_aspects(planets)
+        self.assertIn(
+            {'planet1': 'Sun', 'planet2': 'Jupiter', 'aspect_type': 'Aspekt z domu 7', 'strength': 100},
+            vedic
+        )
+
+    def test_varga_aspects_in_one_call(self):
+        """Sprawdza, czy aspekty wszystkich varg zgadzają się z obliczeniami pojedynczymi."""
+        birth_date = datetime(1990, 1, 1, 12, 0, 0, tzinfo=pytz.UTC)
+        vargas = self.calculator.calculate_all_vargas(birth_date, 52.2297, 21.0122)
+        aspects_info = AspectsInfo()
+
+        varga_aspects = aspects_info.calculate_varga_aspects(vargas)
+
+        self.assertEqual(set(varga_aspects.keys()), set(vargas.keys()))
+        for varga_type, varga_chart in vargas.items():
+            self.assertEqual(
+                varga_aspects[varga_type],
+                aspects_info.calculate_aspects(varga_chart['planets'])
+            )
+            self.assertEqual(
+                varga_chart['aspects'],
+                self.calculator._calculate_aspects(varga_chart['planets'])
+            )
+
+    def test_dasha_tree(self):
+        """Sprawdza okresy Dasha, w tym urodzenie 29 lutego i wyszukiwanie okresu dla daty."""
+        birth_date = datetime(1992, 2, 29, 6, 30, 0, tzinfo=pytz.UTC)
+        dasa = VedicChartDasa(birth_date, 123.45)
+
+        dashas = dasa.calculate_dashas(years_ahead=120)
+        self.assertEqual(dashas[0]['start_date'], birth_date)
+        self.assertAlmostEqual(sum(d['years'] for d in dashas), 120.0, places=6)
+        for previous, current in zip(dashas, dashas[1:]):
+            self.assertEqual(previous['end_date'], current['start_date'])
+
+        date = datetime(2030, 7, 15, tzinfo=pytz.UTC)
+        path = dasa.period_at(date, depth=4)
+        self.assertEqual([p['level'] for p in path],
+                         ['Mahadasha', 'Antardasha', 'Pratyantardasha', 'Sookshma'])
+        for period in path:
+            self.assertLessEqual(period['start_date'], date)
+            self.assertLess(date, period['end_date'])
+
+        # Antardashe z iteratora pokrywają się z wyszukiwaniem dla daty
+        antardashas = list(dasa.iter_periods(date, datetime(2031, 1, 1, tzinfo=pytz.UTC), depth=2))
+        self.assertEqual(antardashas[0], path[1])
+
+        self.assertEqual(dasa.period_at(datetime(1990, 1, 1, tzinfo=pytz.UTC)), [])
+        with self.assertRaises(ValueError):
+            dasa.period_at(date, depth=5)
+
+    def test_dasha_period_boundaries(self):
+        """Sprawdza wyszukiwanie okresu dokładnie na początku każdego okresu z iteratora."""
+        dasha = VimshottariDasha(2448000.5, 'Moon', 3.3)
+
+        for depth, years in ((2, 120), (3, 120), (4, 20)):
+            periods = dasha.iter_periods(dasha.birth_jd, dasha.birth_jd + years * 365.25, depth=depth)
+            for period in periods:
+                if period.start_jd < dasha.birth_jd:
+                    continue
+                path = dasha.period_at(period.start_jd, depth)
+                self.assertEqual(len(path), depth)
+                self.assertEqual(
+                    (path[-1].planet, path[-1].start_jd, path[-1].end_jd),
+                    (period.planet, period.start_jd, period.end_jd)
+                )
+                for parent, child in zip(path, path[1:]):
+                    self.assertIs(child.parent, parent)
+
+    def test_compact_chart(self):
+        """Sprawdza, czy zwarty kosmogram odtwarza format słownikowy i znaki varg."""
+        birth_date = datetime(1990, 1, 1, 12, 0, 0, tzinfo=pytz.UTC)
+        chart_dict = self.calculator.calculate_chart(birth_date, 52.2297, 21.0122)
+        chart = Chart.from_dict(chart_dict)
+
+        self.assertEqual(chart.to_dict(), chart_dict)
+        self.assertEqual(chart['Moon'].longitude, chart_dict['planets']['Moon']['longitude'])
+        self.assertEqual(chart.ascendant.sign, chart_dict['ascendant']['sign'])
+
+        vargas = self.calculator.calculate_all_vargas(birth_date, 52.2297, 21.0122)
+        for varga_num in range(2, 13):
+            for view in chart:
+                self.assertEqual(view.varga_sign(varga_num),
+                                 vargas[f'D{varga_num}']['planets'][view.name]['sign'])
+
+        with self.assertRaises(AttributeError):
+            chart['Sun'].extra = 1
+
+        births = [(birth_date, 52.2297, 21.0122)]
+        compact = self.calculator.calculate_charts_batch(births, workers=1, compact=True)
+        self.assertIsInstance(compact[0], Chart)
+        self.assertEqual(compact[0].to_dict(), chart_dict)
+
+    def test_varga_set_lazy(self):
+        """Sprawdza, czy VargaSet oblicza tylko żądane vargi i zgadza się z calculate_all_vargas."""
+        birth_date = datetime(1990, 1, 1, 12, 0, 0, tzinfo=pytz.UTC)
+        varga_set = self.calculator.calculate_varga_set(birth_date, 52.2297, 21.0122)
+
+        self.assertEqual(varga_set.computed, ['D1'])
+        selected = varga_set.select(['D1', 'D9'])
+        self.assertEqual(list(selected.keys()), ['D1', 'D9'])
+        self.assertEqual(varga_set.computed, ['D1', 'D9'])
+        self.assertIs(varga_set['D9'], selected['D9'])
+
+        vargas = self.calculator.calculate_all_vargas(birth_date, 52.2297, 21.0122)
+        self.assertEqual(varga_set.to_dict(), vargas)
+
+        with self.assertRaises(KeyError):
+            varga_set['D13']
+
+    def test_iter_charts_batch_captures_errors(self):
+        """Sprawdza strumieniowe obliczenia paczek z błędem pojedynczego rekordu."""
+        birth_date = datetime(1990, 1, 1, 12, 0, 0, tzinfo=pytz.UTC)
+        births = iter([
+            (birth_date, 52.2297, 21.0122),
+            (None, 52.2297, 21.0122),
+            (birth_date, 50.0647, 19.9450)
+        ])
+
+        chunks = list(self.calculator.iter_charts_batch(
+            births, workers=1, chunk_size=2, all_vargas=False, capture_errors=True
+        ))
+        results = [result for _, chunk_results, _ in chunks for result in chunk_results]
+
+        self.assertEqual([len(chunk) for chunk, _, _ in chunks], [2, 1])
+        self.assertEqual(results[0], self.calculator.calculate_chart(birth_date, 52.2297, 21.0122))
+        self.assertIsInstance(results[1], BatchError)
+        self.assertEqual(results[2]['latitude'], 50.0647)
+
+    def test_compact_prompt_encoding(self):
+        """Sprawdza zwięzły zapis kosmogramu i pomijanie najsłabszych aspektów w limicie tokenów."""
+        main_chart = self.calculator.calculate_chart(datetime(1990, 1, 1, 12, 0), 52.2297, 21.0122)
+        varga_set = VargaSet(main_chart, self.calculator)
+        chart_data = combine_varga_charts(varga_set.select(['D1', 'D9', 'D10']), ['D1', 'D9', 'D10'])
+        life_area = {'name': 'Kariera', 'description': 'Analiza kariery', 'varga_combination': 'D1,D9,D10'}
+
+        compact = format_chart_for_ai(chart_data, life_area, compact=True)
+        self.assertEqual(compact, encode_chart_compact(chart_data, life_area))
+        self.assertLess(count_tokens(compact), count_tokens(format_chart_for_ai(chart_data, life_area)))
+
+        # Jeden wiersz na ciało niebieskie z kolumnami wszystkich varg
+        lines = compact.splitlines()
+        self.assertIn("Ciało|D1|D9|D10", lines)
+        sun = chart_data['planets']['Sun']
+        self.assertIn(
+            f"Sun|{sun['sign_name']} {sun['degrees_in_sign']:.1f}|{sun['D9']['sign_name']}|{sun['D10']['sign_name']}",
+            lines
+        )
+
+        # Słabszy aspekt jest pomijany przed pełnym
+        chart_data['aspects'] = [
+            {'planet1': 'Mars', 'planet2': 'Moon', 'aspect_type': 'Aspekt 4 domu', 'strength': 75},
+            {'planet1': 'Jupiter', 'planet2': 'Sun', 'aspect_type': 'Aspekt 7 domu', 'strength': 100},
+        ]
+        full = encode_chart_compact(chart_data, life_area)
+        self.assertIn("Jupiter 7: Sun|Mars 4: Moon~75", full)
+
+        budgeted = encode_chart_compact(chart_data, life_area, token_budget=count_tokens(full) - 1)
+        self.assertNotIn("Moon~75", budgeted)
+        self.assertIn("Jupiter 7: Sun", budgeted)
+        self.assertLessEqual(count_tokens(budgeted), count_tokens(full) - 1)
+
 if __name__ == '__main__':
     unittest.main()
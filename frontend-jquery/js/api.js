@@ -83,8 +83,12 @@ function getLifeArea(areaId) {
     return apiRequest(`/life-area/${areaId}`);
 }
 
+// Odstęp między sprawdzeniami stanu zadania analizy (ms)
+const JOB_POLL_INTERVAL = 1500;
+
 /**
  * Analizuje kosmogram dla wybranego obszaru życia
+ * (zleca zadanie i czeka na jego wykonanie w tle)
  * @param {number|string} chartId - ID kosmogramu
  * @param {number|string} lifeAreaId - ID obszaru życia
  * @returns {Promise<Object>} Promise z wynikiem analizy
@@ -93,6 +97,51 @@ function analyzeChart(chartId, lifeAreaId) {
     return apiRequest('/analyze', 'POST', {
         chart_id: parseInt(chartId),
         life_area_id: parseInt(lifeAreaId)
+    }).then(data => waitForJob(data.job_id));
+}
+
+/**
+ * Analizuje kosmogram dla wszystkich (lub wybranych) obszarów życia jednocześnie
+ * @param {number|string} chartId - ID kosmogramu
+ * @param {Array<number>} [lifeAreaIds] - ID obszarów życia (domyślnie wszystkie)
+ * @returns {Promise<Object>} Promise z analizami (analyses) i błędami (errors)
+ */
+function analyzeAllAreas(chartId, lifeAreaIds = null) {
+    const data = { chart_id: parseInt(chartId) };
+    if (lifeAreaIds) {
+        data.life_area_ids = lifeAreaIds.map(id => parseInt(id));
+    }
+    return apiRequest('/analyze/all', 'POST', data);
+}
+
+/**
+ * Pobiera stan zadania analizy
+ * @param {number|string} jobId - ID zadania
+ * @returns {Promise<Object>} Promise ze stanem zadania
+ */
+function getJob(jobId) {
+    return apiRequest(`/jobs/${jobId}`);
+}
+
+/**
+ * Czeka na zakończenie zadania analizy
+ * @param {number|string} jobId - ID zadania
+ * @returns {Promise<Object>} Promise z wynikiem analizy (analysis_id, analysis_result)
+ */
+function waitForJob(jobId) {
+    return getJob(jobId).then(job => {
+        if (job.status === 'succeeded') {
+            return {
+                success: true,
+                analysis_id: job.analysis_id,
+                analysis_result: job.analysis_result
+            };
+        }
+        if (job.status === 'failed') {
+            throw new Error(job.error || 'Analiza nie powiodła się');
+        }
+        return new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL))
+            .then(() => waitForJob(jobId));
     });
 }
 
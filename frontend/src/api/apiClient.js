@@ -27,8 +27,12 @@ const chartsApi = {
   },
   
   // Pobierz szczegóły kosmogramu
-  getChart: async (chartId) => {
-    const response = await apiClient.get(`/chart/${chartId}`);
+  // options.vargas - np. ['D1', 'D9'] (pusta lista - bez varg), options.fields - np. ['planets']
+  getChart: async (chartId, options = {}) => {
+    const params = {};
+    if (options.vargas) params.vargas = options.vargas.join(',');
+    if (options.fields) params.fields = options.fields.join(',');
+    const response = await apiClient.get(`/chart/${chartId}`, { params });
     return response.data;
   },
   
@@ -62,14 +66,89 @@ const lifeAreasApi = {
   }
 };
 
+// Odstęp między sprawdzeniami stanu zadania analizy (ms)
+const JOB_POLL_INTERVAL = 1500;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
 // API analiz
 const analysisApi = {
-  // Przeprowadź analizę kosmogramu
+  // Zleć analizę kosmogramu i poczekaj na wynik (analiza jest wykonywana w tle)
   analyzeChart: async (chartId, lifeAreaId) => {
     const response = await apiClient.post('/analyze', {
       chart_id: chartId,
       life_area_id: lifeAreaId
     });
+    
+    const jobId = response.data.job_id;
+    for (;;) {
+      const job = await analysisApi.getJob(jobId);
+      
+      if (job.status === 'succeeded') {
+        return {
+          success: true,
+          analysis_id: job.analysis_id,
+          analysis_result: job.analysis_result
+        };
+      }
+      
+      if (job.status === 'failed') {
+        // Ten sam kształt błędu co w odpowiedziach axios
+        const error = new Error(job.error);
+        error.response = { data: { error: job.error } };
+        throw error;
+      }
+      
+      await sleep(JOB_POLL_INTERVAL);
+    }
+  },
+  
+  // Przeprowadź analizę, otrzymując tekst na bieżąco (Server-Sent Events);
+  // onText otrzymuje dotychczas wygenerowany tekst
+  streamAnalysis: (chartId, lifeAreaId, onText) => new Promise((resolve, reject) => {
+    const params = new URLSearchParams({ chart_id: chartId, life_area_id: lifeAreaId });
+    const source = new EventSource(`${apiClient.defaults.baseURL}/analyze/stream?${params}`);
+    let text = '';
+    
+    source.addEventListener('delta', (event) => {
+      text += JSON.parse(event.data).text;
+      if (onText) {
+        onText(text);
+      }
+    });
+    
+    source.addEventListener('done', (event) => {
+      source.close();
+      resolve({
+        success: true,
+        analysis_id: JSON.parse(event.data).analysis_id,
+        analysis_result: text
+      });
+    });
+    
+    // Błąd zgłoszony przez serwer (z danymi) lub zerwane połączenie
+    source.addEventListener('error', (event) => {
+      source.close();
+      const message = event.data ? JSON.parse(event.data).error : 'Przerwano połączenie z serwerem.';
+      const error = new Error(message);
+      error.response = { data: { error: message } };
+      reject(error);
+    });
+  }),
+  
+  // Przeprowadź analizy wszystkich (lub wybranych) obszarów życia jednocześnie
+  analyzeAllAreas: async (chartId, lifeAreaIds = null) => {
+    const payload = { chart_id: chartId };
+    if (lifeAreaIds) {
+      payload.life_area_ids = lifeAreaIds;
+    }
+    const response = await apiClient.post('/analyze/all', payload);
+    return response.data;
+  },
+  
+  // Pobierz stan zadania analizy
+  getJob: async (jobId) => {
+    const response = await apiClient.get(`/jobs/${jobId}`);
     return response.data;
   },
   
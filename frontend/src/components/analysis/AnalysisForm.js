@@ -40,7 +40,8 @@ const AnalysisForm = () => {
     const fetchChart = async () => {
       try {
         setLoading(true);
-        const chartData = await chartsApi.getChart(chartId);
+        // Formularz potrzebuje tylko danych podstawowych kosmogramu
+        const chartData = await chartsApi.getChart(chartId, { vargas: [] });
         setChart(chartData);
         setError(null);
       } catch (err) {
@@ -69,10 +70,15 @@ const AnalysisForm = () => {
       setAnalyzing(true);
       setResultError(null);
       
-      const result = await analysisApi.analyzeChart(parseInt(chartId), parseInt(selectedLifeArea));
+      const lifeAreaId = parseInt(selectedLifeArea);
+      
+      // Tekst analizy jest wyświetlany w miarę generowania
+      const result = await analysisApi.streamAnalysis(parseInt(chartId), lifeAreaId, (text) => {
+        setAnalysis({ life_area_id: lifeAreaId, analysis_result: text });
+      });
       
       if (result && result.analysis_result) {
-        setAnalysis(result);
+        setAnalysis({ ...result, life_area_id: lifeAreaId });
       } else {
         setResultError('Nie otrzymano wyników analizy.');
       }